@@ -1,9 +1,39 @@
-from fastapi import FastAPI, File, HTTPException, UploadFile
+import asyncio
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, Header, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.websockets import WebSocket, WebSocketDisconnect
+from model.cache import LRUCache
 from model.model import MNISTModel as Model
+from model.onnx import SessionConfig
+from serving import uploads
+from serving.archives import HEAD_BYTES, archive_format
+from serving.deadlines import request_deadline
+from serving.executor import BoundedExecutor, ExecutorOverloaded
+from serving.frames import FRAMES, encode_frames, parse_frames
+from serving.jobs import Job, JobManager, stream_results
+from serving.metrics import MetricsMiddleware, ServiceMetrics, request_started
+from serving.pixels import NPY_MAGIC, parse_pixels
+from serving.responses import dumps, encode_response
+from serving.streaming import LatestSlot, frame_bytes
+from serving.uploads import UploadTooLarge, check_image, read_upload
+from serving.warmup import Warmup, default_batch_sizes
+from settings import load_settings
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in the background so /health answers while the model warms up
+    warmup.start()
+    yield
+
 
-app = FastAPI(title="Digit Recognition API", version="1.0.0")
+app = FastAPI(title="Digit Recognition API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -14,11 +44,100 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-model = Model()
+settings = load_settings()
+app.add_middleware(
+    uploads.BodyLimitMiddleware, max_bytes=settings.max_request_bytes, path_limits={"/jobs": settings.max_archive_bytes}
+)
+metrics = ServiceMetrics(
+    lambda: executor.stats(), lambda: model.batch_stats(), lambda: model.cache_stats(), lambda: model.coalesce_stats()
+)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+model = Model(
+    model_variant=settings.model_variant,
+    max_batch_size=settings.max_batch_size,
+    max_batch_wait_ms=settings.max_batch_wait_ms,
+    session_config=SessionConfig(
+        intra_op_threads=settings.ort_intra_op_threads,
+        inter_op_threads=settings.ort_inter_op_threads,
+        execution_mode=settings.ort_execution_mode,
+        allow_spinning=settings.ort_allow_spinning,
+        optimization_level=settings.ort_optimization_level,
+        graph_cache_dir=settings.graph_cache_dir or None,
+    ),
+    result_cache=(
+        LRUCache(settings.result_cache_entries, settings.result_cache_bytes, settings.result_cache_ttl_s)
+        if settings.result_cache_enabled
+        else None
+    ),
+    fast_decode=settings.fast_decode,
+    coalesce=settings.coalesce_enabled,
+    stage_timer=metrics.observe_stage,
+    tensor_cache=(
+        LRUCache(settings.tensor_cache_entries, settings.tensor_cache_bytes, settings.tensor_cache_ttl_s)
+        if settings.tensor_cache_enabled
+        else None
+    ),
+)
+executor = BoundedExecutor(settings.executor_workers, settings.executor_queue_size)
+jobs = JobManager(
+    # Bulk results read the caches but do not evict interactive entries from them
+    lambda images: model.process_and_recognize_batch(images, fill_cache=False),
+    busy=lambda: executor.stats()["in_flight"] > 0,
+    check=lambda data: check_image(data, settings.max_image_pixels),
+    workers=settings.job_workers,
+    queue_size=settings.job_queue_size,
+    batch_size=settings.job_batch_size,
+    max_member_bytes=settings.max_upload_bytes,
+    max_yield_s=settings.job_max_yield_s,
+    retention=settings.job_retention,
+)
+# Every batch shape ORT sees: micro-batches, bulk job chunks and whole multi-image requests
+warmup_sizes = settings.warmup_batch_sizes or default_batch_sizes(
+    settings.max_batch_size, settings.job_batch_size, settings.max_files_per_request
+)
+warmup = Warmup(model.warmup, warmup_sizes if settings.warmup_enabled else (), settings.warmup_iterations)
+
+
+def overloaded(e: ExecutorOverloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(settings.retry_after_s)})
+
+
+def observe_parse(request: Request) -> None:
+    """Parse stage: from the request's arrival until its payload is in memory"""
+    started = request_started(request)
+    if started is not None:
+        metrics.observe_stage("parse", time.perf_counter() - started)
+
+
+def deadline_of(request: Request) -> float | None:
+    """The request's deadline: from its X-Request-Timeout-Ms or X-Request-Deadline header, else the default"""
+    try:
+        return request_deadline(request.headers, request_started(request), settings.request_timeout_s)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def read_image(image_file: UploadFile) -> bytes:
+    """The upload's bytes, or 413/400 before it is buffered or decoded if it is too large or not an image"""
+    try:
+        return await read_upload(image_file, settings.max_upload_bytes, settings.max_image_pixels)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def respond(content: dict, request: Request) -> Response:
+    """Recognition results as JSON, MessagePack or compact binary records, by the Accept header"""
+    # Responses render the body in their constructor
+    start = time.perf_counter()
+    response = encode_response(content, request.headers.get("accept"))
+    metrics.observe_stage("serialize", time.perf_counter() - start)
+    return response
 
 
 @app.post("/recognize_digit")
-async def recognize_digit_endpoint(image_file: UploadFile = File(...)):
+async def recognize_digit_endpoint(request: Request, image_file: UploadFile = File(...)):
     """
     Recognize digit from uploaded image
     """
@@ -26,17 +145,281 @@ async def recognize_digit_endpoint(image_file: UploadFile = File(...)):
     if not image_file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image")
 
+    image_bytes = await read_image(image_file)
+    observe_parse(request)
+    deadline = deadline_of(request)
     try:
-        image_bytes = await image_file.read()
-        result = model.process_and_recognize(image_bytes, image_file.filename)
-        return JSONResponse(content=result)
+        # Off the event loop, so concurrent requests can meet in the micro-batcher
+        result = await executor.run(model.process_and_recognize, image_bytes, image_file.filename, deadline=deadline)
+        return respond(result, request)
 
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
 
+@app.post("/recognize_number")
+async def recognize_number_endpoint(request: Request, image_file: UploadFile = File(...)):
+    """
+    Recognize a multi-digit number (amount, ID) from one uploaded image: every digit
+    is segmented and all of them are classified in a single batched inference
+    """
+
+    if not image_file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="File must be an image")
+
+    image_bytes = await read_image(image_file)
+    observe_parse(request)
+    deadline = deadline_of(request)
+    try:
+        result = await executor.run(model.recognize_number, image_bytes, image_file.filename, deadline=deadline)
+        return respond(result, request)
+
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@app.post("/recognize_digits")
+async def recognize_digits_endpoint(request: Request, image_files: list[UploadFile] = File(...)):
+    """
+    Recognize digits from many uploaded images with one batched inference.
+    Returns one result per image in upload order; failures are reported per item.
+    """
+
+    if len(image_files) > settings.max_files_per_request:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.max_files_per_request} images are accepted per request"
+        )
+
+    results: list[dict | None] = [None] * len(image_files)
+    images, positions = [], []
+    for i, image_file in enumerate(image_files):
+        if not (image_file.content_type or "").startswith("image/"):
+            results[i] = {"status": "error", "error": "File must be an image", "filename": image_file.filename}
+            continue
+        try:
+            image_bytes = await read_upload(image_file, settings.max_upload_bytes, settings.max_image_pixels)
+        except ValueError as e:
+            results[i] = {"status": "error", "error": str(e), "filename": image_file.filename}
+            continue
+        images.append((image_bytes, image_file.filename))
+        positions.append(i)
+    observe_parse(request)
+    deadline = deadline_of(request)
+
+    try:
+        recognized = await executor.run(model.process_and_recognize_batch, images, deadline=deadline, items=len(images))
+        for i, result in zip(positions, recognized):
+            results[i] = result
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    return respond({"results": results}, request)
+
+
+@app.post("/recognize_pixels")
+async def recognize_pixels_endpoint(request: Request, x_tensor_shape: str | None = Header(default=None)):
+    """
+    Recognize digits from raw uint8 grayscale crops: an .npy payload, or bare bytes with
+    an X-Tensor-Shape header ("28,28" or "N,28,28"). No image decoding takes place.
+    """
+
+    try:
+        pixels = parse_pixels(await request.body(), x_tensor_shape)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    observe_parse(request)
+
+    if len(pixels) > settings.max_files_per_request:
+        raise HTTPException(
+            status_code=413, detail=f"At most {settings.max_files_per_request} images are accepted per request"
+        )
+    deadline = deadline_of(request)
+
+    try:
+        results = await executor.run(model.recognize_pixels, pixels, deadline=deadline, items=len(pixels))
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    return respond({"results": results}, request)
+
+
+@app.post("/recognize_frames")
+async def recognize_frames_endpoint(request: Request):
+    """
+    Recognize digits from a length-prefixed frame stream of encoded images (serving/frames.py)
+    and answer with a binary record per image, in request order. Meant for service-to-service
+    callers sending many small images: no multipart parsing and no per-image copies.
+    """
+
+    try:
+        frames = parse_frames(await request.body(), settings.max_files_per_request)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    results: list[dict | None] = [None] * len(frames)
+    images, positions = [], []
+    for i, frame in enumerate(frames):
+        try:
+            if len(frame) > settings.max_upload_bytes:
+                limit = settings.max_upload_bytes
+                raise UploadTooLarge(f"Image of {len(frame)} bytes exceeds the limit of {limit} bytes")
+            check_image(frame, settings.max_image_pixels)
+        except ValueError as e:
+            results[i] = {"status": "error", "error": str(e)}
+            continue
+        images.append((frame, str(i)))
+        positions.append(i)
+    observe_parse(request)
+    deadline = deadline_of(request)
+
+    try:
+        recognized = await executor.run(model.process_and_recognize_batch, images, deadline=deadline, items=len(images))
+        for i, result in zip(positions, recognized):
+            results[i] = result
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    start = time.perf_counter()
+    response = Response(content=encode_frames(results), media_type=FRAMES)
+    metrics.observe_stage("serialize", time.perf_counter() - start)
+    return response
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request):
+    """
+    Submit a zip or tar archive of digit images as the raw request body. Returns the job
+    right away; poll GET /jobs/{id} and stream GET /jobs/{id}/results while it runs.
+    """
+
+    # Spooled to an anonymous temporary file: zip needs to seek, and nothing stays in memory
+    archive = tempfile.TemporaryFile()
+    try:
+        head = b""
+        async for chunk in request.stream():
+            if len(head) < HEAD_BYTES:
+                head += chunk[: HEAD_BYTES - len(head)]
+            # Disk writes of a large upload would otherwise stall the event loop for interactive requests
+            await run_in_threadpool(archive.write, chunk)
+        if archive_format(head) is None:
+            raise HTTPException(status_code=400, detail="Body must be a zip or tar archive")
+        await run_in_threadpool(archive.flush)
+        job = jobs.submit(archive)
+    except ExecutorOverloaded as e:
+        raise overloaded(e)
+    except BaseException:
+        archive.close()
+        raise
+
+    return JSONResponse(content=job.status(), status_code=202, headers={"Location": f"/jobs/{job.id}"})
+
+
+def find_job(job_id: str) -> Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """Progress of a bulk job: state, counts of processed, succeeded and failed images"""
+    return find_job(job_id).status()
+
+
+@app.get("/jobs/{job_id}/results")
+async def job_results(job_id: str, request: Request, format: str | None = None, offset: int = 0):
+    """
+    Results of a bulk job in archive order, streamed while it runs: JSON lines by default,
+    server-sent events with format=sse or an Accept: text/event-stream header.
+    `offset` (or Last-Event-ID for SSE) skips results already received.
+    """
+
+    job = find_job(job_id)
+    sse = format == "sse" or (format is None and "text/event-stream" in request.headers.get("accept", ""))
+    last_event_id = request.headers.get("last-event-id")
+    if sse and last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id) + 1
+    return StreamingResponse(
+        stream_results(job, max(0, offset), sse),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Stop a bulk job after its current batch; results so far stay available"""
+    job = find_job(job_id)
+    job.cancel()
+    return job.status()
+
+
+def recognize_frame(data: bytes, seq: int) -> dict:
+    """Recognize one stream frame: an .npy raw-pixel payload or an encoded image"""
+    if data.startswith(NPY_MAGIC):
+        return {"status": "success", "results": model.recognize_pixels(parse_pixels(data))}
+    check_image(data, settings.max_image_pixels)
+    return model.process_and_recognize(data, f"frame-{seq}")
+
+
+@app.websocket("/ws/recognize")
+async def recognize_stream(websocket: WebSocket):
+    """
+    Streaming recognition over one long-lived connection. Every frame (binary image or
+    .npy, or base64 text) gets a sequence number; results come back in order as JSON.
+    Frames that arrive while an older one is still being processed replace each other,
+    so only the newest pending frame is recognized (latest-wins).
+    """
+
+    await websocket.accept()
+    slot = LatestSlot()
+
+    async def receive():
+        seq = 0
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                slot.put((seq, message))
+                seq += 1
+        finally:
+            slot.close()
+
+    receiver = asyncio.create_task(receive())
+    try:
+        while (frame := await slot.get()) is not None:
+            seq, message = frame
+            try:
+                result = await executor.run(recognize_frame, frame_bytes(message), seq)
+            except ExecutorOverloaded as e:
+                result = {"status": "error", "error": str(e)}
+            except ValueError as e:
+                result = {"status": "error", "error": str(e)}
+            await websocket.send_text(dumps({"seq": seq, "dropped": slot.dropped, **result}).decode())
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+
+
 @app.get("/")
 async def root():
     return {"message": "Digit Recognition API is running"}
@@ -44,8 +427,32 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    """Liveness: the process is up, regardless of warmup"""
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 once the startup warmup has finished, 503 before (or if it failed)"""
+    status = warmup.status()
+    return JSONResponse(content=status, status_code=200 if status["ready"] else 503)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return Response(content=metrics.render(), media_type=metrics.content_type)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "batching": model.batch_stats(),
+        "executor": executor.stats(),
+        "cache": model.cache_stats(),
+        "coalescing": model.coalesce_stats(),
+        "jobs": jobs.stats(),
+    }
+
+
 if __name__ == "__main__":
     raise ImportError("This is not main module")
@@ -0,0 +1,262 @@
+"""
+Offline batch recognition of image files, without the HTTP server.
+
+Inputs are directories (walked recursively), glob patterns, image files and list files
+(one path per line). Paths are sent in batches to a pool of worker processes; each
+process holds one ONNXModel session with its own slice of CPU cores (the split
+serving.workers uses) and decodes and infers a whole batch at a time. Results are
+appended to a JSONL or CSV file as batches complete, in completion order, so an
+interrupted run keeps its work: rerun it with --resume to skip the paths already in
+the output.
+
+    python batch.py DIR_OR_GLOB_OR_FILE ... [--list paths.txt] --output results.jsonl
+                    [--format jsonl|csv] [--resume] [--batch-size 64] [--workers N]
+"""
+
+import argparse
+import csv
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Iterable, Iterator, TextIO
+
+from model.decode import decode_image
+from model.onnx import ONNXModel, SessionConfig
+from model.registry import get_variant
+from serving.workers import WorkerPlan, available_cpus, plan_workers
+from settings import load_settings
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+FIELDS = ("path", "status", "digit", "confidence", "error")
+# Batches queued per worker process: keeps workers busy without enumerating millions of paths up front
+TASKS_PER_WORKER = 4
+
+_model: ONNXModel | None = None
+_fast_decode = True
+
+
+def iter_inputs(inputs: Iterable[str], lists: Iterable[str] = ()) -> Iterator[str]:
+    """Image paths from directories, globs, files and list files, each path once, lazily"""
+
+    def expand(item: str) -> Iterator[str]:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(IMAGE_EXTENSIONS):
+                        yield os.path.join(root, name)
+        elif glob.has_magic(item):
+            yield from (path for path in sorted(glob.iglob(item, recursive=True)) if os.path.isfile(path))
+        else:
+            yield item
+
+    def listed(path: str) -> Iterator[str]:
+        with open(path) if path != "-" else nullcontext(sys.stdin) as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+    seen = set()
+    for source in [*inputs, *(item for path in lists for item in listed(path))]:
+        for path in expand(source):
+            path = os.path.normpath(path)
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+
+def batched(paths: Iterable[str], size: int) -> Iterator[list[str]]:
+    batch = []
+    for path in paths:
+        batch.append(path)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _init_worker(plans: multiprocessing.Queue, model_variant: str, graph_cache_dir: str, fast_decode: bool) -> None:
+    global _model, _fast_decode
+    plan: WorkerPlan = plans.get()
+    if plan.cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, plan.cpus)
+    config = SessionConfig(
+        intra_op_threads=plan.intra_op_threads,
+        inter_op_threads=1,
+        execution_mode="sequential",
+        allow_spinning=False,
+        graph_cache_dir=graph_cache_dir or None,
+    )
+    _model = ONNXModel(get_variant(model_variant).path, session_config=config)
+    _fast_decode = fast_decode
+
+
+def _row(path: str, digit: int | None = None, confidence: float | None = None, error: str | None = None) -> dict:
+    status = "error" if error is not None else "success"
+    return {"path": path, "status": status, "digit": digit, "confidence": confidence, "error": error}
+
+
+def recognize_files(paths: list[str]) -> list[dict]:
+    """Decode and recognize a batch of files with one inference; failures are reported per file"""
+    rows: list[dict | None] = [None] * len(paths)
+    images, positions = [], []
+    for i, path in enumerate(paths):
+        try:
+            with open(path, "rb") as f:
+                images.append(decode_image(f.read(), fast=_fast_decode))
+            positions.append(i)
+        except (OSError, ValueError) as e:
+            rows[i] = _row(path, error=str(e))
+
+    # Nothing is seen twice in one run, so the tensor cache would only cost memory
+    for i, (digit, confidence) in zip(positions, _model.infer_batch(images, fill_cache=False)):
+        if digit is None:
+            rows[i] = _row(paths[i], error="Model inference error")
+        else:
+            rows[i] = _row(paths[i], digit, round(confidence, 4))
+    return rows
+
+
+def completed_paths(output: str, fmt: str) -> set[str]:
+    """
+    Paths already in an output file. A last line cut off by an interruption is removed
+    from the file, so appending continues on a clean line.
+    """
+    if not os.path.exists(output):
+        return set()
+    with open(output, "rb+") as f:
+        data = f.read()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            f.truncate(end)
+    lines = data[:end].decode().splitlines()
+    if fmt == "csv":
+        return {row["path"] for row in csv.DictReader(lines)}
+    return {json.loads(line)["path"] for line in lines if line.strip()}
+
+
+class ResultWriter:
+    """Appends result rows as JSON lines or CSV and flushes after every batch"""
+
+    def __init__(self, f: TextIO, fmt: str, header: bool):
+        self.__f = f
+        self.__csv = csv.DictWriter(f, fieldnames=FIELDS, lineterminator="\n") if fmt == "csv" else None
+        if self.__csv is not None and header:
+            self.__csv.writeheader()
+
+    def write(self, rows: list[dict]) -> None:
+        if self.__csv is not None:
+            self.__csv.writerows(rows)
+        else:
+            self.__f.writelines(json.dumps(row) + "\n" for row in rows)
+        self.__f.flush()
+
+
+def run(
+    paths: Iterable[str],
+    output: str,
+    fmt: str = "jsonl",
+    resume: bool = False,
+    batch_size: int = 64,
+    plans: list[WorkerPlan] | None = None,
+    model_variant: str = "fp32",
+    graph_cache_dir: str = "",
+    fast_decode: bool = True,
+    progress: TextIO | None = None,
+) -> dict:
+    """Recognize `paths` into `output`; returns counts of this run"""
+    done = completed_paths(output, fmt) if resume else set()
+    plans = plans or plan_workers(available_cpus())
+    counts = {"skipped": 0, "succeeded": 0, "failed": 0}
+
+    def pending() -> Iterator[str]:
+        for path in paths:
+            if path in done:
+                counts["skipped"] += 1
+            else:
+                yield path
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    for plan in plans:
+        queue.put(plan)
+
+    start = time.perf_counter()
+    header = not (resume and os.path.exists(output) and os.path.getsize(output) > 0)
+    initargs = (queue, model_variant, graph_cache_dir, fast_decode)
+    with (
+        open(output, "a" if resume else "w", newline="") as f,
+        ProcessPoolExecutor(len(plans), mp_context=context, initializer=_init_worker, initargs=initargs) as pool,
+    ):
+        writer = ResultWriter(f, fmt, header)
+        batches = batched(pending(), batch_size)
+        in_flight = set()
+        while True:
+            # Bounded submission: enumeration of the inputs stays lazy
+            for batch in batches:
+                in_flight.add(pool.submit(recognize_files, batch))
+                if len(in_flight) >= TASKS_PER_WORKER * len(plans):
+                    break
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                rows = future.result()
+                writer.write(rows)
+                for row in rows:
+                    counts["succeeded" if row["status"] == "success" else "failed"] += 1
+            if progress is not None:
+                processed = counts["succeeded"] + counts["failed"]
+                rate = processed / (time.perf_counter() - start)
+                print(f"\r{processed} images, {counts['failed']} failed, {rate:.0f}/s", end="", file=progress)
+
+    elapsed = time.perf_counter() - start
+    if progress is not None:
+        print(file=progress)
+    processed = counts["succeeded"] + counts["failed"]
+    return {**counts, "seconds": round(elapsed, 3), "images_per_s": round(processed / elapsed, 1) if elapsed else 0.0}
+
+
+def main(argv: list[str] | None = None) -> int:
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Recognize digits in image files with a pool of worker processes")
+    parser.add_argument("inputs", nargs="*", help="directories, glob patterns or image files")
+    parser.add_argument("--list", action="append", default=[], help="file with one path per line ('-' = stdin)")
+    parser.add_argument("--output", required=True, help="results file, appended to as batches complete")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="default: from the output extension")
+    parser.add_argument("--resume", action="store_true", help="skip paths already in the output and append")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=settings.workers, help="0 = one per available core")
+    parser.add_argument("--threads-per-worker", type=int, default=settings.threads_per_worker)
+    parser.add_argument("--no-pin", dest="pin", action="store_false", default=settings.pin_cpus)
+    parser.add_argument("--model-variant", default=settings.model_variant)
+    parser.add_argument("--quiet", action="store_true", help="no progress line")
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.list:
+        parser.error("no inputs given")
+    fmt = args.format or ("csv" if args.output.endswith(".csv") else "jsonl")
+    summary = run(
+        iter_inputs(args.inputs, args.list),
+        args.output,
+        fmt,
+        args.resume,
+        max(1, args.batch_size),
+        plan_workers(available_cpus(), args.workers, args.threads_per_worker, args.pin),
+        args.model_variant,
+        settings.graph_cache_dir,
+        settings.fast_decode,
+        None if args.quiet else sys.stderr,
+    )
+    print(json.dumps(summary))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
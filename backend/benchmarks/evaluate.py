@@ -0,0 +1,197 @@
+"""
+Accuracy and throughput of model variants on an MNIST-format dataset, in one pass.
+
+Images and labels are IDX files (the original MNIST distribution format, uncompressed)
+or .npy arrays, opened as read-only memory maps: only the batch being evaluated is
+paged in, so datasets far larger than RAM work. Each batch of uint8 crops goes straight
+into ONNXModel.infer_pixels; the report has accuracy, a confusion matrix (rows = true
+label, columns = prediction), per-class recall and images/s with batch latency
+percentiles.
+
+No download needed: --generate writes a synthetic MNIST-like dataset (model/synthetic.py)
+as IDX files, chunk by chunk.
+
+    python -m benchmarks.evaluate --generate data/ [--count 10000]
+    python -m benchmarks.evaluate --images data/images-idx3-ubyte --labels data/labels-idx1-ubyte
+                                  [--variants fp32 int8] [--batch-size 256] [--limit N] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+from model.onnx import ONNXModel, SessionConfig
+from model.registry import get_variant
+from model.synthetic import render_digits
+
+# IDX type codes; all values are stored big-endian
+IDX_DTYPES = {0x08: "u1", 0x09: "i1", 0x0B: ">i2", 0x0C: ">i4", 0x0D: ">f4", 0x0E: ">f8"}
+NPY_MAGIC = b"\x93NUMPY"
+# Samples rendered per chunk by --generate
+GENERATE_CHUNK = 1000
+# Labels checked per chunk when a labels file is opened
+LABEL_CHUNK = 1 << 20
+
+
+def open_idx(path: str) -> np.memmap:
+    """
+    Memory-map an IDX file read-only
+
+    Raises:
+        ValueError: If the file is not an uncompressed IDX file
+    """
+    with open(path, "rb") as f:
+        head = f.read(4)
+        if len(head) < 4 or head[:2] != b"\x00\x00" or head[2] not in IDX_DTYPES:
+            hint = " (gunzip it first)" if head[:2] == b"\x1f\x8b" else ""
+            raise ValueError(f"{path} is not an IDX file{hint}")
+        ndim = head[3]
+        shape = struct.unpack(f">{ndim}I", f.read(4 * ndim))
+    return np.memmap(path, dtype=np.dtype(IDX_DTYPES[head[2]]), mode="r", offset=4 + 4 * ndim, shape=shape)
+
+
+def open_array(path: str) -> np.ndarray:
+    """An IDX file or .npy array as a read-only memory map"""
+    with open(path, "rb") as f:
+        is_npy = f.read(len(NPY_MAGIC)) == NPY_MAGIC
+    return np.load(path, mmap_mode="r") if is_npy else open_idx(path)
+
+
+def open_labels(path: str) -> np.ndarray:
+    """
+    A labels file (IDX or .npy) as a read-only memory map, checked chunk by chunk
+
+    Raises:
+        ValueError: If the labels are not (N,) integers, naming the first row outside 0..9
+    """
+    labels = open_array(path)
+    if labels.ndim != 1 or labels.dtype.kind not in "iu":
+        raise ValueError(f"{path}: expected (N,) integer labels, got {labels.shape} {labels.dtype}")
+    for start in range(0, len(labels), LABEL_CHUNK):
+        chunk = np.asarray(labels[start : start + LABEL_CHUNK])
+        invalid = np.flatnonzero((chunk < 0) | (chunk > 9))
+        if len(invalid):
+            row = start + int(invalid[0])
+            raise ValueError(f"{path}: label {labels[row]} at row {row} is not a digit 0-9")
+    return labels
+
+
+def write_idx_header(f, dtype_code: int, shape: tuple[int, ...]) -> None:
+    f.write(bytes([0, 0, dtype_code, len(shape)]) + struct.pack(f">{len(shape)}I", *shape))
+
+
+def generate(directory: str, count: int, seed: int = 0) -> tuple[str, str]:
+    """Write `count` synthetic digits and their labels as IDX files; returns their paths"""
+    os.makedirs(directory, exist_ok=True)
+    images_path = os.path.join(directory, "images-idx3-ubyte")
+    labels_path = os.path.join(directory, "labels-idx1-ubyte")
+    with open(images_path, "wb") as images_file, open(labels_path, "wb") as labels_file:
+        write_idx_header(images_file, 0x08, (count, 28, 28))
+        write_idx_header(labels_file, 0x08, (count,))
+        for chunk, start in enumerate(range(0, count, GENERATE_CHUNK)):
+            images, labels = render_digits(min(GENERATE_CHUNK, count - start), seed=seed + chunk)
+            images_file.write(images.tobytes())
+            labels_file.write(labels.tobytes())
+    return images_path, labels_path
+
+
+def evaluate(model: ONNXModel, images: np.ndarray, labels: np.ndarray, batch_size: int = 256) -> dict:
+    """One pass over (N,H,W) uint8 images and (N,) labels in batches"""
+    if len(images) != len(labels):
+        raise ValueError(f"{len(images)} images but {len(labels)} labels")
+    if images.dtype != np.uint8 or images.ndim != 3:
+        raise ValueError(f"Expected (N,H,W) uint8 images, got {images.shape} {images.dtype}")
+    confusion = np.zeros((10, 10), dtype=np.int64)
+    failed = 0
+    latencies = []
+
+    start = time.perf_counter()
+    for offset in range(0, len(images), batch_size):
+        batch = images[offset : offset + batch_size]
+        batch_start = time.perf_counter()
+        predictions = model.infer_pixels(batch)
+        latencies.append(time.perf_counter() - batch_start)
+
+        digits = np.array([-1 if digit is None else digit for digit, _ in predictions])
+        truth = np.asarray(labels[offset : offset + batch_size], dtype=np.int64)
+        invalid = np.flatnonzero((truth < 0) | (truth > 9))
+        if len(invalid):
+            row = offset + int(invalid[0])
+            raise ValueError(f"Label {truth[invalid[0]]} at row {row} is not a digit 0-9")
+        ok = digits >= 0
+        failed += int((~ok).sum())
+        np.add.at(confusion, (truth[ok], digits[ok]), 1)
+    elapsed = time.perf_counter() - start
+
+    evaluated = int(confusion.sum())
+    per_class = confusion.sum(axis=1)
+    ms = np.asarray(latencies or [0.0]) * 1000
+    return {
+        "samples": len(images),
+        "failed": failed,
+        "accuracy": round(float(np.trace(confusion) / evaluated), 4) if evaluated else None,
+        "recall": [round(float(confusion[i, i] / n), 4) if n else None for i, n in enumerate(per_class)],
+        "confusion": confusion.tolist(),
+        "seconds": round(elapsed, 3),
+        "images_per_s": round(len(images) / elapsed, 1) if elapsed > 0 else 0.0,
+        "batch_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "batch_p95_ms": round(float(np.percentile(ms, 95)), 3),
+    }
+
+
+def format_report(variant: str, result: dict) -> str:
+    lines = [
+        f"{variant}: accuracy {result['accuracy']}  {result['images_per_s']} images/s  "
+        f"batch p50 {result['batch_p50_ms']} ms  p95 {result['batch_p95_ms']} ms  "
+        f"({result['samples']} samples, {result['failed']} failed)",
+        "true\\pred " + " ".join(f"{digit:>6}" for digit in range(10)) + "  recall",
+    ]
+    for digit, (row, recall) in enumerate(zip(result["confusion"], result["recall"])):
+        cells = " ".join(f"{count:>6}" for count in row)
+        lines.append(f"{digit:>9} {cells}  {recall if recall is not None else '-'}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Accuracy, confusion matrix and throughput on an IDX/.npy dataset")
+    parser.add_argument("--images", help="IDX or .npy file of (N,28,28) uint8 images")
+    parser.add_argument("--labels", help="IDX or .npy file of (N,) labels")
+    parser.add_argument("--generate", metavar="DIR", help="write a synthetic IDX dataset to DIR and exit")
+    parser.add_argument("--count", type=int, default=10000, help="samples for --generate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--variants", nargs="+", default=["fp32"])
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--limit", type=int, help="evaluate only the first N samples")
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="0 = let ORT decide")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if args.generate:
+        images_path, labels_path = generate(args.generate, args.count, args.seed)
+        print(f"Wrote {args.count} samples to {images_path} and {labels_path}")
+        return 0
+    if not args.images or not args.labels:
+        parser.error("--images and --labels are required (or --generate)")
+
+    images, labels = open_array(args.images), open_labels(args.labels)
+    if args.limit is not None:
+        images, labels = images[: args.limit], labels[: args.limit]
+
+    report = {}
+    for variant in args.variants:
+        config = SessionConfig(intra_op_threads=args.intra_op_threads)
+        model = ONNXModel(get_variant(variant).path, session_config=config)
+        report[variant] = evaluate(model, images, labels, max(1, args.batch_size))
+        print(format_report(variant, report[variant]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+"""
+Open-loop load generator for a running backend.
+
+Requests are sent at their scheduled times whether or not earlier ones have completed,
+and latency is measured from the scheduled (intended) send time. A stalled server
+therefore shows up as growing latency instead of as a generator that politely slows
+down (coordinated omission), which is what closed-loop thread pools report.
+
+Trace format: JSON lines, one request each, sorted by time:
+    {"t": 0.125, "endpoint": "/recognize_digit", "image": "synthetic:7"}
+`t` is the send time in seconds from the start of the run; `image` is a path relative to
+the trace file or a generated digit (model/synthetic.py): "synthetic:<digit>" is always
+the same image, "synthetic:<digit>:<seed>" a distinctly styled and noised one. Generated
+traces give every request its own seed, so the server's result and tensor caches cannot
+answer them and the run measures decoding and inference; replaying --images files
+repeats them, which measures cache hits unless the caches are disabled
+(MNIST_RESULT_CACHE_ENABLED=0, MNIST_TENSOR_CACHE_ENABLED=0).
+Supported endpoints: /recognize_digit, /recognize_digits (one image per request)
+and /recognize_pixels.
+
+Replay a trace, or generate Poisson arrivals at a target rate:
+    python -m benchmarks.loadgen --url http://localhost:5000 --trace benchmarks/traces/sample.jsonl
+    python -m benchmarks.loadgen --url http://localhost:5000 --rps 200 --duration 30 [--save-trace out.jsonl]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+
+import cv2
+import httpx
+import numpy as np
+from model.synthetic import render_digit
+
+ENDPOINTS = ("/recognize_digit", "/recognize_digits", "/recognize_pixels")
+
+
+@dataclass(frozen=True)
+class TraceEntry:
+    t: float
+    endpoint: str
+    image: str
+
+
+@dataclass(frozen=True)
+class Sample:
+    intended: float
+    sent: float
+    done: float
+    status: int
+    error: str | None = None
+
+    @property
+    def latency(self) -> float:
+        """Seconds from the scheduled send time to the response"""
+        return self.done - self.intended
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+
+def load_trace(path: str) -> list[TraceEntry]:
+    entries = []
+    with open(path) as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            endpoint = record.get("endpoint", "/recognize_digit")
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"{path}:{number}: unsupported endpoint {endpoint}")
+            entries.append(TraceEntry(float(record["t"]), endpoint, record["image"]))
+    return sorted(entries, key=lambda entry: entry.t)
+
+
+def write_trace(path: str, entries: list[TraceEntry]) -> None:
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(asdict(entry)) + "\n")
+
+
+def poisson_trace(
+    rps: float, duration: float, endpoint: str = "/recognize_digit", images: list[str] | None = None, seed: int = 0
+) -> list[TraceEntry]:
+    """
+    Arrivals of a Poisson process: exponential inter-arrival times with mean 1/rps.
+    Without `images` every request gets its own synthetic digit, never a repeated one.
+    """
+    rng = np.random.default_rng(seed)
+    entries, t = [], 0.0
+    while True:
+        t += rng.exponential(1.0 / rps)
+        if t >= duration:
+            return entries
+        if images:
+            image = images[int(rng.integers(len(images)))]
+        else:
+            image = f"synthetic:{int(rng.integers(10))}:{len(entries)}"
+        entries.append(TraceEntry(round(t, 6), endpoint, image))
+
+
+@lru_cache(maxsize=None)
+def load_image(reference: str, base_dir: str) -> bytes:
+    """Encoded image bytes of a trace reference"""
+    if reference.startswith("synthetic:"):
+        digit, _, seed = reference.removeprefix("synthetic:").partition(":")
+        rng = np.random.default_rng([int(digit), int(seed)] if seed else int(digit))
+        image = render_digit(int(digit), rng)
+        if seed:
+            # Pixel noise on top of the random style keeps seeded digits distinct
+            image = np.clip(image + rng.normal(0, 6, image.shape), 0, 255).astype(np.uint8)
+        _, buffer = cv2.imencode(".png", image)
+        return buffer.tobytes()
+    with open(os.path.join(base_dir, reference), "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def load_pixels(reference: str, base_dir: str) -> bytes:
+    """The reference as a 28x28 uint8 .npy payload for /recognize_pixels"""
+    data = np.frombuffer(load_image(reference, base_dir), np.uint8)
+    image = cv2.resize(cv2.imdecode(data, cv2.IMREAD_GRAYSCALE), (28, 28), interpolation=cv2.INTER_AREA)
+    buffer = io.BytesIO()
+    np.save(buffer, image)
+    return buffer.getvalue()
+
+
+def request_kwargs(entry: TraceEntry, base_dir: str) -> dict:
+    name = os.path.basename(entry.image) if not entry.image.startswith("synthetic:") else "digit.png"
+    if entry.endpoint == "/recognize_pixels":
+        return {"content": load_pixels(entry.image, base_dir)}
+    field = "image_files" if entry.endpoint == "/recognize_digits" else "image_file"
+    return {"files": {field: (name, load_image(entry.image, base_dir), "image/png")}}
+
+
+async def replay(
+    url: str,
+    entries: list[TraceEntry],
+    base_dir: str = ".",
+    timeout: float = 30.0,
+    speed: float = 1.0,
+    transport: httpx.AsyncBaseTransport | None = None,
+) -> list[Sample]:
+    """Send every entry at start + t / speed without waiting for earlier responses"""
+    payloads = [request_kwargs(entry, base_dir) for entry in entries]
+    # No connection cap: a pool limit would turn the generator back into a closed loop
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=256)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits, transport=transport) as client:
+
+        async def send(intended: float, entry: TraceEntry, kwargs: dict) -> Sample:
+            sent = time.perf_counter()
+            try:
+                response = await client.post(entry.endpoint, **kwargs)
+                return Sample(intended, sent, time.perf_counter(), response.status_code)
+            except httpx.HTTPError as e:
+                return Sample(intended, sent, time.perf_counter(), 0, type(e).__name__)
+
+        tasks = []
+        start = time.perf_counter()
+        for entry, kwargs in zip(entries, payloads):
+            intended = start + entry.t / speed
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(intended, entry, kwargs)))
+        samples = await asyncio.gather(*tasks)
+
+    # Report times relative to the start of the run
+    return [Sample(s.intended - start, s.sent - start, s.done - start, s.status, s.error) for s in samples]
+
+
+def _percentiles(latencies: list[float]) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def summarize(samples: list[Sample], interval: float = 1.0) -> dict:
+    """
+    Totals plus one row per `interval` seconds of scheduled time, so latency growing
+    over the run (a queue building up) is visible rather than averaged away.
+    """
+    if not samples:
+        return {"requests": 0, "timeline": []}
+
+    duration = max(s.done for s in samples)
+    statuses: dict[str, int] = {}
+    for s in samples:
+        key = s.error or str(s.status)
+        statuses[key] = statuses.get(key, 0) + 1
+
+    windows: dict[int, list[Sample]] = {}
+    for s in samples:
+        windows.setdefault(int(s.intended // interval), []).append(s)
+    timeline = []
+    for index, window in sorted(windows.items()):
+        timeline.append(
+            {
+                "t": round(index * interval, 3),
+                "sent": len(window),
+                "errors": sum(not s.ok for s in window),
+                **_percentiles([s.latency for s in window if s.ok]),
+            }
+        )
+
+    ok = [s for s in samples if s.ok]
+    return {
+        "requests": len(samples),
+        "succeeded": len(ok),
+        "error_rate": round(1 - len(ok) / len(samples), 4),
+        "statuses": dict(sorted(statuses.items())),
+        "duration_s": round(duration, 3),
+        "throughput_per_s": round(len(ok) / duration, 1) if duration > 0 else 0.0,
+        "max_send_lag_ms": round(1000 * max(s.sent - s.intended for s in samples), 3),
+        **_percentiles([s.latency for s in ok]),
+        "timeline": timeline,
+    }
+
+
+def format_summary(summary: dict) -> str:
+    lines = [
+        f"requests {summary['requests']}  succeeded {summary.get('succeeded', 0)}  "
+        f"error rate {summary.get('error_rate', 0):.2%}  throughput {summary.get('throughput_per_s', 0)}/s",
+        f"latency p50 {summary.get('p50_ms')} ms  p95 {summary.get('p95_ms')} ms  p99 {summary.get('p99_ms')} ms  "
+        f"max {summary.get('max_ms')} ms  (max send lag {summary.get('max_send_lag_ms')} ms)",
+        f"statuses {summary.get('statuses', {})}",
+        "",
+        f"{'t':>7} {'sent':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for row in summary["timeline"]:
+        cells = [f"{row[key]:>9.3f}" if row[key] is not None else f"{'-':>9}" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        lines.append(f"{row['t']:>7.1f} {row['sent']:>6} {row['errors']:>6} " + " ".join(cells))
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Open-loop load generator: replay a trace or Poisson arrivals")
+    parser.add_argument("--url", default="http://localhost:5000")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--trace", help="JSON lines trace to replay")
+    source.add_argument("--rps", type=float, help="Poisson arrival rate")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of Poisson arrivals")
+    parser.add_argument("--endpoint", choices=ENDPOINTS, default="/recognize_digit")
+    parser.add_argument("--images", nargs="+", help="image files for Poisson arrivals (default: synthetic digits)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="timeline resolution in seconds")
+    parser.add_argument("--save-trace", help="write the generated Poisson trace to this file")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        entries, base_dir = load_trace(args.trace), os.path.dirname(os.path.abspath(args.trace))
+    else:
+        images = [os.path.abspath(path) for path in args.images] if args.images else None
+        entries, base_dir = poisson_trace(args.rps, args.duration, args.endpoint, images, args.seed), os.getcwd()
+        if args.save_trace:
+            write_trace(args.save_trace, entries)
+
+    samples = asyncio.run(replay(args.url, entries, base_dir, args.timeout, args.speed))
+    summary = summarize(samples, args.interval)
+    print(format_summary(summary))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary.get("succeeded") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Microbenchmark of image preprocessing: time per image and transient memory per call of
+- legacy: the original per-image path (astype, divide, transpose, expand_dims, astype)
+- allocating: ONNXModel.preprocess_batch returning a fresh (N,1,H,W) array
+- pooled: the inference hot path, writing into reused per-thread buffers
+
+Memory is the peak of traced allocations during one warm call (tracemalloc follows
+NumPy array data), i.e. the garbage a call leaves for the allocator.
+
+    python -m benchmarks.preprocess [--iterations 2000] [--json out.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from typing import Callable
+
+import cv2
+import numpy as np
+from model.onnx import ONNXModel
+from model.registry import get_variant, variant_path
+
+CASES = (
+    ("gray_28", (28, 28), 1),
+    ("gray_200", (200, 200), 1),
+    ("bgr_200", (200, 200, 3), 1),
+    ("gray_28_batch_32", (28, 28), 32),
+)
+
+
+def legacy_preprocess(src_image: np.ndarray, h: int = 28, w: int = 28) -> np.ndarray:
+    """ONNXModel.__preprocess as it was before the batched/pooled rewrite"""
+    if src_image.ndim == 3 and src_image.shape[2] == 3:
+        gray = cv2.cvtColor(src_image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = src_image
+    if gray.shape != (h, w):
+        gray = cv2.resize(gray, (w, h), cv2.INTER_LINEAR)
+    arr = gray.astype(np.float32) / 255.0
+    if arr.ndim == 2:
+        arr = arr[:, :, None]
+    arr = np.transpose(arr, (2, 0, 1))
+    arr = np.expand_dims(arr, axis=0)
+    return arr.astype(np.float32)
+
+
+def transient_bytes(fn: Callable[[], object]) -> int:
+    fn()
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - baseline
+
+
+def time_per_image(fn: Callable[[], object], images: int, iterations: int) -> float:
+    for _ in range(10):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / (iterations * images) * 1e6
+
+
+def run(iterations: int = 2000) -> dict:
+    model = ONNXModel(variant_path(get_variant("fp32")))
+    pooled = model._ONNXModel__normalize, model._ONNXModel__scaled
+    rng = np.random.default_rng(0)
+    report = {}
+    for name, shape, count in CASES:
+        images = [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+        variants = {
+            "legacy": lambda: np.concatenate([legacy_preprocess(image) for image in images]),
+            "allocating": lambda: model.preprocess_batch(images),
+            "pooled": lambda: pooled[1](pooled[0](images)),
+        }
+        reference = variants["legacy"]()
+        report[name] = {}
+        for variant, fn in variants.items():
+            np.testing.assert_allclose(fn(), reference, atol=1e-6)
+            report[name][variant] = {
+                "us_per_image": round(time_per_image(fn, count, max(1, iterations // count)), 3),
+                "transient_bytes_per_call": transient_bytes(fn),
+            }
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Preprocessing time and allocations per image")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = run(args.iterations)
+    print(f"{'case':<18} {'variant':<11} {'us/image':>9} {'bytes/call':>11}")
+    for name, variants in report.items():
+        for variant, result in variants.items():
+            print(f"{name:<18} {variant:<11} {result['us_per_image']:>9.3f} {result['transient_bytes_per_call']:>11}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+"""
+Benchmark suite of the real model and app: decode, preprocess, inference and
+end-to-end HTTP, across image sizes, formats, batch sizes and concurrency levels.
+Every case reports p50/p95/p99/mean latency and throughput.
+
+Run, save the results and compare them against the stored baseline:
+    python -m benchmarks.suite [--quick] [--output results.json]
+                               [--baseline benchmarks/baseline.json] [--tolerance 0.25]
+    python -m benchmarks.suite --update-baseline
+
+A case regresses when a latency percentile exceeds the baseline by more than the
+tolerance, or its throughput drops by more than the tolerance; the exit code is 1
+then. Baselines are machine specific, so refresh them when the hardware changes.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+from model.decode import decode_image
+from model.onnx import ONNXModel
+from model.registry import get_variant, variant_path
+from model.synthetic import render_digits
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "baseline.json")
+
+SIZES = (28, 256, 1024, 3000)
+FORMATS = ("png", "jpeg", "webp", "bmp")
+BATCH_SIZES = (1, 8, 32)
+CONCURRENCY = (1, 4, 16)
+SUITES = ("decode", "preprocess", "inference", "end_to_end")
+
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def summarize(latencies_s: list[float], items: int, wall_s: float) -> dict:
+    """Percentiles of per-call latencies and items/s over the wall time of the whole case"""
+    ms = np.asarray(latencies_s) * 1000
+    return {
+        "calls": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+        "throughput_per_s": round(items / wall_s, 1) if wall_s > 0 else 0.0,
+    }
+
+
+def time_calls(fn: Callable[[], object], iterations: int, items_per_call: int = 1, warmup: int = 3) -> dict:
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, iterations * items_per_call, time.perf_counter() - start)
+
+
+def digit_photo(size: int, seed: int = 0) -> np.ndarray:
+    """A synthetic digit scaled to size x size with sensor-like noise, as a 3-channel photo"""
+    digit = cv2.resize(render_digits(1, seed=seed)[0][0], (size, size), interpolation=cv2.INTER_CUBIC)
+    noise = np.random.default_rng(seed).normal(0, 6, digit.shape)
+    gray = np.clip(digit.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    return cv2.cvtColor(255 - gray, cv2.COLOR_GRAY2BGR)
+
+
+def encode(image: np.ndarray, fmt: str) -> bytes:
+    ok, buffer = cv2.imencode(f".{fmt}", image)
+    if not ok:
+        raise ValueError(f"Could not encode {fmt}")
+    return buffer.tobytes()
+
+
+def _iterations(size: int, quick: bool) -> int:
+    base = 20 if quick else 200
+    return max(5, base // max(1, size // 256))
+
+
+def bench_decode(quick: bool) -> dict:
+    results = {}
+    for size in SIZES:
+        image = digit_photo(size)
+        for fmt in FORMATS:
+            data = encode(image, fmt)
+            results[f"decode/{fmt}/{size}"] = time_calls(lambda: decode_image(data), _iterations(size, quick))
+    return results
+
+
+def bench_preprocess(model: ONNXModel, quick: bool) -> dict:
+    results = {}
+    for size in SIZES:
+        image = decode_image(encode(digit_photo(size), "png"))
+        results[f"preprocess/{size}"] = time_calls(lambda: model.preprocess_batch([image]), 100 if quick else 2000)
+    return results
+
+
+def bench_inference(model: ONNXModel, quick: bool) -> dict:
+    results = {}
+    images, _ = render_digits(max(BATCH_SIZES), seed=3)
+    for batch_size in BATCH_SIZES:
+        batch = images[:batch_size]
+        results[f"inference/batch_{batch_size}"] = time_calls(
+            lambda: model.infer_pixels(batch), 50 if quick else 1000, items_per_call=batch_size
+        )
+    return results
+
+
+def bench_end_to_end(quick: bool) -> dict:
+    """
+    POST /recognize_digit on the real app in-process. Every request carries a distinct
+    image so the result and tensor caches cannot short-circuit the work.
+    """
+    from app import app
+    from fastapi.testclient import TestClient
+
+    results = {}
+    requests = 40 if quick else 400
+    payloads = [encode(digit_photo(256, seed=i), "png") for i in range(requests * (1 + len(CONCURRENCY)))]
+    with TestClient(app) as client:
+
+        def post(data: bytes) -> float:
+            start = time.perf_counter()
+            response = client.post("/recognize_digit", files={"image_file": ("digit.png", data, "image/png")})
+            if response.status_code != 200:
+                raise RuntimeError(f"/recognize_digit answered {response.status_code}: {response.text}")
+            return time.perf_counter() - start
+
+        for data in payloads[:requests]:
+            post(data)
+        offset = requests
+
+        for concurrency in CONCURRENCY:
+            batch = payloads[offset : offset + requests]
+            offset += requests
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                latencies = list(pool.map(post, batch))
+            wall = time.perf_counter() - start
+            results[f"end_to_end/png_256/concurrency_{concurrency}"] = summarize(latencies, len(batch), wall)
+    return results
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "onnxruntime": ort.__version__,
+        "numpy": np.__version__,
+        "opencv": cv2.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(suites: tuple[str, ...] = SUITES, quick: bool = False) -> dict:
+    model = ONNXModel(variant_path(get_variant("fp32")))
+    results = {}
+    if "decode" in suites:
+        results.update(bench_decode(quick))
+    if "preprocess" in suites:
+        results.update(bench_preprocess(model, quick))
+    if "inference" in suites:
+        results.update(bench_inference(model, quick))
+    if "end_to_end" in suites:
+        results.update(bench_end_to_end(quick))
+    return {"environment": environment(), "quick": quick, "timestamp": time.time(), "results": results}
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.25) -> list[dict]:
+    """
+    Case by case comparison. Status is "regressed" when a latency percentile grew, or
+    throughput fell, by more than `tolerance` (a fraction); "new" and "missing" flag
+    cases present on one side only.
+    """
+    rows = []
+    current_results, baseline_results = current["results"], baseline["results"]
+    for case in sorted(set(current_results) | set(baseline_results)):
+        if case not in baseline_results:
+            rows.append({"case": case, "status": "new"})
+            continue
+        if case not in current_results:
+            rows.append({"case": case, "status": "missing"})
+            continue
+
+        now, then = current_results[case], baseline_results[case]
+        changes = {key: now[key] / then[key] - 1 for key in LATENCY_KEYS if then.get(key)}
+        if then.get("throughput_per_s"):
+            changes["throughput_per_s"] = now["throughput_per_s"] / then["throughput_per_s"] - 1
+
+        regressed = [key for key in LATENCY_KEYS if changes.get(key, 0) > tolerance]
+        if changes.get("throughput_per_s", 0) < -tolerance:
+            regressed.append("throughput_per_s")
+        rows.append(
+            {
+                "case": case,
+                "status": "regressed" if regressed else "ok",
+                "regressed": regressed,
+                "changes": {key: round(value, 3) for key, value in changes.items()},
+            }
+        )
+    return rows
+
+
+def format_report(rows: list[dict], current: dict) -> str:
+    lines = [f"{'case':<42} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'items/s':>10}  status"]
+    for row in rows:
+        result = current["results"].get(row["case"])
+        if result is None:
+            lines.append(f"{row['case']:<42} {'':>9} {'':>9} {'':>9} {'':>10}  {row['status']}")
+            continue
+        status = row["status"]
+        if row.get("regressed"):
+            status += " (" + ", ".join(f"{key} {row['changes'][key]:+.0%}" for key in row["regressed"]) + ")"
+        lines.append(
+            f"{row['case']:<42} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+            f"{result['throughput_per_s']:>10.1f}  {status}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the real model and app against a stored baseline")
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for smoke runs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown, e.g. 0.25 = 25%%")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    current = run(tuple(args.suites), args.quick)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Saved baseline with {len(current['results'])} cases to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(format_report([{"case": case, "status": "new"} for case in current["results"]], current))
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    # Cases of suites left out of this run are not "missing"
+    baseline["results"] = {
+        case: result for case, result in baseline["results"].items() if case.split("/")[0] in args.suites
+    }
+    rows = compare(current, baseline, args.tolerance)
+    print(format_report(rows, current))
+    regressions = [row["case"] for row in rows if row["status"] == "regressed"]
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
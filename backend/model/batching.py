@@ -0,0 +1,141 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable
+
+import numpy as np
+
+from .buffers import BufferPool
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """
+    Dynamic micro-batching scheduler.
+
+    Callers from any thread submit one preprocessed sample of shape (C,H,W) and get a
+    Future back. A single background thread collects pending samples into one (N,C,H,W)
+    tensor - up to `max_batch_size` samples, waiting at most `max_wait_ms` after the
+    first one arrives - runs `run_batch` once and hands every caller its own output row.
+    The batch tensor is a reused buffer, so `run_batch` must not return views of it.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.__run_batch = run_batch
+        self.__max_batch_size = max_batch_size
+        self.__max_wait = max_wait_ms / 1000.0
+        self.__queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.__lock = threading.Lock()
+        self.__worker: threading.Thread | None = None
+        self.__buffers = BufferPool()
+
+        self.__batches = 0
+        self.__items = 0
+        self.__sizes: Counter = Counter()
+
+    @property
+    def max_batch_size(self) -> int:
+        return self.__max_batch_size
+
+    def submit(self, sample: np.ndarray) -> Future:
+        """Queue one sample (without the batch axis); the future resolves to its output row"""
+        future: Future = Future()
+        self.__ensure_worker()
+        self.__queue.put((sample, future))
+        return future
+
+    def close(self) -> None:
+        """Stop the worker thread after the already queued samples are served"""
+        with self.__lock:
+            worker, self.__worker = self.__worker, None
+        if worker is not None:
+            self.__queue.put(_STOP)
+            worker.join()
+
+    def stats(self) -> dict:
+        with self.__lock:
+            batches, items = self.__batches, self.__items
+            sizes = dict(sorted(self.__sizes.items()))
+
+        mean_size = items / batches if batches else 0.0
+        return {
+            "max_batch_size": self.__max_batch_size,
+            "max_wait_ms": self.__max_wait * 1000.0,
+            "batches": batches,
+            "items": items,
+            "mean_batch_size": round(mean_size, 3),
+            "mean_fill_ratio": round(mean_size / self.__max_batch_size, 3),
+            "batch_size_histogram": sizes,
+            "queued": self.__queue.qsize(),
+        }
+
+    def __ensure_worker(self) -> None:
+        if self.__worker is not None:
+            return
+        with self.__lock:
+            if self.__worker is None:
+                self.__worker = threading.Thread(target=self.__loop, name="mnist-batcher", daemon=True)
+                self.__worker.start()
+
+    def __loop(self) -> None:
+        while True:
+            item = self.__queue.get()
+            if item is _STOP:
+                return
+
+            pending = [item]
+            stop = False
+            deadline = time.perf_counter() + self.__max_wait
+            while len(pending) < self.__max_batch_size:
+                timeout = deadline - time.perf_counter()
+                try:
+                    item = self.__queue.get(timeout=timeout) if timeout > 0 else self.__queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                pending.append(item)
+
+            self.__dispatch(pending)
+            if stop:
+                return
+
+    def __dispatch(self, pending: list) -> None:
+        pending = [(sample, future) for sample, future in pending if future.set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        try:
+            first = pending[0][0]
+            batch = self.__buffers.get("batch", (len(pending), *first.shape), first.dtype)
+            outputs = self.__run_batch(np.stack([sample for sample, _ in pending], out=batch))
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        finally:
+            with self.__lock:
+                self.__batches += 1
+                self.__items += len(pending)
+                self.__sizes[len(pending)] += 1
+
+        for row, (_, future) in zip(outputs, pending):
+            future.set_result(row)
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
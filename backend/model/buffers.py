@@ -0,0 +1,63 @@
+import threading
+from math import prod
+
+import numpy as np
+
+
+class BufferPool:
+    """
+    Per-thread scratch buffers for the preprocessing hot path. `get` hands out a view of
+    a grow-only flat buffer owned by the calling thread, so steady-state calls allocate
+    no array data at all. A view stays valid until the same thread asks for the same
+    name again: use it within one call and never return it to callers.
+    """
+
+    # Cached views per thread; source-image shapes vary, so the cache is bounded
+    MAX_VIEWS = 256
+
+    def __init__(self):
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__allocations = 0
+        self.__bytes = 0
+
+    def get(self, name: str, shape: tuple[int, ...], dtype: np.dtype | type) -> np.ndarray:
+        local = self.__local
+        try:
+            views = local.views
+        except AttributeError:
+            views = local.views = {}
+            local.buffers = {}
+
+        key = (name, shape, dtype)
+        view = views.get(key)
+        if view is None:
+            view = views[key] = self.__view(local, key)
+        return view
+
+    def __view(self, local: threading.local, key: tuple) -> np.ndarray:
+        name, shape, dtype = key
+        size = prod(shape)
+        buffer = local.buffers.get((name, dtype))
+        if buffer is None or buffer.size < size:
+            # Grow geometrically so a slowly rising batch size does not reallocate every call
+            capacity = max(size, 2 * buffer.size) if buffer is not None else size
+            buffer = local.buffers[(name, dtype)] = np.empty(capacity, dtype=dtype)
+            with self.__lock:
+                self.__allocations += 1
+                self.__bytes += buffer.nbytes
+            # Views of the old buffer would keep it alive
+            for stale in [cached for cached in local.views if cached[:1] == (name,)]:
+                del local.views[stale]
+        if len(local.views) >= self.MAX_VIEWS:
+            local.views.clear()
+        return buffer[:size].reshape(shape)
+
+    def stats(self) -> dict:
+        """Buffer (re)allocations and their bytes across all threads since creation"""
+        with self.__lock:
+            return {"allocations": self.__allocations, "allocated_bytes": self.__bytes}
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,135 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+import numpy as np
+
+
+def content_key(data: bytes | memoryview) -> bytes:
+    """Fast 128-bit content hash used as a cache key"""
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def payload_size(value: Any) -> int:
+    """Approximate memory held by `value`, including what its containers refer to"""
+    if isinstance(value, np.ndarray):
+        # getsizeof includes the data of arrays that own it, but not of views
+        return sys.getsizeof(value) + (value.nbytes if value.base is not None else 0)
+    if isinstance(value, memoryview):
+        return sys.getsizeof(value) + value.nbytes
+    if isinstance(value, (tuple, list, set, frozenset)):
+        return sys.getsizeof(value) + sum(payload_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(payload_size(k) + payload_size(v) for k, v in value.items())
+    # Scalars, str and bytes: getsizeof covers their data
+    return sys.getsizeof(value)
+
+
+def _default_sizeof(key: Hashable, value: Any) -> int:
+    return payload_size(key) + payload_size(value)
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache bounded by entry count and/or an
+    approximate memory budget, with an optional time-to-live per entry.
+    A limit of 0 disables that particular bound.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        ttl_s: float = 0.0,
+        sizeof: Callable[[Hashable, Any], int] = _default_sizeof,
+    ):
+        if max_entries < 0 or max_bytes < 0 or ttl_s < 0:
+            raise ValueError("Cache limits must not be negative")
+
+        self.__max_entries = max_entries
+        self.__max_bytes = max_bytes
+        self.__ttl = ttl_s
+        self.__sizeof = sizeof
+        self.__lock = threading.Lock()
+        # key -> (value, size, expires_at)
+        self.__entries: OrderedDict = OrderedDict()
+        self.__bytes = 0
+
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__expirations = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value (marking it recently used) or None"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                self.__misses += 1
+                return None
+
+            value, size, expires_at = entry
+            if expires_at and expires_at <= time.monotonic():
+                self.__remove(key, size)
+                self.__expirations += 1
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.__sizeof(key, value)
+        if self.__max_bytes and size > self.__max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.__ttl if self.__ttl else 0.0
+        with self.__lock:
+            old = self.__entries.pop(key, None)
+            if old is not None:
+                self.__bytes -= old[1]
+            self.__entries[key] = (value, size, expires_at)
+            self.__bytes += size
+
+            while (self.__max_entries and len(self.__entries) > self.__max_entries) or (
+                self.__max_bytes and self.__bytes > self.__max_bytes
+            ):
+                _, (_, evicted_size, _) = self.__entries.popitem(last=False)
+                self.__bytes -= evicted_size
+                self.__evictions += 1
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__entries.clear()
+            self.__bytes = 0
+
+    def stats(self) -> dict:
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {
+                "entries": len(self.__entries),
+                "bytes": self.__bytes,
+                "max_entries": self.__max_entries,
+                "max_bytes": self.__max_bytes,
+                "ttl_s": self.__ttl,
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "hit_ratio": round(self.__hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.__evictions,
+                "expirations": self.__expirations,
+            }
+
+    def __remove(self, key: Hashable, size: int) -> None:
+        del self.__entries[key]
+        self.__bytes -= size
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
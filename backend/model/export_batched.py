@@ -0,0 +1,59 @@
+"""
+Export a copy of the MNIST ONNX model that accepts any batch size.
+
+The upstream mnist-12.onnx pins the batch dimension to 1 both in its input/output
+signature and in the constant shape of the Reshape that flattens the last pooling
+layer, so ONNXRuntime rejects (N,1,28,28) tensors. This script relaxes both.
+
+Usage (requires the `onnx` package, which is only needed at export time):
+    python -m model.export_batched [src.onnx] [dst.onnx]
+"""
+
+import os
+import sys
+
+import numpy as np
+
+DEFAULT_SRC = "mnist-12.onnx"
+DEFAULT_DST = "mnist-12-batched.onnx"
+BATCH_DIM = "N"
+
+
+def export_batched(src_path: str, dst_path: str) -> None:
+    import onnx
+    from onnx import numpy_helper
+
+    model = onnx.load(src_path)
+    graph = model.graph
+
+    for value in list(graph.input) + list(graph.output):
+        dim = value.type.tensor_type.shape.dim[0]
+        dim.ClearField("dim_value")
+        dim.dim_param = BATCH_DIM
+
+    # Flattening reshapes carry the batch size as a literal 1; turn it into -1
+    for init in graph.initializer:
+        if not init.name.endswith("_shape"):
+            continue
+        shape = numpy_helper.to_array(init)
+        if shape.ndim == 1 and shape.size == 2 and shape[0] == 1:
+            init.CopyFrom(numpy_helper.from_array(np.array([-1, shape[1]], dtype=shape.dtype), init.name))
+
+    # Drop stale intermediate shape annotations; ORT re-infers them
+    del graph.value_info[:]
+
+    onnx.checker.check_model(model)
+    onnx.save(model, dst_path)
+
+
+def main(argv: list[str]) -> int:
+    here = os.path.dirname(os.path.abspath(__file__))
+    src = argv[1] if len(argv) > 1 else os.path.join(here, DEFAULT_SRC)
+    dst = argv[2] if len(argv) > 2 else os.path.join(here, DEFAULT_DST)
+    export_batched(src, dst)
+    print(f"Saved batch-capable model to {dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
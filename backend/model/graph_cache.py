@@ -0,0 +1,170 @@
+"""
+On-disk cache of ONNXRuntime-optimized graphs.
+
+Building a session from the raw .onnx file reruns graph optimization on every process
+start. The first start saves the optimized graph in ORT format; later starts load it
+with optimizations disabled. The file name carries a key over everything that makes a
+saved graph invalid - model bytes, ORT version, optimization level, CPU - so a change of
+any of them misses the cache and stale entries of the same model are removed.
+
+Measure cold start with and without the cache:
+    python -m model.graph_cache [model.onnx] [--cache-dir DIR] [--runs 5]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Callable
+
+import onnxruntime as ort
+
+CACHE_FORMAT = 1
+
+OPTIMIZATION_LEVELS = {
+    "disabled": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+PROVIDERS = ["CPUExecutionProvider"]
+
+
+def _cpu_fingerprint() -> str:
+    """Level "all" bakes in CPU-specific kernels (NCHWc layouts), so the CPU is part of the key"""
+    parts = [platform.machine(), platform.processor()]
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith(("model name", "flags")):
+                    parts.append(line.strip())
+                if len(parts) >= 4:
+                    break
+    except OSError:
+        pass
+    return "|".join(parts)
+
+
+def cache_key(model_path: str, optimization_level: str) -> str:
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        digest.update(f.read())
+    for part in (f"format={CACHE_FORMAT}", f"ort={ort.__version__}", f"level={optimization_level}", _cpu_fingerprint()):
+        digest.update(b"\0" + part.encode())
+    return digest.hexdigest()[:20]
+
+
+def cached_session(
+    model_path: str,
+    build_options: Callable[[], ort.SessionOptions],
+    optimization_level: str,
+    cache_dir: str,
+) -> ort.InferenceSession:
+    """
+    Create a session for `model_path`, reusing or refreshing the optimized graph in `cache_dir`.
+    `build_options` must return fresh SessionOptions (thread settings etc.) on every call.
+    Any cache I/O problem falls back to a regular session.
+    """
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    cached_path = os.path.join(
+        cache_dir, f"{stem}.{optimization_level}.{cache_key(model_path, optimization_level)}.ort"
+    )
+
+    if os.path.exists(cached_path):
+        options = build_options()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        try:
+            return ort.InferenceSession(cached_path, sess_options=options, providers=PROVIDERS)
+        except Exception:
+            # Corrupt or unreadable entry: rebuild it below
+            _remove(cached_path)
+
+    options = build_options()
+    options.graph_optimization_level = OPTIMIZATION_LEVELS[optimization_level]
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{stem}.", suffix=".ort")
+        os.close(fd)
+    except OSError:
+        return ort.InferenceSession(model_path, sess_options=options, providers=PROVIDERS)
+
+    options.optimized_model_filepath = tmp_path
+    options.add_session_config_entry("session.save_model_format", "ORT")
+    try:
+        session = ort.InferenceSession(model_path, sess_options=options, providers=PROVIDERS)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, cached_path)
+    finally:
+        _remove(tmp_path)
+
+    for stale in glob.glob(os.path.join(cache_dir, f"{glob.escape(stem)}.*.ort")):
+        if stale != cached_path:
+            _remove(stale)
+    return session
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _time_cold_start(model_path: str, cache_dir: str | None) -> float:
+    """Session creation time in a fresh interpreter, so nothing is warm in-process"""
+    code = (
+        "import time, onnxruntime as ort\n"
+        "from model.graph_cache import cached_session\n"
+        "start = time.perf_counter()\n"
+        f"if {cache_dir!r}:\n"
+        f"    cached_session({model_path!r}, ort.SessionOptions, 'all', {cache_dir!r})\n"
+        "else:\n"
+        f"    ort.InferenceSession({model_path!r}, providers=['CPUExecutionProvider'])\n"
+        "print(time.perf_counter() - start)\n"
+    )
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", code], cwd=backend_dir, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def measure(model_path: str, cache_dir: str, runs: int = 5) -> dict:
+    for stale in glob.glob(os.path.join(cache_dir, "*.ort")):
+        _remove(stale)
+
+    no_cache = [_time_cold_start(model_path, None) for _ in range(runs)]
+    cache_miss = _time_cold_start(model_path, cache_dir)
+    cache_hit = [_time_cold_start(model_path, cache_dir) for _ in range(runs)]
+    return {
+        "model": os.path.basename(model_path),
+        "runs": runs,
+        "no_cache_ms": round(1000 * min(no_cache), 3),
+        "cache_miss_ms": round(1000 * cache_miss, 3),
+        "cache_hit_ms": round(1000 * min(cache_hit), 3),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Measure session cold start with and without the graph cache")
+    parser.add_argument("model", nargs="?", default=os.path.join(here, "mnist-12-batched.onnx"))
+    parser.add_argument("--cache-dir", default=None, help="defaults to a temporary directory")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    model_path = os.path.abspath(args.model)
+    if args.cache_dir:
+        print(json.dumps(measure(model_path, args.cache_dir, args.runs), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            print(json.dumps(measure(model_path, cache_dir, args.runs), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
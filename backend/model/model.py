@@ -1,16 +1,65 @@
-from typing import Tuple
+import time
+from typing import Callable, Tuple
 
-import cv2
 import numpy as np
 
+from .cache import LRUCache, content_key
+from .decode import decode_image, read_header
 from .onnx import ONNXModel as ONNX
+from .onnx import SessionConfig
+from .registry import get_variant
+from .segment import segment_digits
+from .singleflight import SingleFlight
 
 
 class MNISTModel:
     """Simple mnist digit classifier that incapsulates ONNX model"""
 
-    def __init__(self, *args, **kwargs):
-        self.__onnx = ONNX("mnist-12.onnx")
+    def __init__(
+        self,
+        *args,
+        model_variant: str = "fp32",
+        max_batch_size: int = 32,
+        max_batch_wait_ms: float = 2.0,
+        session_config: SessionConfig | None = None,
+        result_cache: LRUCache | None = None,
+        tensor_cache: LRUCache | None = None,
+        fast_decode: bool = True,
+        coalesce: bool = True,
+        stage_timer: Callable[[str, float], None] | None = None,
+        **kwargs,
+    ):
+        # Receives (stage, seconds) for decode and, through ONNX, preprocess/inference/postprocess
+        self.__stage_timer = stage_timer
+        # Grayscale / reduced-resolution decoding sized for the 28x28 model input
+        self.__fast_decode = fast_decode
+        # Raw image bytes hash -> (digit, confidence); hits skip decoding and inference
+        self.__result_cache = result_cache
+        # Identical uploads in flight at the same time share one decode and inference
+        self.__single_flight = SingleFlight() if coalesce else None
+        self.__onnx = ONNX(
+            get_variant(model_variant).path,
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_batch_wait_ms,
+            session_config=session_config,
+            tensor_cache=tensor_cache,
+            stage_timer=stage_timer,
+        )
+
+    def warmup(self, batch_size: int) -> None:
+        self.__onnx.warmup(batch_size)
+
+    def batch_stats(self) -> dict:
+        return self.__onnx.batch_stats()
+
+    def cache_stats(self) -> dict:
+        return {
+            "result": self.__result_cache.stats() if self.__result_cache is not None else {},
+            "tensor": self.__onnx.cache_stats(),
+        }
+
+    def coalesce_stats(self) -> dict:
+        return self.__single_flight.stats() if self.__single_flight is not None else {}
 
     def recognize_digit(self, image: np.ndarray) -> tuple[int, float] | None:
         return self.__onnx.infer(image)
@@ -30,30 +79,165 @@ class MNISTModel:
             ValueError: If image cannot be decoded or model inference fails
         """
         try:
-            # Decode image from bytes
-            nparr = np.frombuffer(image_bytes, np.uint8)
-            if nparr is None:
-                raise ValueError("Could not decode image")
+            # One hash serves as both the result cache and the in-flight key
+            coalesced_or_cached = self.__result_cache is not None or self.__single_flight is not None
+            key = content_key(image_bytes) if coalesced_or_cached else None
+            if self.__result_cache is not None:
+                cached = self.__result_cache.get(key)
+                if cached is not None:
+                    return self.__success(*cached, filename)
+
+            if self.__single_flight is None:
+                digit, confidence = self.__recognize(image_bytes, key)
+            else:
+                digit, confidence = self.__single_flight.run(key, lambda: self.__recognize(image_bytes, key))
+            return self.__success(digit, confidence, filename)
 
-            image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-            if image is None:
-                raise ValueError("Could not decode image")
+        except Exception as e:
+            raise ValueError(f"Error processing image: {str(e)}")
+
+    def process_and_recognize_batch(
+        self, images: list[tuple[bytes | memoryview, str]], fill_cache: bool = True
+    ) -> list[dict]:
+        """
+        Process many images with a single batched inference
 
-            # Get model prediction
-            digit, confidence = self.recognize_digit(image)
+        Args:
+            images: (image_bytes, filename) pairs; memoryviews are decoded without copying
+            fill_cache: Whether new results go into the result and tensor caches;
+                bulk jobs read the caches without evicting interactive entries
+
+        Returns:
+            One dictionary per input, in input order. Images that fail get
+            {"status": "error", "error": ..., "filename": ...} instead of raising.
+        """
+        results: list[dict | None] = [None] * len(images)
+        decoded, positions, keys = [], [], []
+        for i, (image_bytes, filename) in enumerate(images):
+            key = self.__cache_key(image_bytes)
+            if key is not None:
+                cached = self.__result_cache.get(key)
+                if cached is not None:
+                    results[i] = self.__success(*cached, filename)
+                    continue
+            try:
+                decoded.append(self.__decode(image_bytes))
+                positions.append(i)
+                keys.append(key)
+            except Exception as e:
+                results[i] = self.__error(f"Error processing image: {str(e)}", filename)
+
+        for i, key, (digit, confidence) in zip(positions, keys, self.__onnx.infer_batch(decoded, fill_cache)):
+            filename = images[i][1]
             if digit is None or confidence is None:
-                raise ValueError("Model inference error")
+                results[i] = self.__error("Error processing image: Model inference error", filename)
+            else:
+                if fill_cache and key is not None:
+                    self.__result_cache.put(key, (digit, confidence))
+                results[i] = self.__success(digit, confidence, filename)
 
-            return {
-                "status": "success",
-                "recognized_digit": digit,
-                "model_confidence": round(confidence, 3),
-                "filename": filename,
-            }
+        return results
+
+    def recognize_pixels(self, pixels: np.ndarray) -> list[dict]:
+        """
+        Recognize digits from raw grayscale pixels, skipping image decoding entirely
 
+        Args:
+            pixels: uint8 array of shape (N,H,W)
+
+        Returns:
+            One dictionary per crop, in input order, identified by its index
+        """
+        results = []
+        for i, (digit, confidence) in enumerate(self.__onnx.infer_pixels(pixels)):
+            if digit is None or confidence is None:
+                result = {"status": "error", "error": "Error processing image: Model inference error"}
+            else:
+                result = {"status": "success", "recognized_digit": digit, "model_confidence": round(confidence, 3)}
+            results.append({**result, "index": i})
+        return results
+
+    def recognize_number(self, image_bytes: bytes, filename: str) -> dict:
+        """
+        Recognize a multi-digit number: segment the image into digits and classify
+        all of them with one batched inference
+
+        Returns:
+            Dictionary with the digit string, the lowest digit confidence and, per digit
+            from left to right, its confidence and [x, y, w, h] box in source pixels
+
+        Raises:
+            ValueError: If the image cannot be decoded, holds no digits or inference fails
+        """
+        try:
+            image = self.__decode(image_bytes)
+            start = time.perf_counter()
+            crops, boxes = segment_digits(image)
+            if self.__stage_timer is not None:
+                self.__stage_timer("segment", time.perf_counter() - start)
+            if not boxes:
+                raise ValueError("No digits found in image")
+
+            predictions = self.__onnx.infer_pixels(crops)
+            if any(digit is None for digit, _ in predictions):
+                raise ValueError("Model inference error")
         except Exception as e:
             raise ValueError(f"Error processing image: {str(e)}")
 
+        # Reduced decoding shrinks the image; report boxes in source pixels
+        header = read_header(image_bytes)
+        scale = header.width / image.shape[1] if header is not None else 1.0
+        digits = [
+            {
+                "digit": digit,
+                "confidence": round(confidence, 3),
+                "box": [round(value * scale) for value in box],
+            }
+            for (digit, confidence), box in zip(predictions, boxes)
+        ]
+        return {
+            "status": "success",
+            "recognized_number": "".join(str(item["digit"]) for item in digits),
+            "model_confidence": min(item["confidence"] for item in digits),
+            "digits": digits,
+            "filename": filename,
+        }
+
+    def __cache_key(self, image_bytes: bytes | memoryview) -> bytes | None:
+        return content_key(image_bytes) if self.__result_cache is not None else None
+
+    def __recognize(self, image_bytes: bytes | memoryview, key: bytes | None) -> tuple[int, float]:
+        image = self.__decode(image_bytes)
+        digit, confidence = self.recognize_digit(image)
+        if digit is None or confidence is None:
+            raise ValueError("Model inference error")
+        # Cached before the in-flight entry is released, so later arrivals hit the cache
+        if self.__result_cache is not None:
+            self.__result_cache.put(key, (digit, confidence))
+        return digit, confidence
+
+    def __decode(self, image_bytes: bytes | memoryview) -> np.ndarray:
+        if self.__stage_timer is None:
+            return decode_image(image_bytes, fast=self.__fast_decode)
+        start = time.perf_counter()
+        try:
+            return decode_image(image_bytes, fast=self.__fast_decode)
+        finally:
+            self.__stage_timer("decode", time.perf_counter() - start)
+
+    @staticmethod
+    def __success(digit: int, confidence: float, filename: str) -> dict:
+        return {
+            "status": "success",
+            "recognized_digit": digit,
+            "model_confidence": round(confidence, 3),
+            "filename": filename,
+        }
+
+    @staticmethod
+    def __error(message: str, filename: str) -> dict:
+        return {"status": "error", "error": message, "filename": filename}
+
 
 if __name__ == "__main__":
     raise ImportError("This is not main module")
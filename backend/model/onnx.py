@@ -1,26 +1,109 @@
 import os
-from typing import Tuple
+import time
+from dataclasses import dataclass
+from typing import Callable, Sequence, Tuple
 
 import cv2
 import numpy as np
 import onnxruntime as ort
 
+from .batching import MicroBatcher
+from .buffers import BufferPool
+from .cache import LRUCache, content_key
+from .graph_cache import OPTIMIZATION_LEVELS, cached_session
+
+# Colour images up to this size convert into a pooled per-thread gray buffer; larger ones
+# get a one-off buffer, so no thread keeps one as big as the largest upload it ever saw
+MAX_POOLED_GRAY_PIXELS = 2048 * 2048
+
+
+@dataclass(frozen=True)
+class SessionConfig:
+    """
+    ONNXRuntime threading knobs. 0 threads lets ORT pick (one per core), which
+    oversubscribes the machine as soon as several worker processes share it.
+    """
+
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    allow_spinning: bool = True
+    optimization_level: str = "all"
+    # Directory of persisted optimized graphs (model/graph_cache.py); None disables it
+    graph_cache_dir: str | None = None
+
+    def build(self) -> ort.SessionOptions:
+        if self.optimization_level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown optimization level: {self.optimization_level}")
+        modes = {"sequential": ort.ExecutionMode.ORT_SEQUENTIAL, "parallel": ort.ExecutionMode.ORT_PARALLEL}
+        if self.execution_mode not in modes:
+            raise ValueError(f"Unknown execution mode: {self.execution_mode}")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = modes[self.execution_mode]
+        options.graph_optimization_level = OPTIMIZATION_LEVELS[self.optimization_level]
+        spinning = "1" if self.allow_spinning else "0"
+        options.add_session_config_entry("session.intra_op.allow_spinning", spinning)
+        options.add_session_config_entry("session.inter_op.allow_spinning", spinning)
+        return options
+
+
+def _ignore_stage(stage: str, seconds: float) -> None:
+    pass
+
 
 class ONNXModel:
     """
     Minimal ONNXRuntime loader that accepts an OpenCV-decoded image (numpy.ndarray).
     Assumes an MNIST-like model expecting NCHW with shape required by onnx model
+
+    With max_batch_size > 1 and a model whose batch axis is dynamic, concurrent `infer`
+    calls are merged into a single session.run by a MicroBatcher.
+
+    An optional tensor cache maps the hash of the normalized 28x28 uint8 image to the
+    prediction, so re-encoded or rescaled copies of one digit skip session.run.
+
+    `stage_timer(stage, seconds)` receives the duration of the "preprocess", "inference"
+    (one per session.run, i.e. per batch) and "postprocess" stages.
+
+    The inference paths preprocess into per-thread scratch buffers (BufferPool) with
+    in-place OpenCV/NumPy operations, so steady-state requests allocate no image arrays.
     """
 
-    def __init__(self, onnx_path: str):
+    def __init__(
+        self,
+        onnx_path: str,
+        max_batch_size: int = 1,
+        max_wait_ms: float = 2.0,
+        session_config: SessionConfig | None = None,
+        tensor_cache: LRUCache | None = None,
+        stage_timer: Callable[[str, float], None] | None = None,
+    ):
+        self.__tensor_cache = tensor_cache
+        self.__observe = stage_timer or _ignore_stage
+        self.__buffers = BufferPool()
         if not os.path.isabs(onnx_path):
             onnx_path = os.path.join(os.path.dirname(__file__), onnx_path)
-        self.__session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+        config = session_config or SessionConfig()
+        if config.graph_cache_dir:
+            self.__session = cached_session(onnx_path, config.build, config.optimization_level, config.graph_cache_dir)
+        else:
+            self.__session = ort.InferenceSession(
+                onnx_path, sess_options=config.build(), providers=["CPUExecutionProvider"]
+            )
         ipt = self.__session.get_inputs()[0]
         self.__input_name = ipt.name
         self.__output_name = self.__session.get_outputs()[0].name
         self.__input_shape = [int(x) if isinstance(x, (int, np.integer)) else None for x in ipt.shape]
 
+        # A fixed batch axis caps how many samples fit into one run
+        self.__run_batch_size = self.__input_shape[0] if self.__input_shape else None
+        if self.__run_batch_size is not None:
+            max_batch_size = min(max_batch_size, self.__run_batch_size)
+        self.__batcher = MicroBatcher(self.__timed_run, max_batch_size, max_wait_ms) if max_batch_size > 1 else None
+
     def __preprocess(self, src_image: np.ndarray) -> np.ndarray:
         """
         Convert OpenCV BGR/gray image -> numpy array suitable for ONNX:
@@ -29,25 +112,62 @@ class ONNXModel:
           - scale to [0,1] float32
           - return shape (1,1,H,W)
         """
-        if src_image is None:
-            raise ValueError("Empty image is none")
-
-        if src_image.ndim == 3 and src_image.shape[2] == 3:
-            gray = cv2.cvtColor(src_image, cv2.COLOR_BGR2GRAY)
-        else:
-            gray = src_image
+        return self.__scale(self.__normalize([src_image]))
 
+    def __normalize(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Reduce every image to a grayscale HxW uint8 slot of one (N,H,W) array.
+        This is the last representation before scaling and the key of the tensor cache.
+        """
         h, w = self.__input_shape[2:]
-        if gray.shape != (h, w):
-            gray = cv2.resize(gray, (w, h), cv2.INTER_LINEAR)
+        stack = self.__buffers.get("stack", (len(images), h, w), np.uint8)
+        for slot, src_image in zip(stack, images):
+            if src_image is None:
+                raise ValueError("Empty image is none")
+
+            if src_image.ndim == 3 and src_image.shape[2] == 3:
+                pooled = src_image.shape[0] * src_image.shape[1] <= MAX_POOLED_GRAY_PIXELS
+                gray = self.__buffers.get("gray", src_image.shape[:2], np.uint8) if pooled else None
+                gray = cv2.cvtColor(src_image, cv2.COLOR_BGR2GRAY, dst=gray)
+            else:
+                gray = src_image
+
+            if gray.shape != (h, w):
+                cv2.resize(gray, (w, h), dst=slot, interpolation=cv2.INTER_LINEAR)
+            else:
+                slot[...] = gray
+        return stack
+
+    @staticmethod
+    def __scale(stack: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Scale a (N,H,W) uint8 stack to [0,1] float32 of shape (N,1,H,W)"""
+        batch = np.empty((len(stack), 1, *stack.shape[1:]), dtype=np.float32) if out is None else out
+        # Cast, then divide in place: a mixed-dtype ufunc would allocate a cast buffer per call
+        channel = batch[:, 0]
+        np.copyto(channel, stack, casting="unsafe")
+        np.divide(channel, np.float32(255.0), out=channel)
+        return batch
+
+    def __scaled(self, stack: np.ndarray) -> np.ndarray:
+        """__scale into this thread's scratch input buffer (valid until its next inference)"""
+        return self.__scale(stack, self.__buffers.get("input", (len(stack), 1, *stack.shape[1:]), np.float32))
+
+    def preprocess_batch(self, images: Sequence[np.ndarray], out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Vectorized counterpart of __preprocess for many images at once.
+        Returns shape (N,1,H,W), written into `out` when given (no allocation at all).
+        """
+        return self.__scale(self.__normalize(images), out)
 
-        arr = gray.astype(np.float32) / 255.0
-        if arr.ndim == 2:
-            arr = arr[:, :, None]
+    def __run(self, batch: np.ndarray) -> np.ndarray:
+        """Run the session on a preprocessed (N,C,H,W) batch and return (N,classes) logits"""
+        return self.__session.run([self.__output_name], {self.__input_name: batch})[0]
 
-        arr = np.transpose(arr, (2, 0, 1))
-        arr = np.expand_dims(arr, axis=0)
-        return arr.astype(np.float32)
+    def __timed_run(self, batch: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        logits = self.__run(batch)
+        self.__observe("inference", time.perf_counter() - start)
+        return logits
 
     def infer(self, image: np.ndarray) -> Tuple[int, float] | Tuple[None, None]:
         """
@@ -55,16 +175,132 @@ class ONNXModel:
         Returns (pred_index, confidence) or None on failure.
         """
         try:
-            arr = self.__preprocess(image)
-            outputs = self.__session.run([self.__output_name], {self.__input_name: arr})
-            logits = outputs[0][0]
-            exp = np.exp(logits - np.max(logits))
-            probs = exp / exp.sum()
-            idx = int(np.argmax(probs))
-            return idx, float(probs[idx])
+            start = time.perf_counter()
+            stack = self.__normalize([image])
+            key = content_key(stack[0]) if self.__tensor_cache is not None else None
+            if key is not None:
+                cached = self.__tensor_cache.get(key)
+                if cached is not None:
+                    return cached
+
+            arr = self.__scaled(stack)
+            self.__observe("preprocess", time.perf_counter() - start)
+            if self.__batcher is not None:
+                logits = self.__batcher.submit(arr[0]).result()
+            else:
+                logits = self.__timed_run(arr)[0]
+
+            # Softmax in place on the (fresh, per-request) ORT output row
+            start = time.perf_counter()
+            np.subtract(logits, logits.max(), out=logits)
+            np.exp(logits, out=logits)
+            logits /= logits.sum()
+            idx = int(np.argmax(logits))
+            result = idx, float(logits[idx])
+            self.__observe("postprocess", time.perf_counter() - start)
+
+            if key is not None:
+                self.__tensor_cache.put(key, result)
+            return result
         except:
             return None, None
 
+    def infer_batch(
+        self, images: Sequence[np.ndarray], fill_cache: bool = True
+    ) -> list[Tuple[int, float] | Tuple[None, None]]:
+        """
+        Run model on many OpenCV-decoded images with one session.run
+        (or one run per chunk when the model has a fixed batch axis).
+        Only rows missing from the tensor cache are sent to ORT; with fill_cache=False
+        (bulk jobs) their results are not added to it.
+        Returns one (pred_index, confidence) per image, all (None, None) on failure.
+        """
+        if not len(images):
+            return []
+
+        try:
+            start = time.perf_counter()
+            return self.__infer_normalized(self.__normalize(images), start, fill_cache)
+        except:
+            return [(None, None)] * len(images)
+
+    def infer_pixels(self, pixels: np.ndarray) -> list[Tuple[int, float] | Tuple[None, None]]:
+        """
+        Run model on raw grayscale pixels of shape (N,H,W). A uint8 stack that already
+        has the model input size is used as is, without any per-image preprocessing.
+        """
+        if not len(pixels):
+            return []
+
+        try:
+            start = time.perf_counter()
+            if pixels.dtype == np.uint8 and pixels.shape[1:] == tuple(self.__input_shape[2:]):
+                return self.__infer_normalized(pixels, start)
+            return self.__infer_normalized(self.__normalize(list(pixels)), start)
+        except:
+            return [(None, None)] * len(pixels)
+
+    def __infer_normalized(self, stack: np.ndarray, start: float, fill_cache: bool = True) -> list[Tuple[int, float]]:
+        """`start` is when preprocessing of `stack` began, for the preprocess stage timer"""
+        results: list = [None] * len(stack)
+        keys = [content_key(row) for row in stack] if self.__tensor_cache is not None else [None] * len(stack)
+        misses = []
+        for i, key in enumerate(keys):
+            cached = self.__tensor_cache.get(key) if key is not None else None
+            if cached is not None:
+                results[i] = cached
+            else:
+                misses.append(i)
+
+        if misses:
+            if len(misses) < len(stack):
+                rows = self.__buffers.get("misses", (len(misses), *stack.shape[1:]), np.uint8)
+                stack = np.take(stack, misses, axis=0, out=rows)
+            batch = self.__scaled(stack)
+            self.__observe("preprocess", time.perf_counter() - start)
+            step = self.__run_batch_size or len(batch)
+            if step >= len(batch):
+                logits = self.__timed_run(batch)
+            else:
+                logits = np.concatenate([self.__timed_run(batch[i : i + step]) for i in range(0, len(batch), step)])
+
+            start = time.perf_counter()
+            np.subtract(logits, logits.max(axis=1, keepdims=True), out=logits)
+            np.exp(logits, out=logits)
+            logits /= logits.sum(axis=1, keepdims=True)
+            idx = logits.argmax(axis=1)
+            confidence = logits[np.arange(len(idx)), idx]
+            for i, digit, conf in zip(misses, idx, confidence):
+                results[i] = (int(digit), float(conf))
+                if fill_cache and keys[i] is not None:
+                    self.__tensor_cache.put(keys[i], results[i])
+            self.__observe("postprocess", time.perf_counter() - start)
+        return results
+
+    def warmup(self, batch_size: int) -> None:
+        """
+        Push one synthetic batch of `batch_size` through preprocessing and session.run, so
+        ORT allocates its buffers and picks kernels for that shape before real traffic.
+        Bypasses the tensor cache; a single image also goes through (and starts) the batcher.
+        """
+        h, w = self.__input_shape[2:]
+        images = np.random.default_rng(batch_size).integers(0, 256, (batch_size, h, w), dtype=np.uint8)
+        batch = self.__scaled(self.__normalize(list(images)))
+        if batch_size == 1 and self.__batcher is not None:
+            self.__batcher.submit(batch[0]).result()
+            return
+        step = self.__run_batch_size or batch_size
+        for i in range(0, batch_size, step):
+            self.__run(batch[i : i + step])
+
+    def batch_stats(self) -> dict:
+        """Micro-batching counters, or an empty dict when batching is disabled"""
+        return self.__batcher.stats() if self.__batcher is not None else {}
+
+    def cache_stats(self) -> dict:
+        """Tensor cache counters, or an empty dict when the cache is disabled"""
+        return self.__tensor_cache.stats() if self.__tensor_cache is not None else {}
+
 
 if __name__ == "__main__":
     raise ImportError("This is not main module")
@@ -0,0 +1,142 @@
+"""
+Offline INT8 quantization of the MNIST model and fp32 vs int8 comparison report.
+
+Usage (requires the `onnx` package, which is only needed offline):
+    python -m model.quantize [--mode static|dynamic] [--calibration 500] [--output mnist-12-int8.onnx]
+    python -m model.quantize --report [--samples 2000] [--json report.json]
+
+Static quantization calibrates activations on synthetic MNIST-like digits
+(model/synthetic.py), so the tool works without any dataset download.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from .registry import get_variant, variant_path
+from .synthetic import render_digits
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def _calibration_reader(input_name: str, images: np.ndarray, batch_size: int = 32):
+    from onnxruntime.quantization import CalibrationDataReader
+
+    class SyntheticDigits(CalibrationDataReader):
+        def __init__(self):
+            batches = (images.astype(np.float32) / 255.0)[:, None]
+            self.__feeds = iter([{input_name: batches[i : i + batch_size]} for i in range(0, len(batches), batch_size)])
+
+        def get_next(self):
+            return next(self.__feeds, None)
+
+    return SyntheticDigits()
+
+
+def quantize(src_path: str, dst_path: str, mode: str = "static", calibration: int = 500) -> None:
+    import onnxruntime as ort
+    from onnxruntime import quantization
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared = os.path.join(tmp, "prepared.onnx")
+        quantization.quant_pre_process(src_path, prepared)
+
+        if mode == "dynamic":
+            # ORT's CPU ConvInteger kernel only takes uint8 weights
+            quantization.quantize_dynamic(prepared, dst_path, weight_type=quantization.QuantType.QUInt8)
+        elif mode == "static":
+            input_name = ort.InferenceSession(prepared, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+            images, _ = render_digits(calibration, seed=1)
+            quantization.quantize_static(
+                prepared,
+                dst_path,
+                _calibration_reader(input_name, images),
+                quant_format=quantization.QuantFormat.QDQ,
+                activation_type=quantization.QuantType.QUInt8,
+                weight_type=quantization.QuantType.QInt8,
+                # Per-channel scales need DequantizeLinear(axis), i.e. opset 13; the model is opset 12
+                per_channel=False,
+            )
+        else:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+
+
+def _time_runs(session, feed: dict, repeats: int) -> float:
+    session.run(None, feed)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        session.run(None, feed)
+    return (time.perf_counter() - start) / repeats
+
+
+def compare(variants: list[str], samples: int = 2000, batch_size: int = 32, repeats: int = 200) -> dict:
+    """Accuracy on synthetic digits, agreement with the first variant, and latency/throughput"""
+    import onnxruntime as ort
+
+    images, labels = render_digits(samples, seed=2)
+    batch = (images.astype(np.float32) / 255.0)[:, None]
+
+    report, reference = {}, None
+    for name in variants:
+        path = variant_path(get_variant(name))
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        input_name = session.get_inputs()[0].name
+
+        logits = np.concatenate(
+            [session.run(None, {input_name: batch[i : i + batch_size]})[0] for i in range(0, samples, batch_size)]
+        )
+        predictions = logits.argmax(axis=1)
+        if reference is None:
+            reference = predictions
+
+        single = _time_runs(session, {input_name: batch[:1]}, repeats)
+        batched = _time_runs(session, {input_name: batch[:batch_size]}, max(1, repeats // 4))
+        report[name] = {
+            "path": os.path.basename(path),
+            "file_bytes": os.path.getsize(path),
+            "accuracy": round(float((predictions == labels).mean()), 4),
+            "agreement_with_" + variants[0]: round(float((predictions == reference).mean()), 4),
+            "latency_ms_batch_1": round(single * 1000, 4),
+            f"latency_ms_batch_{batch_size}": round(batched * 1000, 4),
+            "images_per_s_batch_1": round(1 / single, 1),
+            f"images_per_s_batch_{batch_size}": round(batch_size / batched, 1),
+        }
+    return report
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Quantize the MNIST model to INT8 or compare model variants")
+    parser.add_argument("--mode", choices=["static", "dynamic"], default="static")
+    parser.add_argument("--calibration", type=int, default=500, help="synthetic images used for calibration")
+    parser.add_argument("--source", default=get_variant("fp32").path)
+    parser.add_argument("--output", default=get_variant("int8").path)
+    parser.add_argument("--report", action="store_true", help="compare registered variants instead of quantizing")
+    parser.add_argument("--variants", nargs="+", default=["fp32", "int8"])
+    parser.add_argument("--samples", type=int, default=2000)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    if args.report:
+        report = compare(args.variants, args.samples)
+        print(json.dumps(report, indent=2))
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    src = args.source if os.path.isabs(args.source) else os.path.join(HERE, args.source)
+    dst = args.output if os.path.isabs(args.output) else os.path.join(HERE, args.output)
+    quantize(src, dst, args.mode, args.calibration)
+    print(f"Saved {args.mode} INT8 model to {dst}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
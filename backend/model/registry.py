@@ -0,0 +1,42 @@
+import os
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class ModelVariant:
+    name: str
+    path: str
+    precision: str
+    description: str
+
+
+MODELS = {
+    "fp32": ModelVariant(
+        name="fp32",
+        path="mnist-12-batched.onnx",
+        precision="float32",
+        description="ONNX model zoo mnist-12 with a dynamic batch axis (model/export_batched.py)",
+    ),
+    "int8": ModelVariant(
+        name="int8",
+        path="mnist-12-int8.onnx",
+        precision="int8",
+        description="Static QDQ INT8 quantization of fp32, calibrated on synthetic digits (model/quantize.py)",
+    ),
+}
+
+
+def get_variant(name: str) -> ModelVariant:
+    try:
+        return MODELS[name]
+    except KeyError:
+        raise ValueError(f"Unknown model variant '{name}', expected one of: {', '.join(MODELS)}")
+
+
+def variant_path(variant: ModelVariant) -> str:
+    """Absolute path of the variant's ONNX file"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), variant.path)
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
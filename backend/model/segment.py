@@ -0,0 +1,102 @@
+"""
+Segmentation of a multi-digit number (amounts, IDs) into MNIST-style digit crops.
+
+One Otsu threshold and one connected-components pass label every stroke in the image;
+component statistics come back as arrays, so filtering, merging and ordering are
+vectorized. Each digit is then scaled into a 20x20 box centred on a 28x28 canvas, as
+MNIST digits are, so all crops can go through the model in a single batch.
+
+Only that crop scaling is per digit: one mask and one cv2.resize, about 40 us each.
+The cost follows the image area (threshold and labelling), not the digit count; on a
+1000x140 image ten digits take about 3.6 ms and a single digit 3.2 ms.
+"""
+
+import cv2
+import numpy as np
+
+# Components smaller than this fraction of the largest one are noise (dots, specks)
+MIN_AREA_RATIO = 0.05
+# ... and so are components shorter than this fraction of the tallest one
+MIN_HEIGHT_RATIO = 0.25
+# Components overlapping horizontally by more than this fraction of the narrower one form one digit
+MERGE_OVERLAP = 0.5
+
+
+def binarize(gray: np.ndarray) -> np.ndarray:
+    """Otsu threshold to white-on-black strokes, inverting dark-on-light scans and photos"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # The background is the majority class; MNIST wants it black
+    if np.count_nonzero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def _group_overlapping(boxes: np.ndarray) -> np.ndarray:
+    """
+    Group ids of left-to-right sorted component boxes (x, y, w, h): components sharing
+    most of their columns (the parts of a broken stroke) form one digit
+    """
+    groups = np.zeros(len(boxes), dtype=np.intp)
+    left, right = boxes[0, 0], boxes[0, 0] + boxes[0, 2]
+    for index in range(1, len(boxes)):
+        x, w = boxes[index, 0], boxes[index, 2]
+        if min(right, x + w) - max(left, x) > MERGE_OVERLAP * min(w, right - left):
+            groups[index] = groups[index - 1]
+            left, right = min(left, x), max(right, x + w)
+        else:
+            groups[index] = groups[index - 1] + 1
+            left, right = x, x + w
+    return groups
+
+
+def segment_digits(gray: np.ndarray, size: int = 28) -> tuple[np.ndarray, list[tuple[int, int, int, int]]]:
+    """
+    Split a grayscale image of a number into digits, left to right.
+
+    Returns:
+        (crops (N,size,size) uint8 white-on-black, boxes [(x, y, w, h)] in image coordinates)
+    """
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+    binary = binarize(gray)
+    count, label_map, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+    if count <= 1:
+        return np.empty((0, size, size), dtype=np.uint8), []
+
+    # Row 0 is the background
+    stats = stats[1:]
+    areas, heights = stats[:, cv2.CC_STAT_AREA], stats[:, cv2.CC_STAT_HEIGHT]
+    keep = np.flatnonzero((areas >= MIN_AREA_RATIO * areas.max()) & (heights >= MIN_HEIGHT_RATIO * heights.max()))
+    if not len(keep):
+        # The largest blob is short (an underline) and the tallest thin (a rule): nothing is digit-like
+        return np.empty((0, size, size), dtype=np.uint8), []
+    keep = keep[np.argsort(stats[keep, cv2.CC_STAT_LEFT], kind="stable")]
+    stats = stats[keep]
+    groups = _group_overlapping(stats)
+
+    # Groups are contiguous runs of the sorted components: reduce their boxes in one go
+    starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]])
+    x0 = np.minimum.reduceat(stats[:, 0], starts)
+    y0 = np.minimum.reduceat(stats[:, 1], starts)
+    x1 = np.maximum.reduceat(stats[:, 0] + stats[:, 2], starts)
+    y1 = np.maximum.reduceat(stats[:, 1] + stats[:, 3], starts)
+
+    # Pixel -> digit number (0 = background or noise), so crops keep only their own strokes
+    owner = np.zeros(count, dtype=np.int32)
+    owner[keep + 1] = groups + 1
+    owners = owner[label_map]
+
+    box = round(size * 20 / 28)
+    crops = np.zeros((len(starts), size, size), dtype=np.uint8)
+    for index, crop in enumerate(crops):
+        digit = (owners[y0[index] : y1[index], x0[index] : x1[index]] == index + 1).astype(np.uint8) * 255
+        scale = box / max(digit.shape)
+        h, w = max(1, round(digit.shape[0] * scale)), max(1, round(digit.shape[1] * scale))
+        top, left = (size - h) // 2, (size - w) // 2
+        crop[top : top + h, left : left + w] = cv2.resize(digit, (w, h), interpolation=cv2.INTER_AREA)
+    boxes = [(int(x), int(y), int(w), int(h)) for x, y, w, h in zip(x0, y0, x1 - x0, y1 - y0)]
+    return crops, boxes
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
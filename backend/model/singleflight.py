@@ -0,0 +1,61 @@
+"""
+Request coalescing ("single flight") for identical uploads.
+
+A burst of the same image (a retried request, a fan-out client, a popular sample) would
+otherwise decode and infer it once per request before the result cache is filled. The
+model keys each upload by its content hash and runs it through SingleFlight, so only the
+first request does the work. Disable with MNIST_COALESCE_ENABLED=0; the counters are in
+/stats under "coalescing" and in mnist_coalesce_in_flight / mnist_coalesced_total.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Thread-safe deduplication of identical in-flight computations: the first caller
+    of a key (the leader) runs it, callers arriving with the same key before it
+    finishes wait for and share its result or exception. Nothing is kept afterwards;
+    unlike a cache it only covers the window while a computation is running.
+    """
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__calls: dict[Hashable, Future] = {}
+        self.__leaders = 0
+        self.__coalesced = 0
+
+    def run(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """compute()'s result, shared with every caller of `key` while it runs"""
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = self.__calls[key] = Future()
+                self.__leaders += 1
+                leader = True
+            else:
+                self.__coalesced += 1
+                leader = False
+        if not leader:
+            return call.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        finally:
+            with self.__lock:
+                del self.__calls[key]
+        call.set_result(result)
+        return result
+
+    def stats(self) -> dict:
+        with self.__lock:
+            return {"in_flight": len(self.__calls), "leaders": self.__leaders, "coalesced": self.__coalesced}
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,54 @@
+"""
+Offline generator of MNIST-like digit images (white strokes on black, centred in a
+20x20 box of a 28x28 canvas), used for calibration, evaluation and benchmarks
+when no real dataset is at hand.
+"""
+
+import cv2
+import numpy as np
+
+_FONTS = (
+    cv2.FONT_HERSHEY_SIMPLEX,
+    cv2.FONT_HERSHEY_DUPLEX,
+    cv2.FONT_HERSHEY_COMPLEX,
+    cv2.FONT_HERSHEY_TRIPLEX,
+    cv2.FONT_HERSHEY_SCRIPT_SIMPLEX,
+)
+
+
+def render_digit(digit: int, rng: np.random.Generator, size: int = 28) -> np.ndarray:
+    """Render one randomly styled digit as a (size,size) uint8 image"""
+    canvas = np.zeros((96, 96), dtype=np.uint8)
+    font = _FONTS[rng.integers(len(_FONTS))]
+    thickness = int(rng.integers(4, 9))
+    cv2.putText(canvas, str(digit), (22, 78), font, 2.4, 255, thickness, cv2.LINE_AA)
+
+    angle = rng.uniform(-12, 12)
+    rotation = cv2.getRotationMatrix2D((48, 48), angle, 1.0)
+    canvas = cv2.warpAffine(canvas, rotation, (96, 96))
+
+    # Fit the bounding box into 20x20 and centre it, as MNIST does
+    ys, xs = np.nonzero(canvas)
+    crop = canvas[ys.min() : ys.max() + 1, xs.min() : xs.max() + 1]
+    box = round(size * 20 / 28)
+    scale = box / max(crop.shape)
+    h, w = max(1, round(crop.shape[0] * scale)), max(1, round(crop.shape[1] * scale))
+    crop = cv2.resize(crop, (w, h), interpolation=cv2.INTER_AREA)
+
+    image = np.zeros((size, size), dtype=np.uint8)
+    top, left = (size - h) // 2, (size - w) // 2
+    image[top : top + h, left : left + w] = crop
+    return image
+
+
+def render_digits(count: int, seed: int = 0, size: int = 28) -> tuple[np.ndarray, np.ndarray]:
+    """Return (images (count,size,size) uint8, labels (count,) uint8) with balanced labels"""
+    rng = np.random.default_rng(seed)
+    labels = (np.arange(count) % 10).astype(np.uint8)
+    rng.shuffle(labels)
+    images = np.stack([render_digit(int(label), rng, size) for label in labels]) if count else np.empty((0, size, size))
+    return images.astype(np.uint8), labels
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
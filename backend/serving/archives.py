@@ -0,0 +1,113 @@
+"""
+Streaming iteration over the members of an uploaded image archive (zip, or tar with
+optional gzip/bzip2/xz compression).
+
+Nothing is extracted to disk and at most one member is in memory at a time: zip members
+are opened one by one through the central directory, tar archives are read front to
+back in stream mode. Declared member sizes are checked before reading and every read is
+bounded, so an oversized or lying member fails on its own instead of exhausting memory.
+"""
+
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator
+
+# Bytes of an archive needed to tell its format
+HEAD_BYTES = 512
+
+_TAR_COMPRESSION_MAGIC = (b"\x1f\x8b", b"BZh", b"\xfd7zXZ\x00")
+
+
+@dataclass(frozen=True)
+class Member:
+    name: str
+    data: bytes | None
+    error: str | None = None
+
+
+def archive_format(head: bytes) -> str | None:
+    """Format of an archive from its first HEAD_BYTES bytes: "zip", "tar" or None"""
+    if head[:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+        return "zip"
+    if head[257:262] == b"ustar" or head.startswith(_TAR_COMPRESSION_MAGIC):
+        return "tar"
+    return None
+
+
+def _skipped(name: str) -> bool:
+    # Resource forks and metadata that archivers on macOS add next to every file
+    return name.startswith("__MACOSX/") or name.rsplit("/", 1)[-1].startswith("._")
+
+
+def _too_large(name: str, size: int, max_bytes: int) -> Member:
+    return Member(name, None, f"Member of {size} bytes exceeds the limit of {max_bytes} bytes")
+
+
+def _zip_members(file: BinaryIO, max_bytes: int) -> Iterator[Member]:
+    with zipfile.ZipFile(file) as archive:
+        for info in archive.infolist():
+            if info.is_dir() or _skipped(info.filename):
+                continue
+            if info.file_size > max_bytes:
+                yield _too_large(info.filename, info.file_size, max_bytes)
+                continue
+            try:
+                with archive.open(info) as member:
+                    data = member.read(max_bytes + 1)
+            except (zipfile.BadZipFile, zlib.error, RuntimeError, NotImplementedError, EOFError) as e:
+                # RuntimeError: encrypted member; NotImplementedError: unsupported compression
+                yield Member(info.filename, None, f"Unreadable member: {e}")
+                continue
+            if len(data) > max_bytes:
+                yield _too_large(info.filename, len(data), max_bytes)
+                continue
+            yield Member(info.filename, data)
+
+
+def _tar_members(file: BinaryIO, max_bytes: int) -> Iterator[Member]:
+    with tarfile.open(fileobj=file, mode="r|*") as archive:
+        for info in archive:
+            if not info.isfile() or _skipped(info.name):
+                continue
+            if info.size > max_bytes:
+                # Stream mode skips the unread data when advancing to the next member
+                yield _too_large(info.name, info.size, max_bytes)
+                continue
+            yield Member(info.name, archive.extractfile(info).read())
+
+
+def count_members(file: BinaryIO) -> int | None:
+    """Number of file members of a zip archive from its central directory; None for tar streams"""
+    file.seek(0)
+    if archive_format(file.read(HEAD_BYTES)) != "zip":
+        return None
+    file.seek(0)
+    with zipfile.ZipFile(file) as archive:
+        return sum(not info.is_dir() and not _skipped(info.filename) for info in archive.infolist())
+
+
+def iter_members(file: BinaryIO, max_bytes: int) -> Iterator[Member]:
+    """
+    Members of a seekable archive file in archive order
+
+    Raises:
+        ValueError: If the file is not a supported archive or is corrupt
+    """
+    file.seek(0)
+    fmt = archive_format(file.read(HEAD_BYTES))
+    file.seek(0)
+    try:
+        if fmt == "zip":
+            yield from _zip_members(file, max_bytes)
+        elif fmt == "tar":
+            yield from _tar_members(file, max_bytes)
+        else:
+            raise ValueError("Unsupported archive: expected zip or tar")
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise ValueError(f"Corrupt archive: {e}")
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,47 @@
+"""
+Request deadlines, so work for clients that have already given up can be shed.
+
+A client states how long it will wait with one of
+  - X-Request-Timeout-Ms: milliseconds from the request's arrival
+  - X-Request-Deadline: absolute Unix time in seconds (e.g. set once by a gateway)
+and otherwise the server default applies. Deadlines are returned on the
+time.perf_counter() clock used by the executor (serving/executor.py).
+"""
+
+import math
+import time
+from typing import Mapping
+
+TIMEOUT_HEADER = "x-request-timeout-ms"
+DEADLINE_HEADER = "x-request-deadline"
+
+
+def _finite(value: str, header: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"Invalid {header} header: {value}")
+    if not math.isfinite(number):
+        raise ValueError(f"Invalid {header} header: {value}")
+    return number
+
+
+def request_deadline(headers: Mapping[str, str], arrived: float | None, default_timeout_s: float) -> float | None:
+    """
+    perf_counter() deadline of a request that arrived at `arrived` (perf_counter(),
+    now if unknown), or None without a client deadline and with a default of 0
+
+    Raises:
+        ValueError: If a deadline header is not a number
+    """
+    arrived = time.perf_counter() if arrived is None else arrived
+    if headers.get(TIMEOUT_HEADER):
+        return arrived + _finite(headers[TIMEOUT_HEADER], "X-Request-Timeout-Ms") / 1000
+    if headers.get(DEADLINE_HEADER):
+        remaining = _finite(headers[DEADLINE_HEADER], "X-Request-Deadline") - time.time()
+        return time.perf_counter() + remaining
+    return arrived + default_timeout_s if default_timeout_s > 0 else None
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+class ExecutorOverloaded(RuntimeError):
+    """Raised when the executor backlog is full and new work must be rejected"""
+
+
+class DeadlineExceeded(ExecutorOverloaded):
+    """Raised when a task is shed because its deadline passed or cannot be met given the backlog"""
+
+
+# Weight of the newest task in the moving average of run time per item
+SERVICE_TIME_ALPHA = 0.1
+
+
+class BoundedExecutor:
+    """
+    Dedicated thread pool for CPU-bound work (decoding, preprocessing, inference)
+    with a bounded backlog: at most `max_workers` tasks run and at most `max_queue`
+    wait. Beyond that `submit` fails fast with ExecutorOverloaded instead of
+    letting requests pile up without limit.
+
+    Tasks may carry a deadline (a time.perf_counter() value) and a number of items
+    (images of a batch request). They are shed with DeadlineExceeded at submission
+    if the deadline has passed or, when every thread is busy, if the items in flight
+    and their own, at the moving average run time per item, would finish them too
+    late; and again when a thread picks them up if the deadline passed while they
+    were queued, so no CPU is spent on answers nobody waits for.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int, thread_name_prefix: str = "mnist-worker"):
+        if max_workers < 1:
+            raise ValueError("max_workers must be positive")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+        self.__pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.__max_workers = max_workers
+        self.__capacity = max_workers + max_queue
+        self.__lock = threading.Lock()
+        self.__in_flight = 0
+        self.__in_flight_items = 0
+        self.__completed = 0
+        self.__rejected = 0
+        self.__shed = 0
+        self.__item_service_s = 0.0
+
+    def submit(
+        self, fn: Callable[..., Any], *args: Any, deadline: float | None = None, items: int = 1, **kwargs: Any
+    ) -> Future:
+        items = max(1, items)
+        with self.__lock:
+            if self.__in_flight >= self.__capacity:
+                self.__rejected += 1
+                raise ExecutorOverloaded(f"Server is busy: {self.__in_flight} tasks already in flight")
+            if deadline is not None:
+                now = time.perf_counter()
+                if now > deadline or now + self.__expected_latency(items) > deadline:
+                    self.__shed += 1
+                    raise DeadlineExceeded(
+                        f"Request deadline cannot be met: {max(0.0, deadline - now):.3f} s left, "
+                        f"{self.__in_flight} tasks ahead"
+                    )
+            self.__in_flight += 1
+            self.__in_flight_items += items
+
+        try:
+            future = self.__pool.submit(self.__call, deadline, items, fn, *args, **kwargs)
+        except BaseException:
+            self.__release(None, items)
+            raise
+        future.add_done_callback(lambda done: self.__release(done, items))
+        return future
+
+    async def run(
+        self, fn: Callable[..., Any], *args: Any, deadline: float | None = None, items: int = 1, **kwargs: Any
+    ) -> Any:
+        """Run `fn` on the pool and await its result from the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, deadline=deadline, items=items, **kwargs))
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.__pool.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            in_flight = self.__in_flight
+            return {
+                "workers": self.__max_workers,
+                "capacity": self.__capacity,
+                "in_flight": in_flight,
+                "queued": max(0, in_flight - self.__max_workers),
+                "completed": self.__completed,
+                "rejected": self.__rejected,
+                "shed": self.__shed,
+                "item_service_ms": round(self.__item_service_s * 1000, 3),
+            }
+
+    def __expected_latency(self, items: int) -> float:
+        # Called with the lock held. With a thread free the task starts at once: there is no
+        # backlog to predict, and its own run time alone never sheds it
+        ahead = max(0, self.__in_flight - self.__max_workers + 1)
+        if not ahead:
+            return 0.0
+        # Items in flight run `max_workers` at a time, then this task's items run
+        return (self.__in_flight_items / self.__max_workers + items) * self.__item_service_s
+
+    def __call(self, deadline: float | None, items: int, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if deadline is not None and time.perf_counter() > deadline:
+            with self.__lock:
+                self.__shed += 1
+            raise DeadlineExceeded("Request deadline passed while queued")
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            per_item = (time.perf_counter() - start) / items
+            with self.__lock:
+                self.__item_service_s += SERVICE_TIME_ALPHA * (per_item - self.__item_service_s)
+
+    def __release(self, future: Future | None, items: int) -> None:
+        with self.__lock:
+            self.__in_flight -= 1
+            self.__in_flight_items -= items
+            if future is not None:
+                self.__completed += 1
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,61 @@
+"""
+Length-prefixed frame streams for high-volume machine clients, which skip multipart
+parsing altogether. All integers are little-endian uint32.
+
+Request (application/vnd.mnist.frames):
+    count, then per image: length, encoded image bytes (PNG, JPEG, BMP or WebP)
+Response (application/vnd.mnist.frames):
+    count, then per image, in request order, one serving.responses.DIGIT_RECORD:
+    uint8 digit (255 = error) and float16 confidence (NaN on error)
+
+The body is parsed as one buffer: every image is a memoryview slice of it, never a copy.
+"""
+
+import struct
+
+from .responses import digit_records
+from .uploads import UploadTooLarge
+
+FRAMES = "application/vnd.mnist.frames"
+
+_U32 = struct.Struct("<I")
+
+
+def parse_frames(body: bytes | memoryview, max_count: int) -> list[memoryview]:
+    """
+    Split a frame stream into zero-copy views of its images
+
+    Raises:
+        ValueError: If the stream is truncated or has trailing bytes
+        UploadTooLarge: If the stream holds more than `max_count` images
+    """
+    view = memoryview(body)
+    if len(view) < _U32.size:
+        raise ValueError("Truncated frame stream: missing image count")
+    (count,) = _U32.unpack_from(view, 0)
+    if count > max_count:
+        raise UploadTooLarge(f"At most {max_count} images are accepted per request, got {count}")
+
+    frames = []
+    offset = _U32.size
+    for i in range(count):
+        if offset + _U32.size > len(view):
+            raise ValueError(f"Truncated frame stream: missing length of image {i}")
+        (length,) = _U32.unpack_from(view, offset)
+        offset += _U32.size
+        if offset + length > len(view):
+            raise ValueError(f"Truncated frame stream: image {i} needs {length} bytes")
+        frames.append(view[offset : offset + length])
+        offset += length
+    if offset != len(view):
+        raise ValueError(f"{len(view) - offset} trailing bytes after {count} images")
+    return frames
+
+
+def encode_frames(results: list[dict]) -> bytes:
+    """The response stream of per-image result dicts"""
+    return _U32.pack(len(results)) + digit_records({"results": results}).tobytes()
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,309 @@
+"""
+Asynchronous bulk recognition jobs over image archives.
+
+Submitting hands over the archive (already spooled to a temporary file) and returns a
+job right away; a dedicated worker reads the members as a stream (serving/archives.py)
+and recognizes them in batches. Every result becomes one JSON line that can be polled
+or streamed while the job keeps running.
+
+Bulk work stays out of the way of interactive requests:
+  - it runs on its own small pool (one worker by default), never on the request executor;
+  - before every batch it waits while interactive requests are in flight, for at most
+    `max_yield_s`, so a backfill still progresses under constant traffic;
+  - its batch function is expected not to fill the result caches, so a backfill does
+    not evict the entries interactive traffic keeps hitting.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from typing import AsyncIterator, BinaryIO, Callable
+
+from .archives import Member, count_members, iter_members
+from .executor import BoundedExecutor, ExecutorOverloaded
+from .responses import dumps
+
+# How often a yielding job checks whether interactive requests are still in flight
+YIELD_POLL_S = 0.005
+# Idle result streams send a keepalive this often
+KEEPALIVE_S = 15.0
+
+FINISHED = ("done", "failed", "cancelled")
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class Job:
+    """
+    One bulk job: counters, state and the results as JSON lines in archive order.
+    Updated by its worker thread; read and awaited from the event loop.
+    """
+
+    def __init__(self, job_id: str, total: int | None = None):
+        self.id = job_id
+        self.__lock = threading.Lock()
+        self.__lines: list[bytes] = []
+        self.__waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.__state = "queued"
+        self.__total = total
+        self.__succeeded = 0
+        self.__failed = 0
+        self.__error: str | None = None
+        self.__cancelled = False
+        self.__created = time.time()
+        self.__started: float | None = None
+        self.__finished: float | None = None
+
+    @property
+    def state(self) -> str:
+        return self.__state
+
+    @property
+    def finished(self) -> bool:
+        return self.__state in FINISHED
+
+    @property
+    def cancelled(self) -> bool:
+        return self.__cancelled
+
+    def cancel(self) -> None:
+        """Ask the worker to stop after the current batch; a queued job never starts"""
+        self.__cancelled = True
+
+    def start(self, total: int | None) -> None:
+        with self.__lock:
+            self.__state = "running"
+            self.__started = time.time()
+            if total is not None:
+                self.__total = total
+
+    def add(self, results: list[dict]) -> None:
+        """Append results in archive order, numbering them from 0"""
+        with self.__lock:
+            for result in results:
+                self.__lines.append(dumps({"index": len(self.__lines), **result}))
+                if result.get("status") == "success":
+                    self.__succeeded += 1
+                else:
+                    self.__failed += 1
+            self.__notify()
+
+    def finish(self, state: str, error: str | None = None) -> None:
+        with self.__lock:
+            self.__state = state
+            self.__error = error
+            self.__finished = time.time()
+            if state == "done":
+                self.__total = len(self.__lines)
+            self.__notify()
+
+    def lines(self, start: int = 0) -> list[bytes]:
+        with self.__lock:
+            return self.__lines[start:]
+
+    async def wait(self, seen: int, timeout: float | None = None) -> None:
+        """Return once there are more than `seen` results, the job has finished, or `timeout` passed"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self.__lock:
+            if len(self.__lines) > seen or self.finished:
+                return
+            waiter = (loop, future)
+            self.__waiters.append(waiter)
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self.__lock:
+                if waiter in self.__waiters:
+                    self.__waiters.remove(waiter)
+
+    def __notify(self) -> None:
+        # Called with the lock held, from the worker thread
+        for loop, future in self.__waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:
+                # The loop of an abandoned stream has closed
+                pass
+        self.__waiters.clear()
+
+    def status(self) -> dict:
+        with self.__lock:
+            processed = len(self.__lines)
+            elapsed = (self.__finished or time.time()) - self.__started if self.__started is not None else 0.0
+            return {
+                "id": self.id,
+                "state": self.__state,
+                "total": self.__total,
+                "processed": processed,
+                "succeeded": self.__succeeded,
+                "failed": self.__failed,
+                "error": self.__error,
+                "created": self.__created,
+                "started": self.__started,
+                "finished": self.__finished,
+                "images_per_s": round(processed / elapsed, 1) if elapsed > 0 else 0.0,
+            }
+
+
+class JobManager:
+    """
+    Registry and worker pool of bulk jobs. `process_batch` recognizes (bytes, filename)
+    pairs and returns one result dict per pair; `check` may reject one member's bytes
+    with ValueError before it is batched; `busy` tells whether interactive requests are
+    in flight. At most `workers` jobs run and `queue_size` wait; the newest
+    `retention` finished jobs stay available for their results.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[tuple[bytes, str]]], list[dict]],
+        busy: Callable[[], bool] = lambda: False,
+        check: Callable[[bytes], object] | None = None,
+        workers: int = 1,
+        queue_size: int = 8,
+        batch_size: int = 32,
+        max_member_bytes: int = 16 * 1024 * 1024,
+        max_yield_s: float = 1.0,
+        retention: int = 16,
+    ):
+        self.__process_batch = process_batch
+        self.__busy = busy
+        self.__check = check
+        self.__batch_size = max(1, batch_size)
+        self.__max_member_bytes = max_member_bytes
+        self.__max_yield_s = max_yield_s
+        self.__retention = retention
+        self.__executor = BoundedExecutor(workers, queue_size, thread_name_prefix="mnist-job")
+        self.__lock = threading.Lock()
+        self.__jobs: dict[str, Job] = {}
+        self.__yielded_s = 0.0
+
+    def submit(self, archive: BinaryIO) -> Job:
+        """
+        Queue a job over a seekable archive file, which the job closes when done
+
+        Raises:
+            ExecutorOverloaded: If `queue_size` jobs are already waiting
+        """
+        job = Job(uuid.uuid4().hex)
+        with self.__lock:
+            self.__jobs[job.id] = job
+            self.__prune()
+        try:
+            self.__executor.submit(self.__run, job, archive)
+        except ExecutorOverloaded:
+            with self.__lock:
+                del self.__jobs[job.id]
+            archive.close()
+            raise
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self.__lock:
+            return self.__jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self.__lock:
+            states = [job.state for job in self.__jobs.values()]
+            yielded = self.__yielded_s
+        return {
+            "queued": states.count("queued"),
+            "running": states.count("running"),
+            "retained": len(states),
+            "yielded_s": round(yielded, 3),
+        }
+
+    def __prune(self) -> None:
+        # Drop the oldest finished jobs beyond the retention limit (dicts keep insertion order)
+        finished = [job_id for job_id, job in self.__jobs.items() if job.finished]
+        for job_id in finished[: max(0, len(finished) - self.__retention)]:
+            del self.__jobs[job_id]
+
+    def __run(self, job: Job, archive: BinaryIO) -> None:
+        with archive:
+            if job.cancelled:
+                job.finish("cancelled")
+                return
+            try:
+                job.start(count_members(archive))
+                pending: list[Member] = []
+                for member in iter_members(archive, self.__max_member_bytes):
+                    pending.append(member)
+                    if len(pending) >= self.__batch_size:
+                        self.__flush(job, pending)
+                        pending = []
+                        if job.cancelled:
+                            break
+                if pending and not job.cancelled:
+                    self.__flush(job, pending)
+                job.finish("cancelled" if job.cancelled else "done")
+            except Exception as e:
+                job.finish("failed", str(e))
+        with self.__lock:
+            self.__prune()
+
+    def __flush(self, job: Job, members: list[Member]) -> None:
+        self.__yield()
+        errors: dict[int, str] = {}
+        for i, member in enumerate(members):
+            if member.error is not None:
+                errors[i] = member.error
+            elif self.__check is not None:
+                try:
+                    self.__check(member.data)
+                except ValueError as e:
+                    errors[i] = str(e)
+
+        images = [(member.data, member.name) for i, member in enumerate(members) if i not in errors]
+        recognized = iter(self.__process_batch(images) if images else [])
+        job.add(
+            [
+                {"status": "error", "error": errors[i], "filename": member.name} if i in errors else next(recognized)
+                for i, member in enumerate(members)
+            ]
+        )
+
+    def __yield(self) -> None:
+        """Let interactive requests in flight finish first, for at most max_yield_s"""
+        if not self.__busy():
+            return
+        start = time.monotonic()
+        while self.__busy() and time.monotonic() - start < self.__max_yield_s:
+            time.sleep(YIELD_POLL_S)
+        with self.__lock:
+            self.__yielded_s += time.monotonic() - start
+
+
+async def stream_results(job: Job, offset: int = 0, sse: bool = False) -> AsyncIterator[bytes]:
+    """
+    Results from `offset` on, as they are produced, until the job finishes: JSON lines,
+    or server-sent events whose ids are the result indices (for Last-Event-ID resumption)
+    followed by a final "end" event with the job status
+    """
+    index = offset
+    while True:
+        finished = job.finished
+        lines = job.lines(index)
+        for line in lines:
+            yield b"id: %d\nevent: result\ndata: %s\n\n" % (index, line) if sse else line + b"\n"
+            index += 1
+        if lines:
+            continue
+        if finished:
+            break
+        await job.wait(index, KEEPALIVE_S)
+        if sse and not job.finished and not job.lines(index):
+            yield b": keepalive\n\n"
+    if sse:
+        yield b"event: end\ndata: %s\n\n" % dumps(job.status())
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,284 @@
+"""
+Minimal Prometheus instrumentation: counters and histograms cheap enough to stay on
+in production (a bisect and a lock per observation, about a microsecond), gauges
+read from existing stats() dicts at scrape time, and the text exposition format 0.0.4.
+
+Every worker process (serving/workers.py) keeps its own registry, so one scrape reports
+the worker that happened to accept the connection.
+"""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable, Sequence
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cache hit (a few microseconds) up to a saturated server
+LATENCY_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)  # fmt: skip
+SIZE_BUCKETS = tuple(float(4**i) for i in range(4, 14))  # 256 B .. 64 MiB
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.__labelnames = tuple(labelnames)
+        self.__lock = threading.Lock()
+        self.__values: dict[tuple, float] = {} if labelnames else {(): 0}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with self.__lock:
+            self.__values[labels] = self.__values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self.__values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        with self.__lock:
+            values = list(self.__values.items())
+        for labels, value in values:
+            yield f"{self.name}{_labels(self.__labelnames, labels)} {_number(value)}"
+
+
+class StatsMetric:
+    """
+    Gauge (or counter kept elsewhere) read from `read` at scrape time:
+    a number, or a {label value: number} dict when `labelname` is given
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], float | dict],
+        labelname: str = "",
+        kind: str = "gauge",
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.__read = read
+        self.__labelname = labelname
+
+    def samples(self) -> Iterable[str]:
+        value = self.__read()
+        if not self.__labelname:
+            yield f"{self.name} {_number(value)}"
+            return
+        for label, number in value.items():
+            yield f"{self.name}{_labels((self.__labelname,), (label,))} {_number(number)}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally split by labels"""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, buckets: Sequence[float] = LATENCY_BUCKETS, labelnames: Sequence[str] = ()
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.__bounds = tuple(sorted(buckets))
+        self.__labelnames = tuple(labelnames)
+        self.__lock = threading.Lock()
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.__series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.__bounds, value)
+        with self.__lock:
+            series = self.__series.get(labels)
+            if series is None:
+                series = self.__series[labels] = [[0] * (len(self.__bounds) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self.__series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        with self.__lock:
+            snapshot = [(labels, list(counts), total) for labels, (counts, total) in self.__series.items()]
+        for labels, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.__bounds + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.__labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.__labelnames, labels)} {_number(total)}"
+            yield f"{self.name}_count{_labels(self.__labelnames, labels)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self.__metrics: list = []
+
+    def register(self, metric):
+        self.__metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.__metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+def outcome(status_code: int) -> str:
+    if status_code == 503:
+        return "overloaded"
+    if status_code >= 500:
+        return "server_error"
+    if status_code >= 400:
+        return "client_error"
+    return "success"
+
+
+class ServiceMetrics:
+    """
+    Metrics of the recognition service. Queue, batch, cache and coalescing gauges are
+    read at scrape time from the stats() dicts returned by the given callables.
+    """
+
+    content_type = CONTENT_TYPE
+
+    def __init__(
+        self,
+        executor_stats: Callable[[], dict],
+        batch_stats: Callable[[], dict],
+        cache_stats: Callable[[], dict],
+        coalesce_stats: Callable[[], dict] = dict,
+    ):
+        self.registry = Registry()
+        register = self.registry.register
+        self.stage_seconds = register(
+            Histogram("mnist_stage_seconds", "Time spent per request processing stage", labelnames=("stage",))
+        )
+        self.request_seconds = register(
+            Histogram("mnist_request_seconds", "End-to-end HTTP request latency", labelnames=("endpoint",))
+        )
+        self.request_bytes = register(
+            Histogram("mnist_request_bytes", "HTTP request body size", SIZE_BUCKETS, labelnames=("endpoint",))
+        )
+        self.requests = register(
+            Counter("mnist_requests_total", "HTTP requests by outcome", labelnames=("endpoint", "outcome"))
+        )
+        self.in_flight = 0
+        register(StatsMetric("mnist_requests_in_flight", "HTTP requests being processed", lambda: self.in_flight))
+
+        def field(read: Callable[[], dict], key: str) -> Callable[[], float]:
+            return lambda: read().get(key, 0)
+
+        def per_cache(key: str) -> Callable[[], dict]:
+            return lambda: {name: stats.get(key, 0) for name, stats in cache_stats().items() if stats}
+
+        for name, documentation, read, kind in (
+            ("mnist_executor_in_flight", "Tasks running or queued", field(executor_stats, "in_flight"), "gauge"),
+            ("mnist_executor_queued", "Tasks waiting for a thread", field(executor_stats, "queued"), "gauge"),
+            ("mnist_executor_rejected_total", "Tasks rejected as busy", field(executor_stats, "rejected"), "counter"),
+            ("mnist_executor_shed_total", "Tasks shed past their deadline", field(executor_stats, "shed"), "counter"),
+            ("mnist_batcher_queued", "Samples waiting for the micro-batcher", field(batch_stats, "queued"), "gauge"),
+            ("mnist_batcher_batches_total", "Micro-batcher session runs", field(batch_stats, "batches"), "counter"),
+            ("mnist_batcher_items_total", "Samples run by the micro-batcher", field(batch_stats, "items"), "counter"),
+            ("mnist_coalesce_in_flight", "Distinct uploads in flight", field(coalesce_stats, "in_flight"), "gauge"),
+            ("mnist_coalesced_total", "Requests sharing a result", field(coalesce_stats, "coalesced"), "counter"),
+        ):
+            register(StatsMetric(name, documentation, read, kind=kind))
+        register(StatsMetric("mnist_cache_entries", "Entries per cache", per_cache("entries"), "cache"))
+        register(StatsMetric("mnist_cache_hits_total", "Hits per cache", per_cache("hits"), "cache", "counter"))
+        register(StatsMetric("mnist_cache_misses_total", "Misses per cache", per_cache("misses"), "cache", "counter"))
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds.observe(seconds, stage)
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request Request object or task) recording latency,
+    payload size, outcome and in-flight count of HTTP requests. Its start time is left
+    in scope["state"] so endpoints can time the parse stage up to their first line.
+    """
+
+    def __init__(self, app, metrics: ServiceMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        scope.setdefault("state", {})["metrics_start"] = start
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        size = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                size = int(value)
+                break
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            endpoint = self.__endpoint(scope)
+            if size is not None:
+                metrics.request_bytes.observe(size, endpoint)
+            metrics.request_seconds.observe(time.perf_counter() - start, endpoint)
+            metrics.requests.inc(endpoint, outcome(status))
+
+    @staticmethod
+    def __endpoint(scope) -> str:
+        # Label by the matched route's path template (e.g. /jobs/{job_id}), known once
+        # routing has run; unmatched paths share one label to bound cardinality
+        return getattr(scope.get("route"), "path", None) or "other"
+
+
+def request_started(request) -> float | None:
+    """perf_counter() of the request's arrival as recorded by MetricsMiddleware"""
+    return request.scope.get("state", {}).get("metrics_start")
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
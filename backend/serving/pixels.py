@@ -0,0 +1,84 @@
+"""
+Parsing of raw pixel payloads for machine-to-machine clients that already hold
+decoded grayscale crops and should not have to encode them as images.
+
+Two layouts are accepted, both uint8 with shape (H,W) or (N,H,W):
+  - `.npy` (NumPy format, detected by its magic bytes)
+  - bare C-order bytes (application/octet-stream) plus an X-Tensor-Shape header, e.g. "32,28,28"
+
+The returned array is a zero-copy view over the request body.
+"""
+
+import ast
+
+import numpy as np
+
+NPY_MAGIC = b"\x93NUMPY"
+MAX_SIDE = 4096
+
+
+def parse_shape(value: str | None) -> tuple[int, ...]:
+    if not value:
+        raise ValueError("X-Tensor-Shape header is required for raw pixel payloads")
+    try:
+        shape = tuple(int(part) for part in value.replace("x", ",").split(","))
+    except ValueError:
+        raise ValueError(f"Invalid tensor shape: {value}")
+    return shape
+
+
+def _npy_header(body: memoryview) -> tuple[np.dtype, tuple[int, ...], bool, int]:
+    """Return dtype, shape, fortran_order and data offset of an .npy payload"""
+    if len(body) < 10:
+        raise ValueError("Truncated .npy payload")
+
+    major = body[6]
+    if major == 1:
+        header_len, start = int.from_bytes(body[8:10], "little"), 10
+    elif major in (2, 3):
+        header_len, start = int.from_bytes(body[8:12], "little"), 12
+    else:
+        raise ValueError(f"Unsupported .npy version {major}")
+
+    try:
+        header = ast.literal_eval(bytes(body[start : start + header_len]).decode("latin1"))
+        return np.dtype(header["descr"]), tuple(header["shape"]), bool(header["fortran_order"]), start + header_len
+    except (ValueError, SyntaxError, KeyError, TypeError):
+        raise ValueError("Invalid .npy header")
+
+
+def parse_pixels(body: bytes, shape_header: str | None = None) -> np.ndarray:
+    """
+    Wrap a raw pixel payload as an (N,H,W) uint8 array without copying it.
+
+    Raises:
+        ValueError: If the payload or its declared shape is invalid
+    """
+    view = memoryview(body)
+    if bytes(view[: len(NPY_MAGIC)]) == NPY_MAGIC:
+        dtype, shape, fortran_order, offset = _npy_header(view)
+        if fortran_order:
+            raise ValueError("Fortran-ordered .npy arrays are not supported")
+    else:
+        dtype, shape, offset = np.dtype(np.uint8), parse_shape(shape_header), 0
+
+    if dtype != np.uint8:
+        raise ValueError(f"Pixels must be uint8, got {dtype}")
+    # .npy headers are Python literals: reject float, bool or nested entries before any arithmetic
+    if not all(type(side) is int for side in shape):
+        raise ValueError(f"Shape entries must be integers, got {shape}")
+    if len(shape) not in (2, 3) or any(side <= 0 for side in shape):
+        raise ValueError(f"Expected shape (H,W) or (N,H,W), got {shape}")
+    if shape[-1] > MAX_SIDE or shape[-2] > MAX_SIDE:
+        raise ValueError(f"Crops larger than {MAX_SIDE}x{MAX_SIDE} are not supported")
+
+    count = int(np.prod(shape))
+    if len(view) - offset != count:
+        raise ValueError(f"Payload has {len(view) - offset} pixel bytes, shape {shape} needs {count}")
+
+    pixels = np.frombuffer(body, dtype=np.uint8, count=count, offset=offset).reshape(shape)
+    return pixels if pixels.ndim == 3 else pixels[None]
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
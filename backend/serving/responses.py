@@ -0,0 +1,127 @@
+"""
+Response encodings of recognition results, chosen by the Accept header:
+  - application/json (default): orjson when installed, the standard library otherwise
+  - application/msgpack: the same document as MessagePack, when msgpack is installed
+  - application/vnd.mnist.digits: compact binary, one 3-byte record per recognized
+    digit, in result order: uint8 digit (255 = error) and little-endian float16
+    confidence (NaN on error). Filenames, boxes and error messages are left out.
+
+Unsupported or unavailable types fall back to JSON rather than answering 406.
+"""
+
+import json
+from functools import lru_cache
+
+import numpy as np
+from fastapi.responses import JSONResponse, Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+DIGITS = "application/vnd.mnist.digits"
+
+DIGIT_RECORD = np.dtype([("digit", "u1"), ("confidence", "<f2")])
+ERROR_DIGIT = 255
+
+
+def dumps(content) -> bytes:
+    """JSON bytes of `content`, through orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed"""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+class DigitsResponse(Response):
+    media_type = DIGITS
+
+    def render(self, content) -> bytes:
+        return digit_records(content).tobytes()
+
+
+def _items(content: dict) -> list[dict]:
+    # Batch endpoints, /recognize_number and single-digit endpoints respectively
+    if "results" in content:
+        return content["results"]
+    if "digits" in content:
+        return content["digits"]
+    return [content]
+
+
+def digit_records(content: dict) -> np.ndarray:
+    """The results of a recognition response as DIGIT_RECORD records"""
+    items = _items(content)
+    records = np.empty(len(items), dtype=DIGIT_RECORD)
+    for i, item in enumerate(items):
+        digit = item.get("recognized_digit", item.get("digit"))
+        if item.get("status", "success") == "success" and digit is not None:
+            records[i] = (digit, item.get("model_confidence", item.get("confidence")))
+        else:
+            records[i] = (ERROR_DIGIT, np.nan)
+    return records
+
+
+def _available(media_type: str) -> bool:
+    return media_type != MSGPACK or msgpack is not None
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept: str | None) -> str:
+    """The preferred available result media type of an Accept header (highest q, then header order)"""
+    if not accept:
+        return JSON
+    offers = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = (piece.strip() for piece in part.split(";"))
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        offers.append((-q, position, media_type.lower()))
+    for negative_q, _, media_type in sorted(offers):
+        if negative_q >= 0:
+            break
+        if media_type in ("application/x-msgpack", MSGPACK):
+            media_type = MSGPACK
+        if media_type in (MSGPACK, DIGITS) and _available(media_type):
+            return media_type
+        if media_type in (JSON, "application/*", "*/*"):
+            return JSON
+    return JSON
+
+
+RESPONSE_CLASSES = {JSON: FastJSONResponse, MSGPACK: MsgpackResponse, DIGITS: DigitsResponse}
+
+
+def encode_response(content: dict, accept: str | None = None) -> Response:
+    """Render `content` in the format the Accept header prefers"""
+    return RESPONSE_CLASSES[negotiate(accept)](content=content, headers={"Vary": "Accept"})
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
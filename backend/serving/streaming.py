@@ -0,0 +1,63 @@
+import asyncio
+import base64
+import binascii
+from typing import Any
+
+
+class LatestSlot:
+    """
+    Single-item asyncio mailbox with latest-wins semantics: putting a new item while
+    the previous one has not been taken yet replaces it and counts it as dropped.
+    Used to keep live streams (e.g. drawing on a canvas) from building up a backlog.
+    """
+
+    def __init__(self):
+        self.__item: Any = None
+        self.__event = asyncio.Event()
+        self.__closed = False
+        self.dropped = 0
+
+    def put(self, item: Any) -> None:
+        if self.__item is not None:
+            self.dropped += 1
+        self.__item = item
+        self.__event.set()
+
+    def close(self) -> None:
+        """Wake up the consumer; `get` returns None once the remaining item is taken"""
+        self.__closed = True
+        self.__event.set()
+
+    async def get(self) -> Any | None:
+        while self.__item is None:
+            if self.__closed:
+                return None
+            await self.__event.wait()
+            self.__event.clear()
+
+        item, self.__item = self.__item, None
+        return item
+
+
+def frame_bytes(message: dict) -> bytes:
+    """
+    Payload of a websocket message: binary frames are used as is, text frames are
+    base64 (optionally a data URL such as canvas.toDataURL() produces).
+
+    Raises:
+        ValueError: If a text frame is not valid base64
+    """
+    if message.get("bytes") is not None:
+        return message["bytes"]
+
+    text = message.get("text") or ""
+    if text.startswith("data:"):
+        text = text.partition(",")[2]
+    try:
+        return base64.b64decode(text, validate=True)
+    except binascii.Error:
+        raise ValueError("Text frames must be base64 encoded images")
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,114 @@
+"""
+Memory-bounded handling of uploads.
+
+Two layers keep a large or bogus upload from being buffered and decoded:
+  - `BodyLimitMiddleware` caps the request body: a too large Content-Length is answered
+    with 413 before a byte is read, and a streamed (chunked) body is cut off as soon as
+    it passes the limit, so the multipart parser never sees the rest.
+  - `read_upload` checks one uploaded image: its size, its real format from the magic
+    bytes (whatever the client claims as content type) and its pixel count from the
+    header, all before the full payload is read into memory or handed to the decoder.
+"""
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from model.decode import ImageHeader, read_header
+
+# Uploads are inspected in chunks of this size ...
+CHUNK_SIZE = 64 * 1024
+# ... and must reveal their dimensions within this many bytes (JPEG EXIF/ICC segments come first)
+HEADER_BYTES = 512 * 1024
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload or the image it encodes exceeds a configured limit"""
+
+
+def check_image(data: bytes | bytearray | memoryview, max_pixels: int) -> ImageHeader:
+    """
+    Identify an encoded image from its leading bytes without decoding it
+
+    Raises:
+        ValueError: If the format is not PNG, JPEG, BMP or WebP, or the header is corrupt
+        UploadTooLarge: If the image has more than `max_pixels` pixels
+    """
+    header = read_header(data)
+    if header is None:
+        raise ValueError("Unsupported or corrupt image: expected PNG, JPEG, BMP or WebP")
+    if header.width <= 0 or header.height <= 0:
+        raise ValueError("Corrupt image header")
+    if header.width * header.height > max_pixels:
+        raise UploadTooLarge(f"Image of {header.width}x{header.height} pixels exceeds the limit of {max_pixels} pixels")
+    return header
+
+
+async def read_upload(upload: UploadFile, max_bytes: int, max_pixels: int) -> bytes:
+    """
+    Read an uploaded image once its size, format and dimensions are within limits
+
+    Raises:
+        ValueError: If the upload is not a supported image
+        UploadTooLarge: If the upload has more than `max_bytes` bytes or `max_pixels` pixels
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise UploadTooLarge(f"Upload of {upload.size} bytes exceeds the limit of {max_bytes} bytes")
+
+    # Only as much as the header needs; usually the first chunk
+    head = bytearray()
+    while len(head) < HEADER_BYTES:
+        chunk = await upload.read(CHUNK_SIZE)
+        head += chunk
+        if read_header(head) is not None or not chunk:
+            break
+    check_image(head, max_pixels)
+
+    # One bounded read into a single buffer: an upload that grew past its announced size is still cut off
+    await upload.seek(0)
+    data = await upload.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise UploadTooLarge(f"Upload exceeds the limit of {max_bytes} bytes")
+    return data
+
+
+class BodyLimitMiddleware:
+    """
+    Pure ASGI middleware rejecting HTTP request bodies larger than `max_bytes` (or the
+    entry of `path_limits` for the request path) with 413, up front from Content-Length
+    or while the body streams in
+    """
+
+    def __init__(self, app, max_bytes: int, path_limits: dict[str, int] | None = None):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        max_bytes = self.path_limits.get(scope["path"], self.max_bytes)
+        detail = f"Request body exceeds the limit of {max_bytes} bytes"
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > max_bytes:
+                    response = JSONResponse({"detail": detail}, status_code=413)
+                    return await response(scope, receive, send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Re-raised by FastAPI's body parsing and answered by the exception middleware
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
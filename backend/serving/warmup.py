@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import Callable, Sequence
+
+
+def default_batch_sizes(*batch_caps: int) -> tuple[int, ...]:
+    """
+    Powers of two up to the largest cap, plus every cap itself. Callers pass the largest
+    batch each inference path can produce: micro-batcher batches (max_batch_size), bulk
+    job chunks (job_batch_size) and whole multi-image requests (max_files_per_request).
+    """
+    top = max((1, *batch_caps))
+    sizes, size = {cap for cap in batch_caps if cap >= 1} | {1}, 1
+    while size < top:
+        sizes.add(size)
+        size *= 2
+    return tuple(sorted(sizes))
+
+
+class Warmup:
+    """
+    Startup warmup that runs synthetic batches of every expected size through the model
+    on a background thread. The first ORT run of a shape pays for buffer allocation and
+    kernel selection; readiness is withheld until those costs are paid.
+    """
+
+    def __init__(self, run: Callable[[int], None], batch_sizes: Sequence[int], iterations: int = 3):
+        self.__run = run
+        self.__batch_sizes = tuple(batch_sizes)
+        self.__iterations = max(1, iterations)
+        self.__lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+        self.__state = "pending"
+        self.__error: str | None = None
+        self.__timings: dict[str, dict] = {}
+        self.__total_ms: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.__state in ("done", "skipped")
+
+    def start(self) -> None:
+        """Run the warmup on a daemon thread; readiness is immediate when there is nothing to warm"""
+        with self.__lock:
+            if self.__state != "pending":
+                return
+            if not self.__batch_sizes:
+                self.__state = "skipped"
+                return
+            self.__state = "running"
+            self.__thread = threading.Thread(target=self.run, name="mnist-warmup", daemon=True)
+            self.__thread.start()
+
+    def join(self, timeout: float | None = None) -> bool:
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+        return self.ready
+
+    def run(self) -> None:
+        self.__state = "running"
+        start = time.perf_counter()
+        try:
+            for size in self.__batch_sizes:
+                runs = []
+                for _ in range(self.__iterations):
+                    run_start = time.perf_counter()
+                    self.__run(size)
+                    runs.append(1000 * (time.perf_counter() - run_start))
+                self.__timings[str(size)] = {
+                    "first_ms": round(runs[0], 3),
+                    "warm_ms": round(min(runs[1:] or runs), 3),
+                }
+            state = "done"
+        except Exception as e:
+            self.__error = str(e)
+            state = "failed"
+        self.__total_ms = round(1000 * (time.perf_counter() - start), 3)
+        self.__state = state
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "state": self.__state,
+            "batch_sizes": list(self.__batch_sizes),
+            "iterations": self.__iterations,
+            "total_ms": self.__total_ms,
+            "timings": dict(self.__timings),
+            "error": self.__error,
+        }
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
@@ -0,0 +1,208 @@
+"""
+Multi-process serving mode.
+
+Starts N uvicorn worker processes sharing one listening socket. Every worker gets
+explicit ONNXRuntime thread counts, a request executor sized to its cores and
+single-threaded OpenCV decoding and, optionally, its own slice of CPU cores, so that
+workers * threads never exceeds the cores the container may use. Crashed workers are
+restarted with exponential backoff.
+
+Usage:
+    python -m serving.workers [--host 0.0.0.0] [--port 5000] [--workers N]
+                              [--threads-per-worker T] [--no-pin]
+
+Defaults come from MNIST_WORKERS / MNIST_THREADS_PER_WORKER / MNIST_PIN_CPUS.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+logger = logging.getLogger(__name__)
+
+# How often the parent checks on its workers
+POLL_S = 0.5
+# A crashing worker is restarted after 0.5 s, 1 s, 2 s, ... up to 30 s, and given up on
+# after MAX_RESTARTS crashes in a row; one that ran for STABLE_AFTER_S starts over
+RESTART_BACKOFF_S = 0.5
+MAX_RESTART_BACKOFF_S = 30.0
+MAX_RESTARTS = 5
+STABLE_AFTER_S = 60.0
+# Request executor threads per core of a worker: one decodes while another waits on its micro-batch
+EXECUTOR_THREADS_PER_CPU = 2
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    index: int
+    intra_op_threads: int
+    cpus: tuple[int, ...] | None
+
+    def environ(self) -> dict[str, str]:
+        """Settings the worker process reads through settings.load_settings"""
+        cores = len(self.cpus) if self.cpus is not None else self.intra_op_threads
+        return {
+            "MNIST_EXECUTOR_WORKERS": str(EXECUTOR_THREADS_PER_CPU * cores),
+            "MNIST_ORT_INTRA_OP_THREADS": str(self.intra_op_threads),
+            "MNIST_ORT_INTER_OP_THREADS": "1",
+            "MNIST_ORT_EXECUTION_MODE": "sequential",
+            # Spinning ORT threads steal cycles from sibling workers
+            "MNIST_ORT_ALLOW_SPINNING": "0",
+            "OMP_NUM_THREADS": str(self.intra_op_threads),
+        }
+
+
+def available_cpus() -> list[int]:
+    """Cores this process may run on (honours cgroup/taskset restrictions where supported)"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_workers(
+    cpus: Sequence[int], workers: int = 0, threads_per_worker: int = 0, pin: bool = True
+) -> list[WorkerPlan]:
+    """
+    Split `cpus` between worker processes.
+
+    With nothing specified every core gets its own single-threaded worker, which suits
+    a model as small as MNIST best: parallelism across requests beats parallelism
+    inside one session.run.
+    """
+    cpus = list(cpus)
+    if not cpus:
+        raise ValueError("No CPUs available")
+
+    if workers <= 0:
+        workers = max(1, len(cpus) // threads_per_worker) if threads_per_worker > 0 else len(cpus)
+    if threads_per_worker <= 0:
+        threads_per_worker = max(1, len(cpus) // workers)
+
+    plans = []
+    for index in range(workers):
+        start = index * threads_per_worker
+        pinned = tuple(cpus[(start + k) % len(cpus)] for k in range(threads_per_worker)) if pin else None
+        plans.append(WorkerPlan(index=index, intra_op_threads=threads_per_worker, cpus=pinned))
+    return plans
+
+
+def restart_delay(restarts: int) -> float | None:
+    """Seconds to wait before restarting a worker that crashed `restarts` times in a row; None = give up"""
+    if restarts >= MAX_RESTARTS:
+        return None
+    return min(MAX_RESTART_BACKOFF_S, RESTART_BACKOFF_S * 2**restarts)
+
+
+def _run_worker(plan: WorkerPlan, sock: socket.socket, log_level: str) -> None:
+    # Must happen before `app` is imported: the model is created at import time
+    os.environ.update(plan.environ())
+    if plan.cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, plan.cpus)
+
+    import cv2
+    import uvicorn
+
+    # Requests are decoded in parallel by the executor threads, not inside one decode
+    cv2.setNumThreads(1)
+
+    config = uvicorn.Config("app:app", log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host: str, port: int, plans: list[WorkerPlan], log_level: str = "info") -> int:
+    """
+    Run one process per plan until SIGINT/SIGTERM, restarting crashed workers with
+    exponential backoff. Returns 1 if a worker kept crashing and serving was given up.
+    """
+    import uvicorn
+
+    sock = uvicorn.Config("app:app", host=host, port=port).bind_socket()
+    context = multiprocessing.get_context("spawn")
+    processes: dict[int, multiprocessing.Process] = {}
+    started: dict[int, float] = {}
+    restarts = {plan.index: 0 for plan in plans}
+    # Crashed workers waiting for their backoff: index -> when to restart
+    pending: dict[int, float] = {}
+    stopping = False
+    status = 0
+
+    def start(plan: WorkerPlan) -> None:
+        process = context.Process(target=_run_worker, args=(plan, sock, log_level), name=f"mnist-worker-{plan.index}")
+        process.start()
+        processes[plan.index] = process
+        started[plan.index] = time.monotonic()
+        logger.info(
+            "Started worker %d (pid %d, threads %d, cpus %s)", plan.index, process.pid, plan.intra_op_threads, plan.cpus
+        )
+
+    def stop(*_args) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    for plan in plans:
+        start(plan)
+
+    try:
+        while not stopping:
+            time.sleep(POLL_S)
+            now = time.monotonic()
+            for plan in plans:
+                if stopping or processes[plan.index].is_alive():
+                    continue
+                if plan.index in pending:
+                    if now >= pending[plan.index]:
+                        del pending[plan.index]
+                        start(plan)
+                    continue
+
+                exitcode = processes[plan.index].exitcode
+                if now - started[plan.index] >= STABLE_AFTER_S:
+                    restarts[plan.index] = 0
+                delay = restart_delay(restarts[plan.index])
+                if delay is None:
+                    logger.error("Worker %d still crashing after %d restarts, shutting down", plan.index, MAX_RESTARTS)
+                    stopping = True
+                    status = 1
+                    break
+                restarts[plan.index] += 1
+                pending[plan.index] = now + delay
+                logger.warning("Worker %d exited with %s, restarting in %.1f s", plan.index, exitcode, delay)
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.join()
+        sock.close()
+    return status
+
+
+def main(argv: list[str] | None = None) -> int:
+    from settings import load_settings
+
+    settings = load_settings()
+    parser = argparse.ArgumentParser(description="Run the digit recognition API with several worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=settings.workers, help="0 = one per available core")
+    parser.add_argument("--threads-per-worker", type=int, default=settings.threads_per_worker)
+    parser.add_argument("--no-pin", dest="pin", action="store_false", default=settings.pin_cpus)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    plans = plan_workers(available_cpus(), args.workers, args.threads_per_worker, args.pin)
+    return serve(args.host, args.port, plans, args.log_level)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Runtime configuration of the backend, read from environment variables
+"""
+
+import os
+from dataclasses import dataclass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value not in (None, "") else default
+
+
+def _env_ints(name: str, default: tuple[int, ...]) -> tuple[int, ...]:
+    value = os.getenv(name)
+    return tuple(int(part) for part in value.split(",") if part.strip()) if value not in (None, "") else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Entry of model/registry.py to serve ("fp32" or "int8")
+    model_variant: str = "fp32"
+    # Micro-batching of concurrent single-image inferences
+    max_batch_size: int = 32
+    max_batch_wait_ms: float = 2.0
+    # Upper bound on images accepted by one batch request
+    max_files_per_request: int = 256
+    # Upload limits, enforced while the body streams in and from image headers before decoding
+    max_request_bytes: int = 64 * 1024 * 1024
+    max_upload_bytes: int = 16 * 1024 * 1024
+    max_image_pixels: int = 50_000_000
+    # Bulk archive jobs: own worker pool, batch size, yielding to interactive requests, kept results
+    max_archive_bytes: int = 1024 * 1024 * 1024
+    job_workers: int = 1
+    job_queue_size: int = 8
+    job_batch_size: int = 32
+    job_max_yield_s: float = 1.0
+    job_retention: int = 16
+    # Dedicated executor for decoding and inference, with a bounded backlog
+    executor_workers: int = 16
+    executor_queue_size: int = 64
+    retry_after_s: int = 1
+    # Deadline of requests without X-Request-Timeout-Ms / X-Request-Deadline (0 = none);
+    # the frontend gives up after 30 s
+    request_timeout_s: float = 30.0
+    # ONNXRuntime threading (0 threads = let ORT decide)
+    ort_intra_op_threads: int = 0
+    ort_inter_op_threads: int = 0
+    ort_execution_mode: str = "sequential"
+    ort_allow_spinning: bool = True
+    ort_optimization_level: str = "all"
+    # Persisted optimized graphs for fast cold start ("" disables the cache)
+    graph_cache_dir: str = os.path.join(os.path.dirname(os.path.abspath(__file__)), "model", ".graph_cache")
+    # Startup warmup gating /ready (empty batch sizes = powers of two up to max_files_per_request)
+    warmup_enabled: bool = True
+    warmup_batch_sizes: tuple[int, ...] = ()
+    warmup_iterations: int = 3
+    # Multi-process serving (0 workers = one per available core)
+    workers: int = 0
+    threads_per_worker: int = 0
+    pin_cpus: bool = True
+    # Header-driven grayscale / reduced-resolution decoding of uploads
+    fast_decode: bool = True
+    # Cache of recognition results keyed on a hash of the raw upload (0 = unbounded/no TTL)
+    result_cache_enabled: bool = True
+    result_cache_entries: int = 10000
+    result_cache_bytes: int = 0
+    result_cache_ttl_s: float = 0.0
+    # Identical uploads in flight at the same time share one decode and inference
+    coalesce_enabled: bool = True
+    # Cache of predictions keyed on the normalized 28x28 tensor (catches re-encoded duplicates)
+    tensor_cache_enabled: bool = True
+    tensor_cache_entries: int = 50000
+    tensor_cache_bytes: int = 0
+    tensor_cache_ttl_s: float = 0.0
+
+
+def load_settings() -> Settings:
+    return Settings(
+        model_variant=os.getenv("MNIST_MODEL_VARIANT") or Settings.model_variant,
+        max_batch_size=_env_int("MNIST_MAX_BATCH_SIZE", Settings.max_batch_size),
+        max_batch_wait_ms=_env_float("MNIST_MAX_BATCH_WAIT_MS", Settings.max_batch_wait_ms),
+        max_files_per_request=_env_int("MNIST_MAX_FILES_PER_REQUEST", Settings.max_files_per_request),
+        max_request_bytes=_env_int("MNIST_MAX_REQUEST_BYTES", Settings.max_request_bytes),
+        max_upload_bytes=_env_int("MNIST_MAX_UPLOAD_BYTES", Settings.max_upload_bytes),
+        max_image_pixels=_env_int("MNIST_MAX_IMAGE_PIXELS", Settings.max_image_pixels),
+        max_archive_bytes=_env_int("MNIST_MAX_ARCHIVE_BYTES", Settings.max_archive_bytes),
+        job_workers=_env_int("MNIST_JOB_WORKERS", Settings.job_workers),
+        job_queue_size=_env_int("MNIST_JOB_QUEUE_SIZE", Settings.job_queue_size),
+        job_batch_size=_env_int("MNIST_JOB_BATCH_SIZE", Settings.job_batch_size),
+        job_max_yield_s=_env_float("MNIST_JOB_MAX_YIELD_S", Settings.job_max_yield_s),
+        job_retention=_env_int("MNIST_JOB_RETENTION", Settings.job_retention),
+        executor_workers=_env_int("MNIST_EXECUTOR_WORKERS", Settings.executor_workers),
+        executor_queue_size=_env_int("MNIST_EXECUTOR_QUEUE_SIZE", Settings.executor_queue_size),
+        retry_after_s=_env_int("MNIST_RETRY_AFTER_S", Settings.retry_after_s),
+        request_timeout_s=_env_float("MNIST_REQUEST_TIMEOUT_S", Settings.request_timeout_s),
+        ort_intra_op_threads=_env_int("MNIST_ORT_INTRA_OP_THREADS", Settings.ort_intra_op_threads),
+        ort_inter_op_threads=_env_int("MNIST_ORT_INTER_OP_THREADS", Settings.ort_inter_op_threads),
+        ort_execution_mode=os.getenv("MNIST_ORT_EXECUTION_MODE") or Settings.ort_execution_mode,
+        ort_allow_spinning=_env_bool("MNIST_ORT_ALLOW_SPINNING", Settings.ort_allow_spinning),
+        ort_optimization_level=os.getenv("MNIST_ORT_OPTIMIZATION_LEVEL") or Settings.ort_optimization_level,
+        graph_cache_dir=os.getenv("MNIST_GRAPH_CACHE_DIR", Settings.graph_cache_dir),
+        warmup_enabled=_env_bool("MNIST_WARMUP_ENABLED", Settings.warmup_enabled),
+        warmup_batch_sizes=_env_ints("MNIST_WARMUP_BATCH_SIZES", Settings.warmup_batch_sizes),
+        warmup_iterations=_env_int("MNIST_WARMUP_ITERATIONS", Settings.warmup_iterations),
+        workers=_env_int("MNIST_WORKERS", Settings.workers),
+        threads_per_worker=_env_int("MNIST_THREADS_PER_WORKER", Settings.threads_per_worker),
+        pin_cpus=_env_bool("MNIST_PIN_CPUS", Settings.pin_cpus),
+        fast_decode=_env_bool("MNIST_FAST_DECODE", Settings.fast_decode),
+        result_cache_enabled=_env_bool("MNIST_RESULT_CACHE_ENABLED", Settings.result_cache_enabled),
+        result_cache_entries=_env_int("MNIST_RESULT_CACHE_ENTRIES", Settings.result_cache_entries),
+        result_cache_bytes=_env_int("MNIST_RESULT_CACHE_BYTES", Settings.result_cache_bytes),
+        result_cache_ttl_s=_env_float("MNIST_RESULT_CACHE_TTL_S", Settings.result_cache_ttl_s),
+        coalesce_enabled=_env_bool("MNIST_COALESCE_ENABLED", Settings.coalesce_enabled),
+        tensor_cache_enabled=_env_bool("MNIST_TENSOR_CACHE_ENABLED", Settings.tensor_cache_enabled),
+        tensor_cache_entries=_env_int("MNIST_TENSOR_CACHE_ENTRIES", Settings.tensor_cache_entries),
+        tensor_cache_bytes=_env_int("MNIST_TENSOR_CACHE_BYTES", Settings.tensor_cache_bytes),
+        tensor_cache_ttl_s=_env_float("MNIST_TENSOR_CACHE_TTL_S", Settings.tensor_cache_ttl_s),
+    )
+
+
+if __name__ == "__main__":
+    raise ImportError("This is not main module")
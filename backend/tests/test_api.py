@@ -11,6 +11,7 @@ import pytest
 from app import app
 from fastapi.testclient import TestClient
 from PIL import Image
+from serving.executor import ExecutorOverloaded
 
 
 @pytest.fixture
@@ -52,6 +53,15 @@ class TestHealthEndpoints:
         assert response.status_code == 200
         assert response.json() == {"status": "healthy"}
 
+    @pytest.mark.api
+    def test_stats_endpoint(self, client):
+        """Test the stats endpoint reports micro-batching counters"""
+        response = client.get("/stats")
+        assert response.status_code == 200
+        batching = response.json()["batching"]
+        assert batching["max_batch_size"] >= 1
+        assert "mean_fill_ratio" in batching
+
 
 class TestDigitRecognitionEndpoint:
     """Test the digit recognition endpoint"""
@@ -118,6 +128,80 @@ class TestDigitRecognitionEndpoint:
             assert "Unexpected error" in response.json()["detail"]
 
 
+class TestBackpressure:
+    """Test rejection of requests when the inference executor is saturated"""
+
+    @pytest.mark.api
+    @pytest.mark.parametrize(
+        "endpoint,field", [("/recognize_digit", "image_file"), ("/recognize_digits", "image_files")]
+    )
+    def test_overloaded_returns_503(self, client, sample_image_bytes, endpoint, field):
+        """Test a full executor backlog yields 503 with Retry-After"""
+        with patch("app.executor") as mock_executor:
+            mock_executor.run.side_effect = ExecutorOverloaded("Server is busy")
+
+            files = {field: ("test.png", sample_image_bytes, "image/png")}
+            response = client.post(endpoint, files=files)
+
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "1"
+            assert "Server is busy" in response.json()["detail"]
+
+
+class TestBatchRecognitionEndpoint:
+    """Test the batch digit recognition endpoint"""
+
+    @pytest.mark.api
+    def test_recognize_digits_success(self, client, sample_image_bytes):
+        """Test batch recognition keeps upload order and rejects non-images per item"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [
+                {"status": "success", "recognized_digit": 1, "model_confidence": 0.9, "filename": "a.png"},
+                {"status": "success", "recognized_digit": 2, "model_confidence": 0.8, "filename": "c.png"},
+            ]
+
+            files = [
+                ("image_files", ("a.png", sample_image_bytes, "image/png")),
+                ("image_files", ("b.txt", b"not an image", "text/plain")),
+                ("image_files", ("c.png", sample_image_bytes, "image/png")),
+            ]
+            response = client.post("/recognize_digits", files=files)
+
+            assert response.status_code == 200
+            results = response.json()["results"]
+            assert [r["filename"] for r in results] == ["a.png", "b.txt", "c.png"]
+            assert results[1] == {"status": "error", "error": "File must be an image", "filename": "b.txt"}
+            assert mock_model.process_and_recognize_batch.call_args[0][0] == [
+                (sample_image_bytes, "a.png"),
+                (sample_image_bytes, "c.png"),
+            ]
+
+    @pytest.mark.api
+    def test_recognize_digits_too_many_files(self, client, sample_image_bytes):
+        """Test the per-request image limit"""
+        with patch("app.settings") as mock_settings:
+            mock_settings.max_files_per_request = 1
+            files = [("image_files", (f"{i}.png", sample_image_bytes, "image/png")) for i in range(2)]
+            response = client.post("/recognize_digits", files=files)
+
+        assert response.status_code == 413
+
+    @pytest.mark.integration
+    def test_recognize_digits_real_model(self, client, sample_image_bytes, invalid_image_bytes):
+        """Test batch recognition end to end with the real model"""
+        files = [
+            ("image_files", ("ok.png", sample_image_bytes, "image/png")),
+            ("image_files", ("broken.png", invalid_image_bytes, "image/png")),
+        ]
+        response = client.post("/recognize_digits", files=files)
+
+        assert response.status_code == 200
+        ok, broken = response.json()["results"]
+        assert ok["status"] == "success"
+        assert 0 <= ok["recognized_digit"] <= 9
+        assert broken["status"] == "error"
+
+
 class TestCORS:
     """Test CORS configuration"""
 
@@ -0,0 +1,94 @@
+"""
+Tests for the offline batch recognition CLI
+"""
+
+import csv
+import json
+
+import cv2
+import numpy as np
+import pytest
+from batch import completed_paths, iter_inputs, main, run
+from model.synthetic import render_digit
+from serving.workers import WorkerPlan
+
+SINGLE_WORKER = [WorkerPlan(index=0, intra_op_threads=1, cpus=None)]
+
+
+@pytest.fixture
+def images(tmp_path):
+    """Ten synthetic digits in a nested directory plus one broken file"""
+    root = tmp_path / "crops"
+    (root / "more").mkdir(parents=True)
+    for digit in range(10):
+        folder = root if digit < 5 else root / "more"
+        cv2.imwrite(str(folder / f"{digit}.png"), render_digit(digit, np.random.default_rng(digit)))
+    (root / "broken.png").write_bytes(b"not an image")
+    (root / "notes.txt").write_text("ignored")
+    return root
+
+
+class TestInputs:
+    """Test enumeration of input paths"""
+
+    @pytest.mark.unit
+    def test_directories_globs_and_lists(self, images, tmp_path):
+        """Test every source kind is expanded and each path comes out once"""
+        listing = tmp_path / "paths.txt"
+        listing.write_text(f"{images / '0.png'}\n\n{images / 'more' / '9.png'}\n")
+
+        from_dir = list(iter_inputs([str(images)]))
+        assert len(from_dir) == 11 and not any(path.endswith(".txt") for path in from_dir)
+        assert len(list(iter_inputs([str(images / "**" / "[0-4].png")]))) == 5
+        assert list(iter_inputs([], [str(listing)])) == [str(images / "0.png"), str(images / "more" / "9.png")]
+        assert len(list(iter_inputs([str(images), str(images / "0.png")], [str(listing)]))) == 11
+
+    @pytest.mark.unit
+    def test_completed_paths_drops_partial_line(self, tmp_path):
+        """Test a line cut off by an interruption is removed before appending"""
+        output = tmp_path / "out.jsonl"
+        output.write_text(json.dumps({"path": "a.png"}) + "\n" + '{"path": "b.p')
+
+        assert completed_paths(str(output), "jsonl") == {"a.png"}
+        assert output.read_text() == json.dumps({"path": "a.png"}) + "\n"
+        assert completed_paths(str(tmp_path / "missing.jsonl"), "jsonl") == set()
+
+
+class TestRun:
+    """Test batch recognition through the process pool"""
+
+    @pytest.mark.integration
+    def test_jsonl_and_resume(self, images, tmp_path):
+        """Test every image is recognized once and a rerun with resume only does new files"""
+        output = str(tmp_path / "out.jsonl")
+        paths = sorted(iter_inputs([str(images)]))
+
+        first = run(paths[:6], output, batch_size=4, plans=SINGLE_WORKER)
+        second = run(paths, output, resume=True, batch_size=4, plans=SINGLE_WORKER)
+
+        with open(output) as f:
+            rows = {row["path"]: row for row in map(json.loads, f)}
+        assert sorted(rows) == paths
+        assert first["succeeded"] + first["failed"] == 6
+        assert second["skipped"] == 6 and second["succeeded"] + second["failed"] == 5
+        assert rows[str(images / "broken.png")]["status"] == "error"
+        correct = sum(
+            rows[str(images / f"{digit}.png" if digit < 5 else images / "more" / f"{digit}.png")]["digit"] == digit
+            for digit in range(10)
+        )
+        assert correct >= 8
+
+    @pytest.mark.integration
+    def test_cli_csv(self, images, tmp_path, capsys):
+        """Test the command line writes one CSV header even across resumed runs"""
+        output = str(tmp_path / "out.csv")
+        argv = [str(images / "**" / "*.png"), "--output", output, "--workers", "1", "--no-pin", "--quiet"]
+
+        assert main(argv) == 1  # broken.png fails
+        assert main(argv + ["--resume"]) == 0
+
+        with open(output) as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 11
+        assert sum(row["status"] == "success" for row in rows) == 10
+        assert json.loads(capsys.readouterr().out.splitlines()[-1])["skipped"] == 11
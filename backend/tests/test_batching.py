@@ -0,0 +1,107 @@
+"""
+Tests for the dynamic micro-batching scheduler
+"""
+
+import concurrent.futures
+import threading
+
+import numpy as np
+import pytest
+from model.batching import MicroBatcher
+from model.onnx import ONNXModel
+
+
+class TestMicroBatcher:
+    """Test MicroBatcher in isolation with a fake batch function"""
+
+    @pytest.mark.unit
+    def test_each_caller_gets_own_row(self):
+        """Test that outputs are routed back to the caller that submitted the sample"""
+        batcher = MicroBatcher(lambda batch: batch.reshape(len(batch), -1) * 2, max_batch_size=8, max_wait_ms=20)
+        try:
+            futures = [batcher.submit(np.full((1, 2, 2), i, dtype=np.float32)) for i in range(5)]
+            for i, future in enumerate(futures):
+                np.testing.assert_array_equal(future.result(timeout=5), np.full(4, 2 * i))
+        finally:
+            batcher.close()
+
+    @pytest.mark.unit
+    def test_concurrent_submits_are_merged(self):
+        """Test that requests arriving together run as one batch"""
+        gate = threading.Event()
+        seen = []
+
+        def run_batch(batch):
+            gate.wait(5)
+            seen.append(len(batch))
+            return batch
+
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=50)
+        try:
+            # The first batch blocks in run_batch while the rest pile up in the queue
+            first = batcher.submit(np.zeros(1))
+            rest = [batcher.submit(np.zeros(1)) for _ in range(8)]
+            gate.set()
+            for future in [first] + rest:
+                future.result(timeout=5)
+        finally:
+            batcher.close()
+
+        assert sum(seen) == 9
+        assert max(seen) == 4
+        stats = batcher.stats()
+        assert stats["items"] == 9
+        assert stats["batches"] == len(seen)
+        assert 0 < stats["mean_fill_ratio"] <= 1
+
+    @pytest.mark.unit
+    def test_batch_error_reaches_every_caller(self):
+        """Test that a failing batch fails all of its futures"""
+
+        def run_batch(batch):
+            raise RuntimeError("ORT failure")
+
+        batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=1)
+        try:
+            future = batcher.submit(np.zeros(1))
+            with pytest.raises(RuntimeError, match="ORT failure"):
+                future.result(timeout=5)
+        finally:
+            batcher.close()
+
+    @pytest.mark.unit
+    def test_invalid_configuration(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda batch: batch, max_batch_size=0)
+        with pytest.raises(ValueError):
+            MicroBatcher(lambda batch: batch, max_wait_ms=-1)
+
+
+class TestBatchedONNXModel:
+    """Test batching against the real batch-capable model"""
+
+    @pytest.mark.integration
+    def test_batched_matches_unbatched(self):
+        """Test that concurrent batched inference gives the same answers as one-by-one inference"""
+        batched = ONNXModel("mnist-12-batched.onnx", max_batch_size=16, max_wait_ms=5)
+        single = ONNXModel("mnist-12.onnx")
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 255, (28, 28), dtype=np.uint8) for _ in range(32)]
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            results = list(executor.map(batched.infer, images))
+
+        for image, (digit, confidence) in zip(images, results):
+            expected_digit, expected_confidence = single.infer(image)
+            assert digit == expected_digit
+            assert confidence == pytest.approx(expected_confidence, rel=1e-5)
+
+        assert batched.batch_stats()["items"] == 32
+        assert single.batch_stats() == {}
+
+    @pytest.mark.integration
+    def test_fixed_batch_model_disables_batching(self):
+        """Test that a model with a fixed batch axis never gets a batcher"""
+        model = ONNXModel("mnist-12.onnx", max_batch_size=32)
+        assert model.batch_stats() == {}
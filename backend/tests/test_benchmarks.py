@@ -0,0 +1,80 @@
+"""
+Tests for the benchmark suite and its baseline comparison
+"""
+
+import json
+
+import pytest
+from benchmarks.suite import compare, main, run, summarize
+
+
+def result(p50: float, throughput: float) -> dict:
+    return {"p50_ms": p50, "p95_ms": p50 * 2, "p99_ms": p50 * 3, "mean_ms": p50, "throughput_per_s": throughput}
+
+
+class TestBenchmarkReport:
+    """Test percentile summaries and regression detection"""
+
+    @pytest.mark.unit
+    def test_summarize(self):
+        """Test percentiles and throughput of a case"""
+        summary = summarize([0.001] * 98 + [0.010, 0.020], items=200, wall_s=0.5)
+
+        assert summary["calls"] == 100
+        assert summary["p50_ms"] == 1.0
+        assert summary["p99_ms"] > summary["p95_ms"] >= 1.0
+        assert summary["throughput_per_s"] == 400.0
+
+    @pytest.mark.unit
+    def test_compare_flags_regressions(self):
+        """Test latency growth and throughput loss beyond the tolerance are regressions"""
+        baseline = {"results": {"a": result(1.0, 1000), "b": result(1.0, 1000), "gone": result(1.0, 1000)}}
+        current = {"results": {"a": result(1.2, 900), "b": result(1.5, 600), "added": result(1.0, 1000)}}
+
+        rows = {row["case"]: row for row in compare(current, baseline, tolerance=0.25)}
+
+        assert rows["a"]["status"] == "ok"
+        assert rows["b"]["status"] == "regressed"
+        assert set(rows["b"]["regressed"]) == {"p50_ms", "p95_ms", "p99_ms", "throughput_per_s"}
+        assert rows["b"]["changes"]["p50_ms"] == 0.5
+        assert rows["added"]["status"] == "new"
+        assert rows["gone"]["status"] == "missing"
+
+    @pytest.mark.unit
+    def test_tolerance_is_configurable(self):
+        """Test a looser tolerance accepts the same slowdown"""
+        baseline = {"results": {"a": result(1.0, 1000)}}
+        current = {"results": {"a": result(1.5, 700)}}
+
+        assert compare(current, baseline, tolerance=0.25)[0]["status"] == "regressed"
+        assert compare(current, baseline, tolerance=0.6)[0]["status"] == "ok"
+
+
+class TestBenchmarkRun:
+    """Smoke runs of the real-model suites"""
+
+    @pytest.mark.performance
+    def test_quick_inference_run(self):
+        """Test the inference suite measures the real model at every batch size"""
+        report = run(("inference",), quick=True)
+
+        assert set(report["results"]) == {"inference/batch_1", "inference/batch_8", "inference/batch_32"}
+        assert report["environment"]["onnxruntime"]
+        for case in report["results"].values():
+            assert 0 < case["p50_ms"] <= case["p95_ms"] <= case["p99_ms"]
+            assert case["throughput_per_s"] > 0
+
+    @pytest.mark.performance
+    def test_cli_fails_on_regression(self, tmp_path, capsys):
+        """Test the CLI saves results and exits 1 against an unreachable baseline"""
+        baseline, output = tmp_path / "baseline.json", tmp_path / "results.json"
+        impossible = {case: result(1e-6, 1e12) for case in ("inference/batch_1", "decode/png/28")}
+        baseline.write_text(json.dumps({"results": impossible}))
+
+        code = main(["--suites", "inference", "--quick", "--baseline", str(baseline), "--output", str(output)])
+
+        assert code == 1
+        assert "inference/batch_8" in json.loads(output.read_text())["results"]
+        report = capsys.readouterr().out
+        assert "regressed" in report
+        assert "decode/png/28" not in report
@@ -0,0 +1,119 @@
+"""
+Tests for the preprocessing buffer pool
+"""
+
+import threading
+
+import numpy as np
+import pytest
+from benchmarks.preprocess import legacy_preprocess, run
+from model.buffers import BufferPool
+from model.onnx import ONNXModel
+from model.registry import get_variant, variant_path
+
+
+class TestBufferPool:
+    """Test per-thread scratch buffers"""
+
+    @pytest.mark.unit
+    def test_reuses_memory(self):
+        """Test repeated requests share one allocation, smaller shapes included"""
+        pool = BufferPool()
+        first = pool.get("stack", (4, 28, 28), np.uint8)
+        again = pool.get("stack", (4, 28, 28), np.uint8)
+        smaller = pool.get("stack", (2, 28, 28), np.uint8)
+
+        assert again is first
+        assert np.shares_memory(first, smaller)
+        assert smaller.shape == (2, 28, 28) and smaller.flags.c_contiguous
+        assert pool.stats()["allocations"] == 1
+
+    @pytest.mark.unit
+    def test_grows_geometrically(self):
+        """Test a larger request reallocates with headroom"""
+        pool = BufferPool()
+        pool.get("input", (10,), np.float32)
+        grown = pool.get("input", (11,), np.float32)
+        pool.get("input", (20,), np.float32)
+
+        assert grown.shape == (11,)
+        assert pool.stats() == {"allocations": 2, "allocated_bytes": (10 + 20) * 4}
+
+    @pytest.mark.unit
+    def test_threads_do_not_share(self):
+        """Test every thread gets its own buffers"""
+        pool = BufferPool()
+        views = []
+        threads = [threading.Thread(target=lambda: views.append(pool.get("x", (8,), np.uint8))) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not np.shares_memory(views[0], views[1])
+
+    @pytest.mark.unit
+    def test_view_cache_is_bounded(self):
+        """Test many distinct source shapes do not accumulate cached views"""
+        pool = BufferPool()
+        for side in range(1, BufferPool.MAX_VIEWS + 10):
+            view = pool.get("gray", (side, 3), np.uint8)
+
+        assert view.shape == (BufferPool.MAX_VIEWS + 9, 3)
+        assert len(pool._BufferPool__local.views) <= BufferPool.MAX_VIEWS
+
+
+class TestPooledPreprocessing:
+    """Test the model's allocation-free hot path"""
+
+    @pytest.fixture
+    def model(self):
+        return ONNXModel(variant_path(get_variant("fp32")))
+
+    @pytest.mark.integration
+    def test_steady_state_allocates_nothing(self, model):
+        """Test warm inference calls do not grow the pool, and results match fresh buffers"""
+        rng = np.random.default_rng(0)
+        images = [rng.integers(0, 256, (40, 30, 3), dtype=np.uint8) for _ in range(8)]
+        expected = model.infer_batch(images)
+        buffers = model._ONNXModel__buffers
+        allocations = buffers.stats()["allocations"]
+
+        for _ in range(5):
+            assert model.infer_batch(images) == expected
+            assert model.infer(images[0]) == expected[0]
+
+        assert buffers.stats()["allocations"] == allocations
+
+    @pytest.mark.integration
+    def test_large_images_are_not_pooled(self, model):
+        """Test a colour image above the pooling cap gets a one-off gray buffer"""
+        small = np.zeros((40, 30, 3), dtype=np.uint8)
+        large = np.zeros((2100, 2100, 3), dtype=np.uint8)
+        buffers = model._ONNXModel__buffers
+        model.infer_batch([small])
+        allocated = buffers.stats()["allocated_bytes"]
+
+        assert model.infer_batch([large]) == model.infer_batch([small])
+
+        assert buffers.stats()["allocated_bytes"] - allocated < 2100 * 2100
+
+    @pytest.mark.unit
+    def test_preprocess_into_out(self, model):
+        """Test preprocess_batch writes into a caller-supplied array"""
+        images = [np.full((28, 28), 51, dtype=np.uint8), np.zeros((56, 56), dtype=np.uint8)]
+        out = np.empty((2, 1, 28, 28), dtype=np.float32)
+
+        result = model.preprocess_batch(images, out=out)
+
+        assert result is out
+        np.testing.assert_array_equal(out, np.concatenate([legacy_preprocess(image) for image in images]))
+
+    @pytest.mark.performance
+    def test_microbenchmark(self):
+        """Test the pooled path leaves far less garbage than the legacy path"""
+        report = run(iterations=20)
+
+        for case in report.values():
+            assert case["pooled"]["transient_bytes_per_call"] < case["legacy"]["transient_bytes_per_call"]
+        assert report["gray_28_batch_32"]["pooled"]["transient_bytes_per_call"] < 4096
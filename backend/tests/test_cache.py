@@ -0,0 +1,174 @@
+"""
+Tests for the result and normalized-tensor caches
+"""
+
+from unittest.mock import Mock, patch
+
+import cv2
+import numpy as np
+import pytest
+from model.cache import LRUCache, content_key, payload_size
+from model.onnx import ONNXModel
+
+
+class TestContentKey:
+    """Test the content hash"""
+
+    @pytest.mark.unit
+    def test_key_depends_on_content_only(self):
+        """Test equal bytes give equal keys and different bytes different keys"""
+        assert content_key(b"abc") == content_key(bytes(b"abc"))
+        assert content_key(b"abc") != content_key(b"abd")
+        assert len(content_key(b"abc")) == 16
+
+
+class TestLRUCache:
+    """Test LRUCache bounds, eviction and counters"""
+
+    @pytest.mark.unit
+    def test_hit_and_miss(self):
+        """Test basic lookups and counters"""
+        cache = LRUCache(max_entries=10)
+        assert cache.get("a") is None
+        cache.put("a", (1, 0.5))
+        assert cache.get("a") == (1, 0.5)
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    @pytest.mark.unit
+    def test_evicts_least_recently_used(self):
+        """Test entry-count bound evicts the least recently used entry"""
+        cache = LRUCache(max_entries=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    @pytest.mark.unit
+    def test_memory_bound(self):
+        """Test the approximate memory budget"""
+        cache = LRUCache(max_bytes=250, sizeof=lambda key, value: 100)
+        for key in "abc":
+            cache.put(key, 0)
+
+        assert len(cache) == 2
+        assert cache.stats()["bytes"] == 200
+        # Entries larger than the whole budget are never stored
+        LRUCache(max_bytes=50, sizeof=lambda key, value: 100).put("x", 0)
+
+    @pytest.mark.unit
+    def test_default_size_counts_the_payload(self):
+        """Test the default budget sizes what containers hold, not just the containers"""
+        pixels = np.zeros((10, 28, 28), dtype=np.float32)
+        assert payload_size((pixels[0], b"x" * 1000)) > pixels[0].nbytes + 1000
+        assert payload_size({"crops": [pixels]}) > pixels.nbytes
+
+        cache = LRUCache(max_bytes=20_000)
+        cache.put("a", (np.ones(4096, dtype=np.float32), 0.5))
+        cache.put("b", (np.ones(4096, dtype=np.float32), 0.5))
+        assert len(cache) == 1
+
+    @pytest.mark.unit
+    def test_ttl(self):
+        """Test that expired entries are dropped"""
+        cache = LRUCache(max_entries=10, ttl_s=5)
+        with patch("model.cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with patch("model.cache.time.monotonic", return_value=104.0):
+            assert cache.get("a") == 1
+        with patch("model.cache.time.monotonic", return_value=106.0):
+            assert cache.get("a") is None
+
+        assert cache.stats()["expirations"] == 1
+        assert len(cache) == 0
+
+    @pytest.mark.unit
+    def test_replacing_entry_keeps_size_accounting(self):
+        """Test overwriting a key does not leak accounted bytes"""
+        cache = LRUCache(sizeof=lambda key, value: 10)
+        cache.put("a", 1)
+        cache.put("a", 2)
+
+        assert cache.get("a") == 2
+        assert cache.stats()["bytes"] == 10
+
+    @pytest.mark.unit
+    def test_negative_limits(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            LRUCache(max_entries=-1)
+
+
+class TestTensorCache:
+    """Test the normalized-tensor cache inside ONNXModel"""
+
+    @pytest.fixture
+    def mock_session(self):
+        """Create a mock ONNX session with a dynamic batch axis"""
+        mock_session = Mock()
+        mock_input = Mock()
+        mock_input.name = "input"
+        mock_input.shape = ["N", 1, 28, 28]
+        mock_output = Mock()
+        mock_output.name = "output"
+        mock_session.get_inputs.return_value = [mock_input]
+        mock_session.get_outputs.return_value = [mock_output]
+        mock_session.run.side_effect = lambda names, feeds: [np.tile(np.eye(10)[3], (len(feeds["input"]), 1))]
+        return mock_session
+
+    @pytest.fixture
+    def onnx_model(self, mock_session):
+        """Create ONNXModel with a tensor cache and a mocked session"""
+        with patch("model.onnx.ort.InferenceSession") as mock_inference:
+            mock_inference.return_value = mock_session
+            return ONNXModel("dummy.onnx", tensor_cache=LRUCache(max_entries=100))
+
+    @pytest.mark.unit
+    def test_reencoded_duplicate_hits(self, onnx_model, mock_session):
+        """Test the same digit encoded as PNG and BMP, and upscaled, shares one inference"""
+        digit = np.random.randint(0, 255, (28, 28), dtype=np.uint8)
+        png = cv2.imdecode(cv2.imencode(".png", digit)[1], cv2.IMREAD_COLOR)
+        bmp = cv2.imdecode(cv2.imencode(".bmp", digit)[1], cv2.IMREAD_COLOR)
+        upscaled = cv2.resize(digit, (56, 56), interpolation=cv2.INTER_NEAREST)
+
+        results = [onnx_model.infer(image) for image in (png, bmp, upscaled)]
+
+        assert results[0] == results[1] == results[2]
+        assert mock_session.run.call_count == 1
+        stats = onnx_model.cache_stats()
+        assert stats["hits"] == 2
+        assert stats["misses"] == 1
+
+    @pytest.mark.unit
+    def test_batch_sends_only_misses(self, onnx_model, mock_session):
+        """Test only cache-missing rows of a batch reach the session"""
+        cached = np.full((28, 28), 7, dtype=np.uint8)
+        onnx_model.infer(cached)
+
+        fresh = [np.full((28, 28), v, dtype=np.uint8) for v in (1, 2)]
+        results = onnx_model.infer_batch([fresh[0], cached, fresh[1]])
+
+        assert [digit for digit, _ in results] == [3, 3, 3]
+        assert len(mock_session.run.call_args[0][1]["input"]) == 2
+
+    @pytest.mark.unit
+    def test_disabled_cache(self, mock_session):
+        """Test that no cache means every call runs the session"""
+        with patch("model.onnx.ort.InferenceSession") as mock_inference:
+            mock_inference.return_value = mock_session
+            model = ONNXModel("dummy.onnx")
+
+        image = np.zeros((28, 28), dtype=np.uint8)
+        model.infer(image)
+        model.infer(image)
+
+        assert mock_session.run.call_count == 2
+        assert model.cache_stats() == {}
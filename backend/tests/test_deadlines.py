@@ -0,0 +1,172 @@
+"""
+Tests for request deadlines and shedding of requests that cannot be answered in time
+"""
+
+import io
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import serving.executor
+from app import app
+from fastapi.testclient import TestClient
+from PIL import Image
+from serving.deadlines import request_deadline
+from serving.executor import BoundedExecutor, DeadlineExceeded
+from serving.metrics import ServiceMetrics
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI app"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def image_file():
+    """A PNG upload for /recognize_digit"""
+    buffer = io.BytesIO()
+    Image.new("L", (28, 28), color=128).save(buffer, format="PNG")
+    return {"image_file": ("test.png", buffer.getvalue(), "image/png")}
+
+
+class TestRequestDeadline:
+    """Test reading deadlines from request headers"""
+
+    @pytest.mark.unit
+    def test_timeout_is_relative_to_arrival(self):
+        """Test X-Request-Timeout-Ms counts from the request's arrival"""
+        assert request_deadline({"x-request-timeout-ms": "250"}, arrived=100.0, default_timeout_s=30) == 100.25
+
+    @pytest.mark.unit
+    def test_absolute_deadline(self):
+        """Test X-Request-Deadline is Unix time, converted to the perf_counter clock"""
+        deadline = request_deadline({"x-request-deadline": str(time.time() + 2)}, arrived=None, default_timeout_s=30)
+        assert deadline - time.perf_counter() == pytest.approx(2, abs=0.1)
+
+    @pytest.mark.unit
+    def test_default(self):
+        """Test the server default applies without headers and 0 means no deadline"""
+        assert request_deadline({}, arrived=5.0, default_timeout_s=30) == 35.0
+        assert request_deadline({}, arrived=5.0, default_timeout_s=0) is None
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("headers", [{"x-request-timeout-ms": "soon"}, {"x-request-deadline": "nan"}])
+    def test_invalid(self, headers):
+        """Test deadline headers must be numbers"""
+        with pytest.raises(ValueError, match="Invalid X-Request"):
+            request_deadline(headers, arrived=None, default_timeout_s=30)
+
+
+class TestExecutorShedding:
+    """Test BoundedExecutor drops work whose deadline cannot be met"""
+
+    @pytest.mark.unit
+    def test_expired_deadline_is_shed_at_submission(self):
+        """Test a task past its deadline never runs"""
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        calls = []
+        try:
+            with pytest.raises(DeadlineExceeded):
+                executor.submit(calls.append, 1, deadline=time.perf_counter() - 0.001)
+            assert executor.submit(calls.append, 2, deadline=time.perf_counter() + 5).result(timeout=5) is None
+        finally:
+            executor.shutdown()
+
+        assert calls == [2]
+        assert executor.stats()["shed"] == 1
+        assert issubclass(DeadlineExceeded, serving.executor.ExecutorOverloaded)
+
+    @pytest.mark.unit
+    def test_deadline_passing_in_queue(self):
+        """Test a queued task whose deadline passes while it waits is dropped when picked up"""
+        gate = threading.Event()
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        calls = []
+        try:
+            running = executor.submit(gate.wait, 5)
+            queued = executor.submit(calls.append, 1, deadline=time.perf_counter() + 0.05)
+            time.sleep(0.1)
+            gate.set()
+            running.result(timeout=5)
+            with pytest.raises(DeadlineExceeded, match="passed while queued"):
+                queued.result(timeout=5)
+        finally:
+            executor.shutdown()
+
+        assert calls == []
+        assert executor.stats()["shed"] == 1
+
+    @pytest.mark.unit
+    def test_backlog_that_cannot_finish_in_time(self):
+        """Test the expected queue delay from recent run times sheds tasks that would finish too late"""
+        executor = BoundedExecutor(max_workers=1, max_queue=4)
+        gate = threading.Event()
+        try:
+            for _ in range(30):
+                executor.submit(time.sleep, 0.01).result(timeout=5)
+            assert executor.stats()["item_service_ms"] >= 5
+
+            running = executor.submit(gate.wait, 5)
+            executor.submit(gate.wait, 5)
+            with pytest.raises(DeadlineExceeded, match="cannot be met"):
+                executor.submit(pow, 2, 2, deadline=time.perf_counter() + 0.001)
+            assert executor.submit(pow, 2, 2, deadline=time.perf_counter() + 5) is not None
+            gate.set()
+            running.result(timeout=5)
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.unit
+    def test_idle_executor_after_a_large_batch(self):
+        """Test run time is tracked per item and a free thread never sheds a live deadline"""
+        executor = BoundedExecutor(max_workers=1, max_queue=4)
+        try:
+            for _ in range(30):
+                executor.submit(time.sleep, 0.04, items=8).result(timeout=5)
+            assert 3 <= executor.stats()["item_service_ms"] < 10
+
+            assert executor.submit(pow, 2, 2, deadline=time.perf_counter() + 0.002).result(timeout=5) == 4
+        finally:
+            executor.shutdown()
+
+        assert executor.stats()["shed"] == 0
+
+    @pytest.mark.unit
+    def test_exported_metric(self):
+        """Test the shed count is exported to Prometheus"""
+        metrics = ServiceMetrics(lambda: {"shed": 3}, dict, dict)
+        assert "mnist_executor_shed_total 3" in metrics.render()
+
+
+class TestEndpointDeadlines:
+    """Test recognition endpoints honour request deadlines"""
+
+    @pytest.mark.api
+    def test_stale_request_never_reaches_the_model(self, client, image_file):
+        """Test a request whose deadline has passed is answered 503 without inference"""
+        with patch("app.model") as mock_model:
+            response = client.post(
+                "/recognize_digit", files=image_file, headers={"X-Request-Deadline": str(time.time() - 1)}
+            )
+
+        assert response.status_code == 503
+        assert "deadline" in response.json()["detail"]
+        assert "Retry-After" in response.headers
+        mock_model.process_and_recognize.assert_not_called()
+
+    @pytest.mark.api
+    def test_live_request(self, client, image_file):
+        """Test a request within its deadline is served"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize.return_value = {"status": "success", "recognized_digit": 2}
+            response = client.post("/recognize_digit", files=image_file, headers={"X-Request-Timeout-Ms": "5000"})
+
+        assert response.status_code == 200
+
+    @pytest.mark.api
+    def test_invalid_header(self, client, image_file):
+        """Test a malformed deadline header is a client error"""
+        response = client.post("/recognize_digit", files=image_file, headers={"X-Request-Timeout-Ms": "soon"})
+        assert response.status_code == 400
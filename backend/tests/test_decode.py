@@ -0,0 +1,112 @@
+"""
+Tests for header parsing and the fast decode path
+"""
+
+import cv2
+import numpy as np
+import pytest
+from model import decode
+from model.decode import ImageHeader, decode_image, read_header
+
+
+def make_digit(width, height, colour=False):
+    """
+    Draw a smooth digit, like a scanned or photographed crop: white on black, or a
+    coloured digit on a colour gradient (ink on tinted paper under uneven light)
+    """
+    image = np.zeros((height, width, 3), dtype=np.uint8)
+    ink = (255, 255, 255)
+    if colour:
+        y, x = np.mgrid[0:height, 0:width]
+        image[..., 0] = x * 255 // max(1, width - 1)
+        image[..., 1] = y * 255 // max(1, height - 1)
+        image[..., 2] = 180
+        ink = (40, 90, 220)
+    scale = min(width, height) / 40
+    origin = (int(width * 0.3), int(height * 0.8))
+    cv2.putText(image, "7", origin, cv2.FONT_HERSHEY_SIMPLEX, scale, ink, int(max(1, scale * 3)))
+    return cv2.GaussianBlur(image, (0, 0), max(1, scale / 2))
+
+
+def normalized(image):
+    """The 28x28 grayscale tensor the model sees"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(image, (28, 28), interpolation=cv2.INTER_LINEAR).astype(int)
+
+
+class TestReadHeader:
+    """Test format detection and dimensions from headers"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext,fmt", [(".png", "png"), (".jpg", "jpeg"), (".bmp", "bmp"), (".webp", "webp")])
+    def test_formats(self, ext, fmt):
+        """Test dimensions are read for every supported format"""
+        data = cv2.imencode(ext, np.zeros((30, 50, 3), dtype=np.uint8))[1].tobytes()
+        assert read_header(data) == ImageHeader(fmt, 50, 30)
+
+    @pytest.mark.unit
+    def test_lossless_webp(self):
+        """Test the VP8L WebP variant"""
+        data = cv2.imencode(".webp", np.zeros((30, 50, 3), dtype=np.uint8), [cv2.IMWRITE_WEBP_QUALITY, 101])[1]
+        assert read_header(data.tobytes()) == ImageHeader("webp", 50, 30)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("data", [b"", b"not an image", b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff"])
+    def test_unknown_or_truncated(self, data):
+        """Test that garbage and truncated headers are not identified"""
+        assert read_header(data) is None
+
+
+class TestDecodeImage:
+    """Test the decode strategy"""
+
+    @pytest.mark.unit
+    def test_reduced_flag_selection(self):
+        """Test reduction is only used when plenty of resolution remains"""
+        assert decode.reduced_decode_flag(ImageHeader("jpeg", 4000, 3000)) == cv2.IMREAD_REDUCED_GRAYSCALE_8
+        assert decode.reduced_decode_flag(ImageHeader("jpeg", 1000, 800)) == cv2.IMREAD_REDUCED_GRAYSCALE_2
+        assert decode.reduced_decode_flag(ImageHeader("png", 300, 300)) == cv2.IMREAD_GRAYSCALE
+        assert decode.reduced_decode_flag(None) == cv2.IMREAD_GRAYSCALE
+
+    @pytest.mark.unit
+    def test_fast_decode_is_grayscale_and_small(self):
+        """Test that a large photo is decoded to a reduced grayscale image"""
+        data = cv2.imencode(".jpg", make_digit(2400, 1800))[1].tobytes()
+
+        image = decode_image(data)
+
+        assert image.ndim == 2
+        assert image.shape == (225, 300)
+        assert decode_image(data, fast=False).shape == (1800, 2400, 3)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", [".jpg", ".png"])
+    @pytest.mark.parametrize("size", [(2400, 1800), (1000, 800), (300, 300), (28, 28)])
+    def test_within_documented_tolerance(self, ext, size):
+        """Test the fast path stays within 2 gray levels of the legacy path on the model input"""
+        data = cv2.imencode(ext, make_digit(*size))[1].tobytes()
+
+        diff = np.abs(normalized(decode_image(data)) - normalized(decode_image(data, fast=False)))
+
+        assert diff.max() <= 2
+        assert diff.mean() < 0.1
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("ext", [".jpg", ".png", ".bmp"])
+    @pytest.mark.parametrize("size", [(2400, 1800), (1000, 800), (300, 300), (64, 64)])
+    def test_colour_within_documented_tolerance(self, ext, size):
+        """Test colour sources stay within 3 gray levels of the legacy path on the model input"""
+        data = cv2.imencode(ext, make_digit(*size, colour=True))[1].tobytes()
+
+        diff = np.abs(normalized(decode_image(data)) - normalized(decode_image(data, fast=False)))
+
+        assert diff.max() <= 3
+        assert diff.mean() < 0.75
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("data", [b"", b"not an image"])
+    def test_undecodable(self, data):
+        """Test undecodable input raises ValueError"""
+        with pytest.raises(ValueError, match="Could not decode image"):
+            decode_image(data)
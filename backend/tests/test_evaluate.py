@@ -0,0 +1,89 @@
+"""
+Tests for the memory-mapped dataset evaluation harness
+"""
+
+import gzip
+import json
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from benchmarks.evaluate import evaluate, generate, main, open_array, open_idx
+
+
+class TestDatasets:
+    """Test IDX and .npy access"""
+
+    @pytest.mark.unit
+    def test_generated_idx_is_memory_mapped(self, tmp_path):
+        """Test generated IDX files open as memory maps of the right shape across chunks"""
+        images_path, labels_path = generate(str(tmp_path), count=1005)
+        images, labels = open_idx(images_path), open_idx(labels_path)
+
+        assert isinstance(images, np.memmap) and isinstance(labels, np.memmap)
+        assert images.shape == (1005, 28, 28) and images.dtype == np.uint8
+        assert labels.shape == (1005,) and set(np.unique(labels)) == set(range(10))
+        assert images[1004].max() > 0
+
+    @pytest.mark.unit
+    def test_npy_and_invalid_files(self, tmp_path):
+        """Test .npy arrays are memory-mapped too and compressed IDX is refused with a hint"""
+        np.save(tmp_path / "labels.npy", np.arange(5, dtype=np.uint8))
+        assert isinstance(open_array(str(tmp_path / "labels.npy")), np.memmap)
+
+        (tmp_path / "images.gz").write_bytes(gzip.compress(b"\x00\x00\x08\x01\x00\x00\x00\x01\x07"))
+        with pytest.raises(ValueError, match="gunzip"):
+            open_array(str(tmp_path / "images.gz"))
+
+    @pytest.mark.unit
+    def test_labels_outside_digits(self, tmp_path):
+        """Test a label outside 0..9 is reported with its file and row"""
+        np.save(tmp_path / "images.npy", np.zeros((4, 28, 28), dtype=np.uint8))
+        np.save(tmp_path / "labels.npy", np.array([1, 2, 10, 3], dtype=np.uint8))
+        np.save(tmp_path / "floats.npy", np.zeros(4, dtype=np.float32))
+        images = ["--images", str(tmp_path / "images.npy")]
+
+        with pytest.raises(ValueError, match=r"labels\.npy: label 10 at row 2"):
+            main(images + ["--labels", str(tmp_path / "labels.npy")])
+        with pytest.raises(ValueError, match="integer labels"):
+            main(images + ["--labels", str(tmp_path / "floats.npy")])
+
+        labels = np.array([0, 1, 2, 255], dtype=np.uint8)
+        model = Mock()
+        model.infer_pixels.side_effect = lambda batch: [(0, 0.9)] * len(batch)
+        with pytest.raises(ValueError, match="Label 255 at row 3"):
+            evaluate(model, np.zeros((4, 28, 28), dtype=np.uint8), labels, batch_size=2)
+
+
+class TestEvaluate:
+    """Test the metrics of one pass"""
+
+    @pytest.mark.unit
+    def test_confusion_and_accuracy(self):
+        """Test predictions land in the confusion matrix and failures are counted apart"""
+        labels = np.array([0, 1, 2, 3, 3], dtype=np.uint8)
+        model = Mock()
+        model.infer_pixels.side_effect = [[(0, 0.9), (1, 0.9)], [(2, 0.9), (5, 0.6)], [(None, None)]]
+
+        result = evaluate(model, np.zeros((5, 28, 28), dtype=np.uint8), labels, batch_size=2)
+
+        assert model.infer_pixels.call_count == 3
+        assert result["failed"] == 1
+        assert result["accuracy"] == 0.75
+        assert result["confusion"][3][5] == 1 and result["confusion"][2][2] == 1
+        assert result["recall"][3] == 0.0 and result["recall"][9] is None
+
+    @pytest.mark.integration
+    def test_cli_end_to_end(self, tmp_path, capsys):
+        """Test generating a dataset offline and evaluating it with the real model"""
+        assert main(["--generate", str(tmp_path), "--count", "300"]) == 0
+        report_path = tmp_path / "report.json"
+        argv = ["--images", str(tmp_path / "images-idx3-ubyte"), "--labels", str(tmp_path / "labels-idx1-ubyte")]
+
+        assert main(argv + ["--batch-size", "64", "--limit", "200", "--json", str(report_path)]) == 0
+
+        report = json.loads(report_path.read_text())["fp32"]
+        assert report["samples"] == 200 and report["failed"] == 0
+        assert report["accuracy"] > 0.5
+        assert sum(map(sum, report["confusion"])) == 200
+        assert "true\\pred" in capsys.readouterr().out
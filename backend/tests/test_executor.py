@@ -0,0 +1,71 @@
+"""
+Tests for the bounded inference executor
+"""
+
+import asyncio
+import threading
+
+import pytest
+from serving.executor import BoundedExecutor, ExecutorOverloaded
+
+
+class TestBoundedExecutor:
+    """Test BoundedExecutor admission control"""
+
+    @pytest.mark.unit
+    def test_runs_submitted_work(self):
+        """Test that work runs and the result is returned"""
+        executor = BoundedExecutor(max_workers=2, max_queue=2)
+        try:
+            assert executor.submit(pow, 2, 10).result(timeout=5) == 1024
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.unit
+    def test_rejects_when_backlog_full(self):
+        """Test that submissions beyond workers + queue are rejected"""
+        gate = threading.Event()
+        executor = BoundedExecutor(max_workers=1, max_queue=1)
+        try:
+            running = executor.submit(gate.wait, 5)
+            queued = executor.submit(gate.wait, 5)
+
+            with pytest.raises(ExecutorOverloaded):
+                executor.submit(gate.wait, 5)
+
+            stats = executor.stats()
+            assert stats["in_flight"] == 2
+            assert stats["queued"] == 1
+            assert stats["rejected"] == 1
+
+            gate.set()
+            running.result(timeout=5)
+            queued.result(timeout=5)
+            # Slots are released once work completes
+            assert executor.submit(pow, 3, 2).result(timeout=5) == 9
+        finally:
+            gate.set()
+            executor.shutdown()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_run_from_event_loop(self):
+        """Test awaiting work from async code does not block the loop"""
+        executor = BoundedExecutor(max_workers=1, max_queue=0)
+        try:
+            gate = threading.Event()
+            task = asyncio.ensure_future(executor.run(gate.wait, 5))
+            await asyncio.sleep(0)
+            # The loop is still free while the worker blocks
+            gate.set()
+            assert await task is True
+        finally:
+            executor.shutdown()
+
+    @pytest.mark.unit
+    def test_invalid_configuration(self):
+        """Test configuration validation"""
+        with pytest.raises(ValueError):
+            BoundedExecutor(max_workers=0, max_queue=1)
+        with pytest.raises(ValueError):
+            BoundedExecutor(max_workers=1, max_queue=-1)
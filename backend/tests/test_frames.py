@@ -0,0 +1,119 @@
+"""
+Tests for the length-prefixed frame stream endpoint
+"""
+
+import struct
+from dataclasses import replace
+from unittest.mock import patch
+
+import app as app_module
+import cv2
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from model.synthetic import render_digit
+from serving.frames import FRAMES, encode_frames, parse_frames
+from serving.responses import DIGIT_RECORD, ERROR_DIGIT
+from serving.uploads import UploadTooLarge
+
+
+def frame_stream(images: list[bytes]) -> bytes:
+    return struct.pack("<I", len(images)) + b"".join(struct.pack("<I", len(image)) + image for image in images)
+
+
+def decode_response(body: bytes) -> np.ndarray:
+    (count,) = struct.unpack_from("<I", body)
+    records = np.frombuffer(body, dtype=DIGIT_RECORD, offset=4)
+    assert len(records) == count
+    return records
+
+
+def png(digit: int) -> bytes:
+    _, buffer = cv2.imencode(".png", render_digit(digit, np.random.default_rng(digit)))
+    return buffer.tobytes()
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI app"""
+    return TestClient(app)
+
+
+class TestParseFrames:
+    """Test splitting frame streams"""
+
+    @pytest.mark.unit
+    def test_views_share_the_body(self):
+        """Test every image is a view into the request body, not a copy"""
+        body = frame_stream([b"first", b"", b"third!"])
+        frames = parse_frames(body, max_count=10)
+
+        assert [bytes(frame) for frame in frames] == [b"first", b"", b"third!"]
+        assert all(frame.obj is body for frame in frames)
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "body, message",
+        [
+            (b"\x01\x00", "missing image count"),
+            (struct.pack("<I", 1), "missing length of image 0"),
+            (struct.pack("<II", 1, 10) + b"short", "image 0 needs 10 bytes"),
+            (frame_stream([b"a"]) + b"xx", "2 trailing bytes"),
+        ],
+    )
+    def test_malformed(self, body, message):
+        """Test truncated streams and trailing bytes are rejected"""
+        with pytest.raises(ValueError, match=message):
+            parse_frames(body, max_count=10)
+
+    @pytest.mark.unit
+    def test_too_many_images(self):
+        """Test the image count is checked before any frame is read"""
+        with pytest.raises(UploadTooLarge, match="At most 2 images"):
+            parse_frames(struct.pack("<I", 1_000_000), max_count=2)
+
+    @pytest.mark.unit
+    def test_encode_frames(self):
+        """Test the response carries the count and one record per result"""
+        results = [{"status": "success", "recognized_digit": 3, "model_confidence": 0.5}, {"status": "error"}]
+        body = encode_frames(results)
+
+        assert len(body) == 4 + 2 * DIGIT_RECORD.itemsize
+        assert decode_response(body)["digit"].tolist() == [3, ERROR_DIGIT]
+
+
+class TestFramesEndpoint:
+    """Test /recognize_frames"""
+
+    @pytest.mark.integration
+    def test_recognizes_in_request_order(self, client):
+        """Test digits come back in request order with per-image failures in place"""
+        images = [png(7), b"not an image", png(1)]
+        response = client.post("/recognize_frames", content=frame_stream(images), headers={"Content-Type": FRAMES})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == FRAMES
+        records = decode_response(response.content)
+        assert records["digit"].tolist() == [7, ERROR_DIGIT, 1]
+        assert np.isnan(records["confidence"][1])
+
+    @pytest.mark.api
+    def test_shares_the_batch_pipeline(self, client):
+        """Test valid frames reach MNISTModel's batch path as zero-copy views"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [
+                {"status": "success", "recognized_digit": 4, "model_confidence": 0.9, "filename": "0"}
+            ]
+            response = client.post("/recognize_frames", content=frame_stream([png(4)]))
+
+        assert decode_response(response.content)["digit"].tolist() == [4]
+        ((image, name),) = mock_model.process_and_recognize_batch.call_args[0][0]
+        assert isinstance(image, memoryview) and bytes(image) == png(4) and name == "0"
+
+    @pytest.mark.api
+    def test_errors(self, client):
+        """Test malformed streams answer 400 and oversized ones 413"""
+        assert client.post("/recognize_frames", content=b"\x01").status_code == 400
+        with patch("app.settings", replace(app_module.settings, max_files_per_request=1)):
+            assert client.post("/recognize_frames", content=frame_stream([png(1), png(2)])).status_code == 413
@@ -0,0 +1,103 @@
+"""
+Tests for the persisted optimized-graph cache
+"""
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import onnxruntime as ort
+import pytest
+from model.graph_cache import cache_key, cached_session
+from model.onnx import ONNXModel, SessionConfig
+from model.registry import get_variant, variant_path
+
+MODEL_PATH = variant_path(get_variant("fp32"))
+
+
+def cached_files(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".ort"))
+
+
+class TestGraphCache:
+    """Test building, reusing and invalidating cached graphs"""
+
+    @pytest.mark.unit
+    def test_key_changes_with_level_and_version(self):
+        """Test the key covers optimization level and ORT version"""
+        key = cache_key(MODEL_PATH, "all")
+
+        assert key == cache_key(MODEL_PATH, "all")
+        assert key != cache_key(MODEL_PATH, "basic")
+        with patch("model.graph_cache.ort.__version__", "0.0.0"):
+            assert key != cache_key(MODEL_PATH, "all")
+
+    @pytest.mark.unit
+    def test_miss_then_hit(self, tmp_path):
+        """Test the first start saves the graph and the next one loads it unoptimized"""
+        cache_dir = str(tmp_path)
+        cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+        files = cached_files(cache_dir)
+        assert len(files) == 1
+
+        with patch("model.graph_cache.ort.InferenceSession", wraps=ort.InferenceSession) as spy:
+            session = cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+
+        (path,) = spy.call_args[0]
+        assert os.path.basename(path) == files[0]
+        assert spy.call_args[1]["sess_options"].graph_optimization_level == ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        batch = np.random.rand(3, 1, 28, 28).astype(np.float32)
+        reference = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
+        np.testing.assert_allclose(session.run(None, {"Input3": batch})[0], reference.run(None, {"Input3": batch})[0])
+
+    @pytest.mark.unit
+    def test_key_change_replaces_stale_entry(self, tmp_path):
+        """Test a new key rebuilds the entry and removes the old one"""
+        cache_dir = str(tmp_path)
+        cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+        old = cached_files(cache_dir)
+
+        with patch("model.graph_cache.ort.__version__", "99.0.0"):
+            cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+
+        new = cached_files(cache_dir)
+        assert len(new) == 1
+        assert new != old
+
+    @pytest.mark.unit
+    def test_corrupt_entry_is_rebuilt(self, tmp_path):
+        """Test an unreadable cached graph is replaced"""
+        cache_dir = str(tmp_path)
+        cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+        entry = os.path.join(cache_dir, cached_files(cache_dir)[0])
+        with open(entry, "wb") as f:
+            f.write(b"garbage")
+
+        cached_session(MODEL_PATH, ort.SessionOptions, "all", cache_dir)
+
+        assert os.path.getsize(entry) > 1000
+
+    @pytest.mark.unit
+    def test_unwritable_cache_dir_falls_back(self, tmp_path):
+        """Test the session still opens when the cache dir cannot be created"""
+        blocker = tmp_path / "file"
+        blocker.write_text("not a directory")
+
+        session = cached_session(MODEL_PATH, ort.SessionOptions, "all", str(blocker / "cache"))
+
+        assert session.get_inputs()[0].name == "Input3"
+
+    @pytest.mark.integration
+    def test_onnx_model_uses_cache(self, tmp_path):
+        """Test ONNXModel reads the cache directory from its SessionConfig"""
+        model = ONNXModel(MODEL_PATH, session_config=SessionConfig(graph_cache_dir=str(tmp_path)))
+
+        assert len(cached_files(str(tmp_path))) == 1
+        digit, confidence = model.infer(np.zeros((28, 28), dtype=np.uint8))
+        assert digit is not None
+
+    @pytest.mark.unit
+    def test_unknown_optimization_level(self):
+        """Test an unknown optimization level is rejected"""
+        with pytest.raises(ValueError, match="Unknown optimization level"):
+            SessionConfig(optimization_level="max").build()
@@ -0,0 +1,280 @@
+"""
+Tests for bulk archive jobs: streaming archive reading, the job pipeline and the job API
+"""
+
+import asyncio
+import io
+import json
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from unittest.mock import patch
+
+import app as app_module
+import cv2
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from model.synthetic import render_digit
+from serving.archives import archive_format, count_members, iter_members
+from serving.executor import ExecutorOverloaded
+from serving.jobs import Job, JobManager, stream_results
+
+
+def png(digit: int) -> bytes:
+    _, buffer = cv2.imencode(".png", render_digit(digit, np.random.default_rng(digit)))
+    return buffer.tobytes()
+
+
+def zip_archive(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("digits/", b"")
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def tar_archive(members: dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            archive.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+def spooled(data: bytes):
+    archive = tempfile.TemporaryFile()
+    archive.write(data)
+    return archive
+
+
+def wait_finished(job: Job, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert job.finished
+
+
+def check_prefix(data: bytes) -> None:
+    if not data.startswith(b"img"):
+        raise ValueError("Not an image")
+
+
+def fake_batch(images):
+    return [{"status": "success", "recognized_digit": len(data) % 10, "filename": name} for data, name in images]
+
+
+class TestArchives:
+    """Test streaming iteration over archive members"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("build", [zip_archive, tar_archive])
+    def test_members_in_order(self, build):
+        """Test files come out in archive order, without directories or macOS metadata"""
+        data = build({"digits/a.png": b"a", "__MACOSX/digits/._a.png": b"junk", "digits/b.png": b"bb"})
+        members = list(iter_members(spooled(data), max_bytes=100))
+
+        expected = [("digits/a.png", b"a", None), ("digits/b.png", b"bb", None)]
+        assert [(m.name, m.data, m.error) for m in members] == expected
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("build", [zip_archive, tar_archive])
+    def test_oversized_member(self, build):
+        """Test a member over the limit fails alone and is not read"""
+        members = list(iter_members(spooled(build({"big.png": b"x" * 101, "ok.png": b"y"})), max_bytes=100))
+
+        assert members[0].data is None and "exceeds the limit" in members[0].error
+        assert members[1].data == b"y"
+
+    @pytest.mark.unit
+    def test_format_detection(self):
+        """Test zip and (compressed) tar are told apart from their first bytes"""
+        assert archive_format(zip_archive({"a": b"a"})) == "zip"
+        assert archive_format(tar_archive({"a": b"a"})) == "tar"
+        assert archive_format(b"plain text") is None
+        with pytest.raises(ValueError, match="Unsupported archive"):
+            list(iter_members(spooled(b"plain text"), max_bytes=100))
+
+    @pytest.mark.unit
+    def test_count_members(self):
+        """Test zip totals come from the central directory; tar streams have none"""
+        assert count_members(spooled(zip_archive({"a": b"a", "b": b"b"}))) == 2
+        assert count_members(spooled(tar_archive({"a": b"a"}))) is None
+
+
+class TestJobManager:
+    """Test the background job pipeline"""
+
+    @pytest.mark.unit
+    def test_results_in_archive_order(self):
+        """Test batches keep archive order and failed members are reported in place"""
+        batches = []
+
+        def process(images):
+            batches.append(len(images))
+            return fake_batch(images)
+
+        manager = JobManager(process, check=check_prefix, batch_size=2)
+        job = manager.submit(spooled(zip_archive({"0": b"img0", "1": b"bad", "2": b"img22", "3": b"img333"})))
+        wait_finished(job)
+
+        results = [json.loads(line) for line in job.lines()]
+        assert [r["index"] for r in results] == [0, 1, 2, 3]
+        assert [r["filename"] for r in results] == ["0", "1", "2", "3"]
+        assert results[1]["status"] == "error"
+        assert batches == [1, 2]
+        assert job.status()["state"] == "done"
+        assert job.status()["total"] == 4
+        assert (job.status()["succeeded"], job.status()["failed"]) == (3, 1)
+
+    @pytest.mark.unit
+    def test_yields_to_interactive_requests(self):
+        """Test batches wait while interactive requests are in flight, for a bounded time"""
+        manager = JobManager(fake_batch, busy=lambda: True, max_yield_s=0.05)
+        job = manager.submit(spooled(zip_archive({"a": b"a"})))
+        wait_finished(job)
+
+        assert job.state == "done"
+        assert 0.05 <= manager.stats()["yielded_s"] < 1.0
+
+    @pytest.mark.unit
+    def test_corrupt_archive_fails_job(self):
+        """Test an unreadable archive fails its job with the reason"""
+        manager = JobManager(fake_batch)
+        job = manager.submit(spooled(b"PK\x03\x04 truncated"))
+        wait_finished(job)
+
+        assert job.state == "failed"
+        assert job.status()["error"]
+
+    @pytest.mark.unit
+    def test_cancel_and_overload(self):
+        """Test a full job queue rejects submissions and cancelled jobs stop early"""
+        release = threading.Event()
+
+        def blocked(images):
+            release.wait(5)
+            return fake_batch(images)
+
+        manager = JobManager(blocked, workers=1, queue_size=1, batch_size=1)
+        running = manager.submit(spooled(zip_archive({str(i): b"x" for i in range(5)})))
+        queued = manager.submit(spooled(zip_archive({"a": b"a"})))
+        with pytest.raises(ExecutorOverloaded):
+            manager.submit(spooled(zip_archive({"b": b"b"})))
+
+        running.cancel()
+        queued.cancel()
+        release.set()
+        wait_finished(running)
+        wait_finished(queued)
+
+        assert running.state == "cancelled" and running.status()["processed"] < 5
+        assert queued.state == "cancelled" and queued.status()["processed"] == 0
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_stream_follows_running_job(self):
+        """Test the result stream delivers results as they are added and ends with the job"""
+        job = Job("j")
+        chunks = []
+
+        async def consume():
+            async for chunk in stream_results(job, sse=True):
+                chunks.append(chunk)
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.01)
+        threading.Thread(target=lambda: (job.add([{"status": "success"}]), job.finish("done"))).start()
+        await asyncio.wait_for(task, 2)
+
+        assert chunks[0].startswith(b"id: 0\nevent: result\ndata: ")
+        assert chunks[-1].startswith(b"event: end\ndata: ")
+        assert json.loads(chunks[-1].split(b"data: ", 1)[1])["state"] == "done"
+
+
+class TestJobEndpoints:
+    """Test the bulk job API with the real model"""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.mark.integration
+    def test_submit_poll_and_stream(self, client):
+        """Test an archive is accepted at once and its results stream back as JSON lines"""
+        members = {f"{digit}.png": png(digit) for digit in range(10)}
+        members["notes.txt"] = b"not an image"
+        response = client.post("/jobs", content=tar_archive(members))
+
+        assert response.status_code == 202
+        job_id = response.json()["id"]
+        assert response.headers["Location"] == f"/jobs/{job_id}"
+
+        with client.stream("GET", f"/jobs/{job_id}/results") as stream:
+            assert stream.headers["content-type"] == "application/x-ndjson"
+            results = [json.loads(line) for line in stream.iter_lines() if line]
+
+        assert [r["filename"] for r in results] == list(members)
+        assert sum(r["status"] == "success" for r in results) == 10
+        assert results[-1]["status"] == "error"
+        status = client.get(f"/jobs/{job_id}").json()
+        assert (status["state"], status["processed"], status["succeeded"]) == ("done", 11, 10)
+
+    @pytest.mark.integration
+    def test_spooling_stays_off_the_event_loop(self, client):
+        """Test the uploaded archive is written to disk from worker threads, not the event loop"""
+        on_loop = []
+        temporary_file = tempfile.TemporaryFile
+
+        class RecordingFile:
+            def __init__(self):
+                self.__file = temporary_file()
+
+            def write(self, data):
+                try:
+                    on_loop.append(asyncio.get_running_loop() is not None)
+                except RuntimeError:
+                    on_loop.append(False)
+                return self.__file.write(data)
+
+            def __getattr__(self, name):
+                return getattr(self.__file, name)
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                self.__file.close()
+
+        with patch("tempfile.TemporaryFile", RecordingFile):
+            response = client.post("/jobs", content=zip_archive({f"{d}.png": png(d) for d in range(3)}))
+        wait_finished(app_module.jobs.get(response.json()["id"]))
+
+        assert response.status_code == 202
+        assert on_loop and not any(on_loop)
+
+    @pytest.mark.integration
+    def test_sse_resume(self, client):
+        """Test SSE results resume after Last-Event-ID"""
+        job_id = client.post("/jobs", content=zip_archive({f"{d}.png": png(d) for d in range(3)})).json()["id"]
+
+        headers = {"Accept": "text/event-stream", "Last-Event-ID": "0"}
+        response = client.get(f"/jobs/{job_id}/results", headers=headers)
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert [line for line in response.text.splitlines() if line.startswith("id:")] == ["id: 1", "id: 2"]
+        assert "event: end" in response.text
+
+    @pytest.mark.api
+    def test_errors(self, client):
+        """Test a body that is not an archive and unknown jobs"""
+        assert client.post("/jobs", content=b"just bytes").status_code == 400
+        assert client.get("/jobs/missing").status_code == 404
+        assert client.get("/jobs/missing/results").status_code == 404
+        assert client.delete("/jobs/missing").status_code == 404
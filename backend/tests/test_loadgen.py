@@ -0,0 +1,118 @@
+"""
+Tests for the open-loop load generator and its trace format
+"""
+
+import json
+import os
+
+import httpx
+import pytest
+from app import app
+from benchmarks import loadgen
+from benchmarks.loadgen import Sample, TraceEntry
+
+SAMPLE_TRACE = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "traces", "sample.jsonl")
+
+
+class TestTrace:
+    """Test reading, writing and generating traces"""
+
+    @pytest.mark.unit
+    def test_round_trip(self, tmp_path):
+        """Test a written trace loads back sorted by time"""
+        path = str(tmp_path / "trace.jsonl")
+        entries = [TraceEntry(0.5, "/recognize_pixels", "synthetic:1"), TraceEntry(0.1, "/recognize_digit", "a.png")]
+        loadgen.write_trace(path, entries)
+
+        entries = loadgen.load_trace(path)
+
+        assert [entry.t for entry in entries] == [0.1, 0.5]
+        assert entries[1] == TraceEntry(0.5, "/recognize_pixels", "synthetic:1")
+
+    @pytest.mark.unit
+    def test_unsupported_endpoint(self, tmp_path):
+        """Test a trace line for an unknown endpoint is rejected with its line number"""
+        path = tmp_path / "trace.jsonl"
+        path.write_text(json.dumps({"t": 0, "endpoint": "/nope", "image": "synthetic:1"}) + "\n")
+
+        with pytest.raises(ValueError, match="trace.jsonl:1"):
+            loadgen.load_trace(str(path))
+
+    @pytest.mark.unit
+    def test_sample_trace_is_valid(self):
+        """Test the shipped sample trace parses and covers every endpoint"""
+        entries = loadgen.load_trace(SAMPLE_TRACE)
+
+        assert len(entries) > 10
+        assert {entry.endpoint for entry in entries} == {"/recognize_digit", "/recognize_digits", "/recognize_pixels"}
+
+    @pytest.mark.unit
+    def test_poisson_rate(self):
+        """Test Poisson arrivals are reproducible and close to the target rate"""
+        entries = loadgen.poisson_trace(rps=200, duration=20, seed=1)
+
+        assert entries == loadgen.poisson_trace(rps=200, duration=20, seed=1)
+        assert 3600 < len(entries) < 4400
+        assert all(0 < entry.t < 20 for entry in entries)
+
+    @pytest.mark.unit
+    def test_payloads_are_distinct(self):
+        """Test generated and sample traces never repeat a payload, so caches cannot answer them"""
+        for entries in (loadgen.poisson_trace(rps=100, duration=1, seed=2), loadgen.load_trace(SAMPLE_TRACE)):
+            payloads = {loadgen.load_pixels(entry.image, ".") for entry in entries}
+            assert len(payloads) == len(entries)
+        assert loadgen.load_image("synthetic:3", ".") == loadgen.load_image("synthetic:3", ".")
+
+
+class TestReport:
+    """Test latency accounting"""
+
+    @pytest.mark.unit
+    def test_latency_counts_from_intended_time(self):
+        """Test a request sent late is charged for the wait (no coordinated omission)"""
+        samples = [Sample(intended=0.0, sent=0.0, done=0.01, status=200), Sample(0.1, 0.5, 0.51, 200)]
+
+        summary = loadgen.summarize(samples)
+
+        assert summary["max_ms"] == pytest.approx(410.0)
+        assert summary["max_send_lag_ms"] == pytest.approx(400.0)
+
+    @pytest.mark.unit
+    def test_errors_and_timeline(self):
+        """Test error rates, status counts and per-interval rows"""
+        samples = [
+            Sample(0.2, 0.2, 0.3, 200),
+            Sample(1.1, 1.1, 1.2, 503),
+            Sample(1.5, 1.5, 1.6, 0, "ConnectError"),
+            Sample(2.5, 2.5, 2.6, 200),
+        ]
+
+        summary = loadgen.summarize(samples, interval=1.0)
+
+        assert summary["error_rate"] == 0.5
+        assert summary["statuses"] == {"200": 2, "503": 1, "ConnectError": 1}
+        assert [(row["t"], row["sent"], row["errors"]) for row in summary["timeline"]] == [
+            (0.0, 1, 0),
+            (1.0, 2, 2),
+            (2.0, 1, 0),
+        ]
+        assert summary["timeline"][1]["p50_ms"] is None
+
+
+class TestReplay:
+    """Test replaying against the app"""
+
+    @pytest.mark.integration
+    @pytest.mark.asyncio
+    async def test_replay_every_endpoint(self):
+        """Test one request per endpoint reaches the app and succeeds"""
+        entries = [
+            TraceEntry(0.0, "/recognize_digit", "synthetic:3"),
+            TraceEntry(0.01, "/recognize_digits", "synthetic:4"),
+            TraceEntry(0.02, "/recognize_pixels", "synthetic:5"),
+        ]
+
+        samples = await loadgen.replay("http://test", entries, transport=httpx.ASGITransport(app=app))
+
+        assert [sample.status for sample in samples] == [200, 200, 200]
+        assert all(sample.intended <= sample.sent + 1e-3 for sample in samples)
@@ -0,0 +1,129 @@
+"""
+Tests for the Prometheus metrics and per-stage instrumentation
+"""
+
+import io
+import time
+
+import numpy as np
+import pytest
+from app import app, metrics
+from fastapi.testclient import TestClient
+from PIL import Image
+from serving.metrics import Counter, Histogram, Registry, StatsMetric, outcome
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def sample_lines(text: str, prefix: str) -> dict[str, float]:
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(prefix)
+    }
+
+
+class TestMetricPrimitives:
+    """Test counters, histograms and the text exposition"""
+
+    @pytest.mark.unit
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket counts accumulate and +Inf equals the count"""
+        histogram = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0), labelnames=("stage",))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "decode")
+
+        samples = sample_lines("\n".join(histogram.samples()), "latency_seconds")
+
+        assert samples['latency_seconds_bucket{stage="decode",le="0.1"}'] == 2
+        assert samples['latency_seconds_bucket{stage="decode",le="1.0"}'] == 3
+        assert samples['latency_seconds_bucket{stage="decode",le="+Inf"}'] == 4
+        assert samples['latency_seconds_count{stage="decode"}'] == 4
+        assert samples['latency_seconds_sum{stage="decode"}'] == pytest.approx(3.65)
+        assert histogram.count("decode") == 4
+
+    @pytest.mark.unit
+    def test_registry_render(self):
+        """Test HELP/TYPE headers, label escaping and scrape-time metrics"""
+        registry = Registry()
+        counter = registry.register(Counter("requests_total", "Requests", labelnames=("endpoint",)))
+        registry.register(StatsMetric("queue_depth", "Queue", lambda: 3))
+        registry.register(StatsMetric("cache_hits_total", "Hits", lambda: {"result": 7}, "cache", "counter"))
+        counter.inc('/a"b')
+
+        text = registry.render()
+
+        assert "# HELP requests_total Requests\n# TYPE requests_total counter\n" in text
+        assert 'requests_total{endpoint="/a\\"b"} 1' in text
+        assert "queue_depth 3" in text
+        assert "# TYPE cache_hits_total counter" in text
+        assert 'cache_hits_total{cache="result"} 7' in text
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "status,expected", [(200, "success"), (400, "client_error"), (503, "overloaded"), (500, "server_error")]
+    )
+    def test_outcome(self, status, expected):
+        """Test status codes map to request outcomes"""
+        assert outcome(status) == expected
+
+    @pytest.mark.performance
+    def test_observation_overhead(self):
+        """Test one histogram observation costs only a few microseconds"""
+        histogram = Histogram("overhead_seconds", "Overhead", labelnames=("stage",))
+        runs = 100_000
+        start = time.perf_counter()
+        for _ in range(runs):
+            histogram.observe(0.0003, "inference")
+        per_call = (time.perf_counter() - start) / runs
+
+        assert per_call < 5e-6
+
+
+class TestMetricsEndpoint:
+    """Test /metrics on the real app"""
+
+    @pytest.mark.integration
+    def test_stages_and_requests_are_recorded(self, client):
+        """Test one recognition fills every stage histogram and the request metrics"""
+        pixels = np.random.default_rng().integers(0, 256, (40, 40), dtype=np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="PNG")
+        before = {stage: metrics.stage_seconds.count(stage) for stage in ("decode", "inference", "serialize")}
+
+        response = client.post("/recognize_digit", files={"image_file": ("x.png", buffer.getvalue(), "image/png")})
+        assert response.status_code == 200
+
+        for stage, count in before.items():
+            assert metrics.stage_seconds.count(stage) > count
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        text = response.text
+        for stage in ("parse", "decode", "preprocess", "inference", "postprocess", "serialize"):
+            assert f'mnist_stage_seconds_count{{stage="{stage}"}}' in text
+        assert 'mnist_requests_total{endpoint="/recognize_digit",outcome="success"}' in text
+        assert 'mnist_request_bytes_count{endpoint="/recognize_digit"}' in text
+        assert "mnist_requests_in_flight 1" in text
+        assert "mnist_executor_queued 0" in text
+        assert 'mnist_cache_hits_total{cache="result"}' in text
+
+    @pytest.mark.api
+    def test_unknown_paths_share_a_label(self, client):
+        """Test 404s are counted under one endpoint label"""
+        client.get("/no/such/path")
+
+        assert metrics.requests.value("other", "client_error") >= 1
+        assert 'endpoint="/no/such/path"' not in client.get("/metrics").text
+
+    @pytest.mark.api
+    def test_parameterized_routes_use_their_template(self, client):
+        """Test requests to a path-parameter route are labelled by the route, not the URL"""
+        client.get("/jobs/first")
+        client.get("/jobs/second/results")
+
+        assert metrics.requests.value("/jobs/{job_id}", "client_error") >= 1
+        assert metrics.requests.value("/jobs/{job_id}/results", "client_error") >= 1
+        assert 'endpoint="/jobs/first"' not in client.get("/metrics").text
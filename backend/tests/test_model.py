@@ -8,6 +8,7 @@ from unittest.mock import MagicMock, Mock, patch
 import cv2
 import numpy as np
 import pytest
+from model.cache import LRUCache
 from model.model import MNISTModel
 from model.onnx import ONNXModel
 from PIL import Image
@@ -45,7 +46,14 @@ class TestMNISTModel:
             mock_onnx_class.return_value = mock_onnx_model
             model = MNISTModel()
             assert model is not None
-            mock_onnx_class.assert_called_once_with("mnist-12.onnx")
+            mock_onnx_class.assert_called_once_with(
+                "mnist-12-batched.onnx",
+                max_batch_size=32,
+                max_wait_ms=2.0,
+                session_config=None,
+                tensor_cache=None,
+                stage_timer=None,
+            )
 
     @pytest.mark.unit
     def test_recognize_digit_success(self, mnist_model):
@@ -120,6 +128,76 @@ class TestMNISTModel:
             with pytest.raises(ValueError, match="Could not decode image"):
                 mnist_model.process_and_recognize(img_bytes.getvalue(), "test.png")
 
+    @pytest.mark.unit
+    def test_process_and_recognize_batch(self, mock_onnx_model, sample_image_bytes):
+        """Test batched processing keeps order and reports per-item errors"""
+        mock_onnx_model.infer_batch.return_value = [(1, 0.9), (None, None)]
+
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value = mock_onnx_model
+            model = MNISTModel()
+
+            results = model.process_and_recognize_batch(
+                [(sample_image_bytes, "a.png"), (b"not an image", "b.png"), (sample_image_bytes, "c.png")]
+            )
+
+        assert [r["filename"] for r in results] == ["a.png", "b.png", "c.png"]
+        assert results[0] == {"status": "success", "recognized_digit": 1, "model_confidence": 0.9, "filename": "a.png"}
+        assert results[1]["status"] == "error"
+        assert "Could not decode image" in results[1]["error"]
+        assert results[2]["status"] == "error"
+        assert "Model inference error" in results[2]["error"]
+        # Undecodable images never reach the model
+        assert len(mock_onnx_model.infer_batch.call_args[0][0]) == 2
+
+    @pytest.mark.unit
+    def test_result_cache_skips_decode_and_inference(self, mock_onnx_model, sample_image_bytes):
+        """Test repeated images are answered from the result cache"""
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value = mock_onnx_model
+            model = MNISTModel(result_cache=LRUCache(max_entries=10))
+
+            first = model.process_and_recognize(sample_image_bytes, "first.png")
+            with patch("cv2.imdecode") as mock_imdecode:
+                second = model.process_and_recognize(sample_image_bytes, "second.png")
+                mock_imdecode.assert_not_called()
+
+        assert mock_onnx_model.infer.call_count == 1
+        assert second == {**first, "filename": "second.png"}
+        assert model.cache_stats()["result"]["hits"] == 1
+
+    @pytest.mark.unit
+    def test_result_cache_in_batch(self, mock_onnx_model, sample_image_bytes):
+        """Test batched processing only sends cache misses to the model"""
+        mock_onnx_model.infer_batch.side_effect = lambda images, fill_cache=True: [(4, 0.8)] * len(images)
+
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value = mock_onnx_model
+            model = MNISTModel(result_cache=LRUCache(max_entries=10))
+
+            model.process_and_recognize(sample_image_bytes, "warm.png")
+            other = io.BytesIO()
+            Image.new("L", (28, 28), color=10).save(other, format="PNG")
+            results = model.process_and_recognize_batch([(sample_image_bytes, "a.png"), (other.getvalue(), "b.png")])
+
+        assert [r["recognized_digit"] for r in results] == [5, 4]
+        assert len(mock_onnx_model.infer_batch.call_args[0][0]) == 1
+
+    @pytest.mark.unit
+    def test_failures_are_not_cached(self, mock_onnx_model, sample_image_bytes):
+        """Test that failed inferences are retried rather than cached"""
+        mock_onnx_model.infer.return_value = (None, None)
+
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value = mock_onnx_model
+            model = MNISTModel(result_cache=LRUCache(max_entries=10))
+
+            for _ in range(2):
+                with pytest.raises(ValueError):
+                    model.process_and_recognize(sample_image_bytes, "test.png")
+
+        assert mock_onnx_model.infer.call_count == 2
+
 
 class TestONNXModel:
     """Test the ONNXModel class"""
@@ -195,6 +273,41 @@ class TestONNXModel:
         with pytest.raises(ValueError, match="Empty image is none"):
             onnx_model._ONNXModel__preprocess(None)
 
+    @pytest.mark.unit
+    def test_preprocess_batch_matches_single(self, onnx_model):
+        """Test vectorized preprocessing is identical to per-image preprocessing"""
+        images = [
+            np.random.randint(0, 255, (28, 28), dtype=np.uint8),
+            np.random.randint(0, 255, (64, 40, 3), dtype=np.uint8),
+            np.random.randint(0, 255, (14, 14), dtype=np.uint8),
+        ]
+
+        batch = onnx_model.preprocess_batch(images)
+
+        assert batch.shape == (3, 1, 28, 28)
+        assert batch.dtype == np.float32
+        expected = np.concatenate([onnx_model._ONNXModel__preprocess(image) for image in images])
+        np.testing.assert_array_equal(batch, expected)
+
+    @pytest.mark.unit
+    def test_infer_batch_fixed_batch_axis(self, onnx_model, mock_session):
+        """Test batched inference runs one chunk per fixed-size batch"""
+        images = [np.random.randint(0, 255, (28, 28), dtype=np.uint8) for _ in range(3)]
+
+        results = onnx_model.infer_batch(images)
+
+        assert [digit for digit, _ in results] == [5, 5, 5]
+        assert mock_session.run.call_count == 3
+
+    @pytest.mark.unit
+    def test_infer_batch_failure(self, onnx_model, mock_session):
+        """Test batched inference failure"""
+        mock_session.run.side_effect = Exception("ONNX error")
+
+        results = onnx_model.infer_batch([np.zeros((28, 28), dtype=np.uint8)] * 2)
+
+        assert results == [(None, None), (None, None)]
+
     @pytest.mark.unit
     def test_infer_success(self, onnx_model):
         """Test successful inference"""
@@ -0,0 +1,132 @@
+"""
+Tests for raw pixel payload parsing and the raw tensor endpoint
+"""
+
+import io
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from model.onnx import ONNXModel
+from serving.pixels import parse_pixels
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI app"""
+    return TestClient(app)
+
+
+def to_npy(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array)
+    return buffer.getvalue()
+
+
+class TestParsePixels:
+    """Test decoding of .npy and shape-annotated raw payloads"""
+
+    @pytest.mark.unit
+    def test_raw_bytes_with_shape(self):
+        """Test bare bytes are wrapped without copying"""
+        crops = np.arange(2 * 28 * 28, dtype=np.uint32).astype(np.uint8).reshape(2, 28, 28)
+        body = crops.tobytes()
+
+        pixels = parse_pixels(body, "2,28,28")
+
+        np.testing.assert_array_equal(pixels, crops)
+        assert not pixels.flags.owndata
+        assert np.shares_memory(pixels, np.frombuffer(body, np.uint8))
+
+    @pytest.mark.unit
+    def test_single_crop_gets_batch_axis(self):
+        """Test an (H,W) payload becomes (1,H,W)"""
+        assert parse_pixels(bytes(28 * 28), "28x28").shape == (1, 28, 28)
+
+    @pytest.mark.unit
+    def test_npy(self):
+        """Test .npy payloads are detected by magic bytes"""
+        crops = np.random.randint(0, 255, (3, 28, 28), dtype=np.uint8)
+
+        pixels = parse_pixels(to_npy(crops))
+
+        np.testing.assert_array_equal(pixels, crops)
+        assert not pixels.flags.owndata
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "body,shape,message",
+        [
+            (bytes(10), None, "X-Tensor-Shape header is required"),
+            (bytes(10), "a,b", "Invalid tensor shape"),
+            (bytes(10), "2,28,28", "needs 1568"),
+            (bytes(16), "2,2,2,2", "Expected shape"),
+            (to_npy(np.zeros((28, 28), dtype=np.float32)), None, "must be uint8"),
+            (to_npy(np.asfortranarray(np.zeros((2, 28, 28), dtype=np.uint8))), None, "Fortran-ordered"),
+            (to_npy(np.zeros((28, 28), dtype=np.uint8)).replace(b"(28, 28)", b"(28.,28)"), None, "must be integers"),
+            (to_npy(np.zeros((28, 28), dtype=np.uint8)).replace(b"(28, 28)", b"(True,1)"), None, "must be integers"),
+        ],
+    )
+    def test_invalid_payloads(self, body, shape, message):
+        """Test invalid payloads raise ValueError"""
+        with pytest.raises(ValueError, match=message):
+            parse_pixels(body, shape)
+
+
+class TestInferPixels:
+    """Test ONNXModel.infer_pixels"""
+
+    @pytest.mark.integration
+    def test_matches_image_path(self):
+        """Test raw pixels give the same answers as decoded images"""
+        model = ONNXModel("mnist-12-batched.onnx")
+        crops = np.random.randint(0, 255, (4, 28, 28), dtype=np.uint8)
+
+        assert model.infer_pixels(crops) == model.infer_batch(list(crops))
+
+    @pytest.mark.integration
+    def test_other_sizes_are_resized(self):
+        """Test crops not matching the model input are preprocessed"""
+        model = ONNXModel("mnist-12-batched.onnx")
+        crops = np.random.randint(0, 255, (2, 56, 56), dtype=np.uint8)
+
+        assert model.infer_pixels(crops) == model.infer_batch(list(crops))
+
+
+class TestRecognizePixelsEndpoint:
+    """Test the raw tensor endpoint"""
+
+    @pytest.mark.api
+    def test_raw_payload(self, client):
+        """Test a shape-annotated octet-stream payload"""
+        crops = np.zeros((2, 28, 28), dtype=np.uint8)
+        with patch("app.model") as mock_model:
+            mock_model.recognize_pixels.return_value = [{"status": "success", "index": i} for i in range(2)]
+            response = client.post(
+                "/recognize_pixels",
+                content=crops.tobytes(),
+                headers={"Content-Type": "application/octet-stream", "X-Tensor-Shape": "2,28,28"},
+            )
+
+            assert response.status_code == 200
+            assert len(response.json()["results"]) == 2
+            assert mock_model.recognize_pixels.call_args[0][0].shape == (2, 28, 28)
+
+    @pytest.mark.api
+    def test_invalid_payload(self, client):
+        """Test a malformed payload is rejected with 400"""
+        response = client.post("/recognize_pixels", content=b"abc", headers={"X-Tensor-Shape": "28,28"})
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_npy_real_model(self, client):
+        """Test an .npy payload end to end with the real model"""
+        crops = np.random.randint(0, 255, (3, 28, 28), dtype=np.uint8)
+        response = client.post("/recognize_pixels", content=to_npy(crops))
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert all(r["status"] == "success" for r in results)
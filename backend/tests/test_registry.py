@@ -0,0 +1,69 @@
+"""
+Tests for the model registry and the INT8 model variant
+"""
+
+import os
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from model.model import MNISTModel
+from model.onnx import ONNXModel
+from model.registry import MODELS, get_variant, variant_path
+from model.synthetic import render_digits
+
+
+class TestRegistry:
+    """Test model variant lookup"""
+
+    @pytest.mark.unit
+    def test_registered_variants_exist(self):
+        """Test every registered variant ships its ONNX file"""
+        for variant in MODELS.values():
+            assert os.path.exists(variant_path(variant)), variant.name
+
+    @pytest.mark.unit
+    def test_unknown_variant(self):
+        """Test an unknown variant name is rejected"""
+        with pytest.raises(ValueError, match="Unknown model variant 'fp16'"):
+            get_variant("fp16")
+
+    @pytest.mark.unit
+    def test_mnist_model_selects_variant(self):
+        """Test MNISTModel loads the configured variant"""
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value = Mock()
+            MNISTModel(model_variant="int8")
+
+        assert mock_onnx_class.call_args[0][0] == "mnist-12-int8.onnx"
+
+
+class TestInt8Variant:
+    """Test the quantized model against fp32"""
+
+    @pytest.mark.integration
+    def test_int8_agrees_with_fp32(self):
+        """Test INT8 predictions match fp32 on nearly all synthetic digits"""
+        images, labels = render_digits(300, seed=3)
+        fp32 = ONNXModel(get_variant("fp32").path)
+        int8 = ONNXModel(get_variant("int8").path)
+
+        fp32_digits = np.array([digit for digit, _ in fp32.infer_pixels(images)])
+        int8_digits = np.array([digit for digit, _ in int8.infer_pixels(images)])
+
+        assert (fp32_digits == int8_digits).mean() >= 0.98
+        assert (int8_digits == labels).mean() >= 0.8
+
+
+class TestSyntheticDigits:
+    """Test the offline digit generator"""
+
+    @pytest.mark.unit
+    def test_shapes_and_balance(self):
+        """Test images are MNIST-shaped and labels balanced and reproducible"""
+        images, labels = render_digits(50, seed=7)
+
+        assert images.shape == (50, 28, 28)
+        assert images.dtype == np.uint8
+        assert np.bincount(labels, minlength=10).tolist() == [5] * 10
+        np.testing.assert_array_equal(images, render_digits(50, seed=7)[0])
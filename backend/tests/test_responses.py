@@ -0,0 +1,154 @@
+"""
+Tests for response encodings: orjson JSON, MessagePack and compact binary digit records
+"""
+
+import json
+from unittest.mock import patch
+
+import cv2
+import msgpack
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from serving import responses
+from serving.responses import DIGIT_RECORD, DIGITS, ERROR_DIGIT, JSON, MSGPACK
+
+BATCH = {
+    "results": [
+        {"status": "success", "recognized_digit": 1, "model_confidence": 0.9, "filename": "a.png"},
+        {"status": "error", "error": "File must be an image", "filename": "b.txt"},
+        {"status": "success", "recognized_digit": 7, "model_confidence": 0.5, "filename": "c.png"},
+    ]
+}
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI app"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def image_files():
+    """Two PNG uploads around one rejected non-image"""
+    _, buffer = cv2.imencode(".png", np.full((28, 28), 128, dtype=np.uint8))
+    return [
+        ("image_files", ("a.png", buffer.tobytes(), "image/png")),
+        ("image_files", ("b.txt", b"not an image", "text/plain")),
+        ("image_files", ("c.png", buffer.tobytes(), "image/png")),
+    ]
+
+
+class TestNegotiate:
+    """Test choosing the response media type from the Accept header"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "accept, expected",
+        [
+            (None, JSON),
+            ("*/*", JSON),
+            ("text/html", JSON),
+            (DIGITS, DIGITS),
+            (f"application/json, {DIGITS}", JSON),
+            (f"application/json;q=0.5, {DIGITS}", DIGITS),
+            (f"{DIGITS};q=0", JSON),
+            (f"text/html, {DIGITS};q=0.2, */*;q=0.1", DIGITS),
+        ],
+    )
+    def test_preference_order(self, accept, expected):
+        """Test q-values rank offers, ties keep header order and unsupported types fall back to JSON"""
+        assert responses.negotiate(accept) == expected
+
+    @pytest.mark.unit
+    def test_msgpack_only_when_installed(self):
+        """Test MessagePack is offered only with msgpack installed"""
+        responses.negotiate.cache_clear()
+        try:
+            with patch.object(responses, "msgpack", None):
+                assert responses.negotiate("application/x-msgpack") == JSON
+            responses.negotiate.cache_clear()
+            with patch.object(responses, "msgpack", object()):
+                assert responses.negotiate("application/x-msgpack") == MSGPACK
+        finally:
+            responses.negotiate.cache_clear()
+
+
+class TestEncodings:
+    """Test the encoded bodies"""
+
+    @pytest.mark.unit
+    def test_dumps_matches_json(self):
+        """Test the fast encoder produces the same document as the standard library"""
+        content = {"status": "success", "recognized_digit": 3, "model_confidence": 0.1234, "box": [1, 2, 3, 4]}
+        assert json.loads(responses.dumps(content)) == content
+
+    @pytest.mark.unit
+    def test_digit_records(self):
+        """Test batch, number and single-digit responses map to one record per digit"""
+        batch = responses.digit_records(BATCH)
+        assert batch["digit"].tolist() == [1, ERROR_DIGIT, 7]
+        assert np.isnan(batch["confidence"][1])
+        assert batch["confidence"][[0, 2]].tolist() == pytest.approx([0.9, 0.5], abs=1e-3)
+
+        digits = [{"digit": 4, "confidence": 0.8}, {"digit": 2, "confidence": 1.0}]
+        number = responses.digit_records({"number": "42", "digits": digits})
+        assert number["digit"].tolist() == [4, 2]
+
+        single = responses.digit_records({"status": "success", "recognized_digit": 5, "model_confidence": 0.95})
+        assert single.tobytes() == np.array([(5, 0.95)], dtype=DIGIT_RECORD).tobytes()
+        assert DIGIT_RECORD.itemsize == 3
+
+
+class TestNegotiatedEndpoints:
+    """Test recognition endpoints answer in the requested format"""
+
+    @pytest.mark.api
+    def test_binary_digits(self, client, image_files):
+        """Test the compact binary layout decodes with DIGIT_RECORD"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [BATCH["results"][0], BATCH["results"][2]]
+            response = client.post("/recognize_digits", files=image_files, headers={"Accept": DIGITS})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == DIGITS
+        assert response.headers["vary"] == "Accept"
+        records = np.frombuffer(response.content, dtype=DIGIT_RECORD)
+        assert records["digit"].tolist() == [1, ERROR_DIGIT, 7]
+
+    @pytest.mark.api
+    def test_json_by_default(self, client, image_files):
+        """Test clients without an Accept preference still get the JSON document"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [BATCH["results"][0], BATCH["results"][2]]
+            response = client.post("/recognize_digits", files=image_files)
+
+        assert response.headers["content-type"] == JSON
+        assert response.json() == BATCH
+
+    @pytest.mark.api
+    def test_msgpack(self, client, image_files):
+        """Test MessagePack carries the same document as JSON"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [BATCH["results"][0], BATCH["results"][2]]
+            response = client.post("/recognize_digits", files=image_files, headers={"Accept": MSGPACK})
+
+        assert response.headers["content-type"] == MSGPACK
+        assert msgpack.unpackb(response.content) == BATCH
+
+    @pytest.mark.api
+    def test_msgpack_falls_back_to_json_without_msgpack(self, client, image_files):
+        """Test a MessagePack request is answered as JSON, not an error, when msgpack is missing"""
+        responses.negotiate.cache_clear()
+        try:
+            with patch.object(responses, "msgpack", None), patch("app.model") as mock_model:
+                mock_model.process_and_recognize_batch.return_value = [BATCH["results"][0], BATCH["results"][2]]
+                response = client.post("/recognize_digits", files=image_files, headers={"Accept": MSGPACK})
+        finally:
+            responses.negotiate.cache_clear()
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == JSON
+        assert response.headers["vary"] == "Accept"
+        assert response.json() == BATCH
@@ -0,0 +1,174 @@
+"""
+Tests for multi-digit segmentation and number recognition
+"""
+
+from unittest.mock import Mock, patch
+
+import cv2
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from model.model import MNISTModel
+from model.segment import segment_digits
+from model.synthetic import render_digit
+
+
+def number_image(digits: str, tile: int = 80, pad: int = 30, dark_on_light: bool = True) -> np.ndarray:
+    """Digits rendered side by side, as on a scanned amount or ID"""
+    rng = np.random.default_rng(0)
+    tiles = [cv2.resize(render_digit(int(d), rng), (tile, tile)) for d in digits]
+    image = np.hstack([np.pad(t, ((pad, pad), (pad // 3, pad // 3))) for t in tiles])
+    return 255 - image if dark_on_light else image
+
+
+def png(image: np.ndarray) -> bytes:
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def crop_top(image: np.ndarray) -> int:
+    """First row with ink on a dark-on-light image"""
+    return int(np.flatnonzero((image < 128).any(axis=1))[0])
+
+
+class TestSegmentation:
+    """Test splitting an image into digit crops"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("dark_on_light", [True, False])
+    def test_digits_left_to_right(self, dark_on_light):
+        """Test every digit becomes one MNIST-style crop, in reading order, for both polarities"""
+        crops, boxes = segment_digits(number_image("31415", dark_on_light=dark_on_light))
+
+        assert crops.shape == (5, 28, 28)
+        assert crops.dtype == np.uint8
+        assert [x for x, _, _, _ in boxes] == sorted(x for x, _, _, _ in boxes)
+        # White strokes centred on black, inside the 20x20 box
+        assert crops[:, :4].max() == 0 and crops[:, -4:].max() == 0
+        assert all(crop.max() == 255 for crop in crops)
+
+    @pytest.mark.unit
+    def test_noise_is_ignored_and_broken_strokes_merge(self):
+        """Test specks are dropped and pieces stacked in the same columns form one digit"""
+        image = np.full((120, 200), 255, dtype=np.uint8)
+        cv2.rectangle(image, (20, 20), (30, 100), 0, -1)  # "1"
+        cv2.rectangle(image, (80, 20), (120, 55), 0, -1)  # upper and lower half of one glyph
+        cv2.rectangle(image, (80, 65), (120, 100), 0, -1)
+        image[5:7, 180:182] = 0  # speck
+
+        crops, boxes = segment_digits(image)
+
+        assert len(crops) == 2
+        assert boxes[1] == (80, 20, 41, 81)
+
+    @pytest.mark.unit
+    def test_blank_image(self):
+        """Test an empty image yields no crops"""
+        crops, boxes = segment_digits(np.full((50, 50), 255, dtype=np.uint8))
+
+        assert crops.shape == (0, 28, 28)
+        assert boxes == []
+
+    @pytest.mark.unit
+    def test_no_component_passes_both_filters(self):
+        """Test an underline plus a thin rule, neither digit-like, yields no crops"""
+        image = np.full((400, 600), 255, dtype=np.uint8)
+        image[300:310, 10:590] = 0
+        image[5:290, 20:21] = 0
+
+        crops, boxes = segment_digits(image)
+
+        assert crops.shape == (0, 28, 28)
+        assert boxes == []
+
+
+class TestNumberRecognition:
+    """Test MNISTModel.recognize_number"""
+
+    @pytest.mark.integration
+    def test_recognize_number(self):
+        """Test a rendered number is read back with per-digit confidences and boxes"""
+        model = MNISTModel(result_cache=None, tensor_cache=None)
+
+        result = model.recognize_number(png(number_image("31415")), "amount.png")
+
+        assert result["status"] == "success"
+        assert result["recognized_number"] == "31415"
+        assert len(result["digits"]) == 5
+        assert result["model_confidence"] == min(d["confidence"] for d in result["digits"])
+        assert result["digits"][0]["box"][0] == pytest.approx(10 + 80 * 0.1, abs=12)
+
+    @pytest.mark.unit
+    def test_single_batched_inference(self):
+        """Test all digits go to the model in one call"""
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value.infer_pixels.side_effect = lambda crops: [(7, 0.9)] * len(crops)
+            model = MNISTModel()
+
+            result = model.recognize_number(png(number_image("1234567890")), "id.png")
+
+        mock_onnx_class.return_value.infer_pixels.assert_called_once()
+        assert result["recognized_number"] == "7" * 10
+
+    @pytest.mark.unit
+    def test_boxes_in_source_pixels_after_reduced_decode(self):
+        """Test boxes are scaled back when the decoder downscaled a large upload"""
+        with patch("model.model.ONNX") as mock_onnx_class:
+            mock_onnx_class.return_value.infer_pixels.side_effect = lambda crops: [(1, 0.9)] * len(crops)
+            model = MNISTModel()
+            image = number_image("12", tile=400, pad=150)
+
+            result = model.recognize_number(png(image), "big.png")
+
+        x, y, w, h = result["digits"][1]["box"]
+        assert x + w <= image.shape[1] and y + h <= image.shape[0]
+        assert y == pytest.approx(crop_top(image), abs=4)
+
+    @pytest.mark.unit
+    def test_blank_image_is_an_error(self):
+        """Test an image without digits raises ValueError"""
+        with patch("model.model.ONNX"):
+            model = MNISTModel()
+            with pytest.raises(ValueError, match="No digits found"):
+                model.recognize_number(png(np.full((40, 80), 255, dtype=np.uint8)), "blank.png")
+
+    @pytest.mark.unit
+    def test_only_lines_is_an_error(self):
+        """Test an image whose strokes are all filtered out takes the no-digits path"""
+        image = np.full((400, 600), 255, dtype=np.uint8)
+        image[300:310, 10:590] = 0
+        image[5:290, 20:21] = 0
+        with patch("model.model.ONNX"):
+            model = MNISTModel()
+            with pytest.raises(ValueError, match="No digits found"):
+                model.recognize_number(png(image), "lines.png")
+
+
+class TestNumberEndpoint:
+    """Test /recognize_number"""
+
+    @pytest.mark.api
+    def test_recognize_number_endpoint(self):
+        """Test the endpoint returns the model result"""
+        client = TestClient(app)
+        with patch("app.model") as mock_model:
+            mock_model.recognize_number.return_value = {"status": "success", "recognized_number": "42", "digits": []}
+            files = {"image_file": ("n.png", png(number_image("42")), "image/png")}
+
+            response = client.post("/recognize_number", files=files)
+
+        assert response.status_code == 200
+        assert response.json()["recognized_number"] == "42"
+
+    @pytest.mark.api
+    def test_recognize_number_errors(self):
+        """Test a non-image and an image without digits are client errors"""
+        client = TestClient(app)
+
+        response = client.post("/recognize_number", files={"image_file": ("a.txt", b"text", "text/plain")})
+        assert response.status_code == 400
+
+        files = {"image_file": ("blank.png", png(np.full((40, 80), 255, dtype=np.uint8)), "image/png")}
+        response = client.post("/recognize_number", files=files)
+        assert response.status_code == 400
+        assert "No digits found" in response.json()["detail"]
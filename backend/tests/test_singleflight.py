@@ -0,0 +1,138 @@
+"""
+Tests for single-flight coalescing of identical in-flight recognitions
+"""
+
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+import pytest
+from model.cache import LRUCache
+from model.model import MNISTModel
+from model.singleflight import SingleFlight
+from PIL import Image
+from serving.metrics import ServiceMetrics
+
+
+def png(color: int = 128) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("L", (28, 28), color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def blocked_onnx(release: threading.Event, started: threading.Event) -> Mock:
+    """An ONNX mock whose inference waits for `release`"""
+
+    def infer(image):
+        started.set()
+        release.wait(5)
+        return 3, 0.75
+
+    onnx = Mock()
+    onnx.infer.side_effect = infer
+    return onnx
+
+
+def wait_coalesced(stats, count: int) -> None:
+    """Wait until `count` callers have joined an in-flight computation"""
+    deadline = time.monotonic() + 5
+    while stats().get("coalesced", 0) < count and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert stats()["coalesced"] == count
+
+
+class TestSingleFlight:
+    """Test sharing in-flight computations"""
+
+    @pytest.mark.unit
+    def test_concurrent_callers_share_one_computation(self):
+        """Test callers of a running key wait for the leader instead of computing again"""
+        flight = SingleFlight()
+        release, calls = threading.Event(), []
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return "result"
+
+        with ThreadPoolExecutor(4) as pool:
+            futures = [pool.submit(flight.run, "key", compute) for _ in range(4)]
+            wait_coalesced(flight.stats, 3)
+            release.set()
+            assert [future.result() for future in futures] == ["result"] * 4
+
+        assert len(calls) == 1
+        assert flight.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 3}
+
+    @pytest.mark.unit
+    def test_exception_is_shared_and_not_kept(self):
+        """Test waiters get the leader's exception and the next call computes afresh"""
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ValueError("boom")
+
+        with ThreadPoolExecutor(2) as pool:
+            futures = [pool.submit(flight.run, "key", fail) for _ in range(2)]
+            wait_coalesced(flight.stats, 1)
+            release.set()
+            for future in futures:
+                with pytest.raises(ValueError, match="boom"):
+                    future.result()
+
+        assert flight.run("key", lambda: "retried") == "retried"
+
+    @pytest.mark.unit
+    def test_different_keys_run_independently(self):
+        """Test only identical keys are coalesced"""
+        flight = SingleFlight()
+        assert [flight.run(key, lambda key=key: key * 2) for key in (1, 2)] == [2, 4]
+        assert flight.stats()["coalesced"] == 0
+
+
+class TestModelCoalescing:
+    """Test MNISTModel shares recognitions of identical uploads in flight"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize("result_cache", [None, LRUCache(max_entries=10)])
+    def test_identical_uploads_decode_and_infer_once(self, result_cache):
+        """Test coalescing covers the window before any cached result exists"""
+        release, started = threading.Event(), threading.Event()
+        onnx = blocked_onnx(release, started)
+        with patch("model.model.ONNX", return_value=onnx):
+            model = MNISTModel(result_cache=result_cache)
+
+        with ThreadPoolExecutor(3) as pool:
+            futures = [pool.submit(model.process_and_recognize, png(), f"{i}.png") for i in range(3)]
+            started.wait(5)
+            wait_coalesced(model.coalesce_stats, 2)
+            release.set()
+            results = [future.result() for future in futures]
+
+        assert onnx.infer.call_count == 1
+        assert [r["filename"] for r in results] == ["0.png", "1.png", "2.png"]
+        assert {r["recognized_digit"] for r in results} == {3}
+        assert model.coalesce_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 2}
+
+    @pytest.mark.unit
+    def test_disabled(self):
+        """Test coalescing can be turned off"""
+        with patch("model.model.ONNX", return_value=Mock(infer=Mock(return_value=(1, 0.5)))):
+            model = MNISTModel(coalesce=False)
+
+        assert model.process_and_recognize(png(), "a.png")["recognized_digit"] == 1
+        assert model.coalesce_stats() == {}
+
+    @pytest.mark.unit
+    def test_exported_metrics(self):
+        """Test coalesced requests are exported to Prometheus"""
+        stats = {"in_flight": 1, "leaders": 4, "coalesced": 7}
+        metrics = ServiceMetrics(dict, dict, dict, lambda: stats)
+
+        text = metrics.render()
+        assert "mnist_coalesced_total 7" in text
+        assert "mnist_coalesce_in_flight 1" in text
@@ -0,0 +1,159 @@
+"""
+Tests for the websocket streaming recognition endpoint
+"""
+
+import asyncio
+import base64
+import io
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from PIL import Image
+from serving.streaming import LatestSlot, frame_bytes
+
+
+@pytest.fixture
+def client():
+    """Create a test client for the FastAPI app"""
+    return TestClient(app)
+
+
+@pytest.fixture
+def sample_image_bytes():
+    """Create a sample image for testing"""
+    img = Image.new("L", (28, 28), color=128)
+    img_bytes = io.BytesIO()
+    img.save(img_bytes, format="PNG")
+    return img_bytes.getvalue()
+
+
+class TestLatestSlot:
+    """Test latest-wins mailbox semantics"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_newer_item_replaces_pending_one(self):
+        """Test only the newest unconsumed item is delivered"""
+        slot = LatestSlot()
+        slot.put(1)
+        slot.put(2)
+        slot.put(3)
+
+        assert await slot.get() == 3
+        assert slot.dropped == 2
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_get_waits_for_item(self):
+        """Test the consumer waits for the producer"""
+        slot = LatestSlot()
+        consumer = asyncio.ensure_future(slot.get())
+        await asyncio.sleep(0)
+        assert not consumer.done()
+
+        slot.put("frame")
+        assert await consumer == "frame"
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_close(self):
+        """Test a pending item is still delivered after close, then None"""
+        slot = LatestSlot()
+        slot.put("last")
+        slot.close()
+
+        assert await slot.get() == "last"
+        assert await slot.get() is None
+
+
+class TestFrameBytes:
+    """Test websocket message payload extraction"""
+
+    @pytest.mark.unit
+    def test_binary_and_text_frames(self):
+        """Test binary, base64 and data URL frames"""
+        encoded = base64.b64encode(b"png bytes").decode()
+
+        assert frame_bytes({"bytes": b"raw"}) == b"raw"
+        assert frame_bytes({"text": encoded}) == b"png bytes"
+        assert frame_bytes({"text": f"data:image/png;base64,{encoded}"}) == b"png bytes"
+
+    @pytest.mark.unit
+    def test_invalid_text_frame(self):
+        """Test text that is not base64 is rejected"""
+        with pytest.raises(ValueError, match="base64"):
+            frame_bytes({"text": "not base64!"})
+
+
+class TestRecognizeStream:
+    """Test the /ws/recognize endpoint"""
+
+    @pytest.mark.api
+    def test_results_in_order(self, client, sample_image_bytes):
+        """Test each frame gets its result with increasing sequence numbers"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize.side_effect = lambda data, name: {"status": "success", "filename": name}
+
+            with client.websocket_connect("/ws/recognize") as websocket:
+                seqs = []
+                for _ in range(3):
+                    websocket.send_bytes(sample_image_bytes)
+                    reply = websocket.receive_json()
+                    seqs.append(reply["seq"])
+                    assert reply["filename"] == f"frame-{reply['seq']}"
+
+        assert seqs == [0, 1, 2]
+
+    @pytest.mark.api
+    def test_stale_frames_are_dropped(self, client, sample_image_bytes):
+        """Test frames arriving during processing collapse into the newest one"""
+        gate = threading.Event()
+
+        def process(data, name):
+            gate.wait(5)
+            return {"status": "success", "filename": name}
+
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize.side_effect = process
+
+            with client.websocket_connect("/ws/recognize") as websocket:
+                for _ in range(5):
+                    websocket.send_bytes(sample_image_bytes)
+                gate.set()
+
+                replies = [websocket.receive_json()]
+                while replies[-1]["seq"] != 4:
+                    replies.append(websocket.receive_json())
+
+        seqs = [reply["seq"] for reply in replies]
+        assert seqs == sorted(seqs)
+        assert len(seqs) < 5
+        assert replies[-1]["dropped"] == 5 - len(seqs)
+
+    @pytest.mark.integration
+    def test_raw_pixel_frame(self, client):
+        """Test .npy frames are recognized with the real model"""
+        buffer = io.BytesIO()
+        np.save(buffer, np.zeros((2, 28, 28), dtype=np.uint8))
+
+        with client.websocket_connect("/ws/recognize") as websocket:
+            websocket.send_bytes(buffer.getvalue())
+            reply = websocket.receive_json()
+
+        assert reply["status"] == "success"
+        assert len(reply["results"]) == 2
+
+    @pytest.mark.api
+    def test_bad_frame_reports_error(self, client):
+        """Test an undecodable frame yields an error message and keeps the stream open"""
+        with client.websocket_connect("/ws/recognize") as websocket:
+            websocket.send_text("not base64!")
+            reply = websocket.receive_json()
+            assert reply["status"] == "error"
+
+            websocket.send_bytes(b"not an image")
+            assert websocket.receive_json()["seq"] == 1
@@ -0,0 +1,193 @@
+"""
+Tests for upload limits: body size, magic bytes and pixel count checks
+"""
+
+import io
+import struct
+import zlib
+from dataclasses import replace
+from unittest.mock import patch
+
+import app as app_module
+import cv2
+import numpy as np
+import pytest
+from app import app
+from fastapi import FastAPI, Request, UploadFile
+from fastapi.testclient import TestClient
+from serving import uploads
+from serving.uploads import UploadTooLarge, check_image, read_upload
+from starlette.datastructures import Headers
+
+
+def png(width: int = 28, height: int = 28) -> bytes:
+    _, buffer = cv2.imencode(".png", np.full((height, width), 128, dtype=np.uint8))
+    return buffer.tobytes()
+
+
+def png_bomb(width: int, height: int) -> bytes:
+    """A tiny PNG whose header claims width x height pixels"""
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    chunk = b"IHDR" + ihdr
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + chunk + struct.pack(">I", zlib.crc32(chunk))
+
+
+def upload(data: bytes, size: int | None = None) -> UploadFile:
+    size = len(data) if size is None else size
+    return UploadFile(io.BytesIO(data), size=size, filename="x.png", headers=Headers({"content-type": "image/png"}))
+
+
+class TestCheckImage:
+    """Test format and dimension checks from the header"""
+
+    @pytest.mark.unit
+    def test_accepts_supported_image(self):
+        """Test a PNG within limits is identified"""
+        header = check_image(png(40, 30), max_pixels=10_000)
+        assert (header.format, header.width, header.height) == ("png", 40, 30)
+
+    @pytest.mark.unit
+    def test_rejects_unknown_format(self):
+        """Test the content decides, not the claimed type"""
+        with pytest.raises(ValueError, match="Unsupported or corrupt image"):
+            check_image(b"GIF89a" + b"\x00" * 100, max_pixels=10_000)
+
+    @pytest.mark.unit
+    def test_rejects_too_many_pixels(self):
+        """Test a decompression bomb is refused from its header alone"""
+        with pytest.raises(UploadTooLarge, match="100000x100000"):
+            check_image(png_bomb(100_000, 100_000), max_pixels=50_000_000)
+
+
+class TestReadUpload:
+    """Test bounded reading of one uploaded image"""
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_returns_bytes(self):
+        """Test a valid upload is read completely"""
+        data = png()
+        assert await read_upload(upload(data), max_bytes=1 << 20, max_pixels=10_000) == data
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_announced_size_without_reading(self):
+        """Test an upload larger than the limit is refused before any read"""
+        file = upload(png(), size=10 << 20)
+        with patch.object(file, "read") as read:
+            with pytest.raises(UploadTooLarge):
+                await read_upload(file, max_bytes=1 << 20, max_pixels=10_000)
+        read.assert_not_called()
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_unannounced_oversize(self):
+        """Test the read is cut off at the limit when the size is unknown"""
+        data = png() + b"\x00" * 4096
+        with pytest.raises(UploadTooLarge):
+            await read_upload(upload(data, size=None), max_bytes=1024, max_pixels=10_000)
+
+    @pytest.mark.unit
+    @pytest.mark.asyncio
+    async def test_rejects_bogus_payload(self):
+        """Test a non-image is refused after reading its first chunk"""
+        with pytest.raises(ValueError, match="Unsupported"):
+            await read_upload(upload(b"x" * (1 << 20)), max_bytes=2 << 20, max_pixels=10_000)
+
+
+class TestBodyLimitMiddleware:
+    """Test the request body cap"""
+
+    @pytest.fixture
+    def limited(self):
+        echo = FastAPI()
+
+        @echo.post("/echo")
+        async def body_size(request: Request):
+            return {"size": len(await request.body())}
+
+        echo.add_middleware(uploads.BodyLimitMiddleware, max_bytes=1000)
+        return TestClient(echo)
+
+    @pytest.mark.unit
+    def test_within_limit(self, limited):
+        """Test bodies up to the limit pass through"""
+        response = limited.post("/echo", content=b"x" * 1000)
+        assert response.status_code == 200
+        assert response.json() == {"size": 1000}
+
+    @pytest.mark.unit
+    def test_content_length_over_limit(self, limited):
+        """Test an announced oversize body is refused up front"""
+        response = limited.post("/echo", content=b"x" * 1001)
+        assert response.status_code == 413
+        assert "1000 bytes" in response.json()["detail"]
+
+    @pytest.mark.unit
+    def test_streamed_body_over_limit(self, limited):
+        """Test a chunked body without Content-Length is cut off once it passes the limit"""
+
+        def chunks():
+            for _ in range(100):
+                yield b"x" * 300
+
+        response = limited.post("/echo", content=chunks())
+        assert response.status_code == 413
+
+
+class TestUploadEndpoints:
+    """Test the limits on the recognition endpoints"""
+
+    @pytest.fixture
+    def client(self):
+        return TestClient(app)
+
+    @pytest.mark.api
+    def test_bogus_image_rejected_before_model(self, client):
+        """Test a payload that only claims to be an image never reaches the model"""
+        with patch("app.model") as mock_model:
+            files = {"image_file": ("fake.png", b"<html>not a png</html>", "image/png")}
+            response = client.post("/recognize_digit", files=files)
+
+        assert response.status_code == 400
+        assert "Unsupported" in response.json()["detail"]
+        mock_model.process_and_recognize.assert_not_called()
+
+    @pytest.mark.api
+    @pytest.mark.parametrize("endpoint", ["/recognize_digit", "/recognize_number"])
+    def test_pixel_bomb_rejected(self, client, endpoint):
+        """Test an image with too many pixels is refused with 413 before decoding"""
+        with patch("app.model") as mock_model:
+            files = {"image_file": ("bomb.png", png_bomb(60_000, 60_000), "image/png")}
+            response = client.post(endpoint, files=files)
+
+        assert response.status_code == 413
+        assert mock_model.method_calls == []
+
+    @pytest.mark.api
+    def test_upload_over_limit(self, client):
+        """Test an image file larger than the per-upload limit gets 413"""
+        with patch("app.settings", replace(app_module.settings, max_upload_bytes=1024)):
+            files = {"image_file": ("big.png", png(200, 200) + b"\x00" * 2048, "image/png")}
+            response = client.post("/recognize_digit", files=files)
+
+        assert response.status_code == 413
+
+    @pytest.mark.api
+    def test_batch_reports_rejections_per_item(self, client):
+        """Test a bad upload in a batch fails alone"""
+        with patch("app.model") as mock_model:
+            mock_model.process_and_recognize_batch.return_value = [
+                {"status": "success", "recognized_digit": 1, "model_confidence": 0.9, "filename": "ok.png"}
+            ]
+            files = [
+                ("image_files", ("ok.png", png(), "image/png")),
+                ("image_files", ("bomb.png", png_bomb(60_000, 60_000), "image/png")),
+            ]
+            response = client.post("/recognize_digits", files=files)
+
+        assert response.status_code == 200
+        ok, bomb = response.json()["results"]
+        assert ok["status"] == "success"
+        assert bomb["status"] == "error" and "exceeds the limit" in bomb["error"]
+        assert mock_model.process_and_recognize_batch.call_args[0][0] == [(png(), "ok.png")]
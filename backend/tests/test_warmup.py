@@ -0,0 +1,109 @@
+"""
+Tests for the startup warmup and the readiness endpoint
+"""
+
+from unittest.mock import Mock, patch
+
+import numpy as np
+import pytest
+from app import app
+from fastapi.testclient import TestClient
+from model.onnx import ONNXModel
+from model.registry import get_variant, variant_path
+from serving.warmup import Warmup, default_batch_sizes
+
+
+class TestWarmup:
+    """Test the warmup runner"""
+
+    @pytest.mark.unit
+    @pytest.mark.parametrize(
+        "batch_caps,expected",
+        [
+            ((1,), (1,)),
+            ((8,), (1, 2, 4, 8)),
+            ((12,), (1, 2, 4, 8, 12)),
+            ((0,), (1,)),
+            ((32, 32, 256), (1, 2, 4, 8, 16, 32, 64, 128, 256)),
+            ((12, 100), (1, 2, 4, 8, 12, 16, 32, 64, 100)),
+        ],
+    )
+    def test_default_batch_sizes(self, batch_caps, expected):
+        """Test default sizes cover powers of two up to the largest cap and every cap"""
+        assert default_batch_sizes(*batch_caps) == expected
+
+    @pytest.mark.unit
+    def test_runs_every_size(self):
+        """Test every batch size is run for every iteration and timed"""
+        run = Mock()
+        warmup = Warmup(run, [1, 4], iterations=2)
+        assert not warmup.ready
+
+        warmup.start()
+
+        assert warmup.join(timeout=5)
+        assert [c.args[0] for c in run.call_args_list] == [1, 1, 4, 4]
+        status = warmup.status()
+        assert status["state"] == "done"
+        assert set(status["timings"]) == {"1", "4"}
+        assert status["timings"]["4"]["first_ms"] >= 0
+        assert status["total_ms"] is not None
+
+    @pytest.mark.unit
+    def test_failure_is_not_ready(self):
+        """Test a failing warmup keeps the service unready and reports the error"""
+        warmup = Warmup(Mock(side_effect=RuntimeError("boom")), [1])
+        warmup.start()
+
+        assert not warmup.join(timeout=5)
+        assert warmup.status()["state"] == "failed"
+        assert warmup.status()["error"] == "boom"
+
+    @pytest.mark.unit
+    def test_nothing_to_warm_is_ready(self):
+        """Test a disabled warmup (no sizes) is ready immediately"""
+        warmup = Warmup(Mock(), [])
+        warmup.start()
+
+        assert warmup.ready
+        assert warmup.status()["state"] == "skipped"
+
+    @pytest.mark.integration
+    def test_onnx_warmup_bypasses_tensor_cache(self):
+        """Test model warmup runs real batches without filling the tensor cache"""
+        cache = Mock()
+        model = ONNXModel(variant_path(get_variant("fp32")), max_batch_size=8, tensor_cache=cache)
+
+        for size in (1, 8, 20):
+            model.warmup(size)
+
+        cache.put.assert_not_called()
+        assert model.batch_stats()["items"] == 1
+
+
+class TestReadyEndpoint:
+    """Test /ready against /health"""
+
+    @pytest.mark.api
+    def test_not_ready_before_warmup(self):
+        """Test /ready answers 503 while /health is already healthy"""
+        with patch("app.warmup", Warmup(Mock(), [1])):
+            client = TestClient(app)
+            assert client.get("/health").status_code == 200
+            response = client.get("/ready")
+
+        assert response.status_code == 503
+        assert response.json()["state"] == "pending"
+
+    @pytest.mark.api
+    def test_ready_after_startup_warmup(self):
+        """Test the app lifespan starts the warmup and /ready reports its timing"""
+        warmup = Warmup(Mock(), [1, 2])
+        with patch("app.warmup", warmup), TestClient(app) as client:
+            warmup.join(timeout=5)
+            response = client.get("/ready")
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["ready"] is True
+        assert set(body["timings"]) == {"1", "2"}
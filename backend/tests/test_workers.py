@@ -0,0 +1,87 @@
+"""
+Tests for the multi-process serving plan and ORT session tuning
+"""
+
+import onnxruntime as ort
+import pytest
+from model.onnx import SessionConfig
+from serving.workers import plan_workers, restart_delay
+
+
+class TestPlanWorkers:
+    """Test how cores are split between worker processes"""
+
+    @pytest.mark.unit
+    def test_default_is_one_single_threaded_worker_per_core(self):
+        """Test the automatic plan uses every core once"""
+        plans = plan_workers(range(4))
+
+        assert len(plans) == 4
+        assert all(plan.intra_op_threads == 1 for plan in plans)
+        assert [plan.cpus for plan in plans] == [(0,), (1,), (2,), (3,)]
+
+    @pytest.mark.unit
+    def test_threads_per_worker_derives_worker_count(self):
+        """Test that a thread budget per worker determines the number of workers"""
+        plans = plan_workers([0, 1, 2, 3, 4, 5, 6, 7], threads_per_worker=4)
+
+        assert len(plans) == 2
+        assert [plan.cpus for plan in plans] == [(0, 1, 2, 3), (4, 5, 6, 7)]
+
+    @pytest.mark.unit
+    def test_worker_count_derives_threads(self):
+        """Test that a fixed worker count shares the cores between workers"""
+        plans = plan_workers(range(16), workers=4)
+
+        assert all(plan.intra_op_threads == 4 for plan in plans)
+        assert sorted(cpu for plan in plans for cpu in plan.cpus) == list(range(16))
+
+    @pytest.mark.unit
+    def test_no_pinning(self):
+        """Test that pinning can be disabled"""
+        plans = plan_workers(range(2), pin=False)
+        assert all(plan.cpus is None for plan in plans)
+
+    @pytest.mark.unit
+    def test_worker_environment(self):
+        """Test the settings handed to a worker process"""
+        env = plan_workers(range(4), workers=2)[0].environ()
+
+        assert env["MNIST_ORT_INTRA_OP_THREADS"] == "2"
+        assert env["MNIST_ORT_INTER_OP_THREADS"] == "1"
+        assert env["MNIST_ORT_ALLOW_SPINNING"] == "0"
+        # Request threads scale with the worker's cores, not the single-process default
+        assert env["MNIST_EXECUTOR_WORKERS"] == "4"
+
+    @pytest.mark.unit
+    def test_restart_backoff(self):
+        """Test crashed workers are restarted ever more slowly and eventually given up on"""
+        delays = [restart_delay(restarts) for restarts in range(6)]
+
+        assert delays[:5] == [0.5, 1.0, 2.0, 4.0, 8.0]
+        assert delays[5] is None
+
+    @pytest.mark.unit
+    def test_no_cpus(self):
+        """Test that an empty core list is rejected"""
+        with pytest.raises(ValueError):
+            plan_workers([])
+
+
+class TestSessionConfig:
+    """Test conversion of SessionConfig into ORT session options"""
+
+    @pytest.mark.unit
+    def test_build_options(self):
+        """Test thread counts and execution mode are applied"""
+        options = SessionConfig(intra_op_threads=2, inter_op_threads=1, execution_mode="parallel").build()
+
+        assert options.intra_op_num_threads == 2
+        assert options.inter_op_num_threads == 1
+        assert options.execution_mode == ort.ExecutionMode.ORT_PARALLEL
+
+    @pytest.mark.unit
+    def test_unknown_execution_mode(self):
+        """Test that an unknown execution mode is rejected"""
+        with pytest.raises(ValueError, match="Unknown execution mode"):
+            SessionConfig(execution_mode="turbo").build()